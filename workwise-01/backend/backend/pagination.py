@@ -0,0 +1,234 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Offset pagination gets slower the deeper a client scrolls because the database
+has to walk and discard every skipped row. Keyset pagination instead remembers
+the ordering values of the last row on the page and asks for the rows that
+sort after it, which an index on the ordering columns answers with a single
+range scan regardless of how far into the table the page is.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by the values of its ordering columns.
+
+    The ordering must be unique and its columns non-null, so it should always end
+    with the primary key (e.g. ``('scheduled_date', 'id')``). Prefix a field with
+    ``-`` to order it descending. Cursors are opaque base64 tokens; clients only
+    ever follow the ``next`` and ``previous`` links.
+
+    Attributes:
+        ordering (tuple): The columns the page is ordered and keyed by.
+        page_size (int): Number of results per page when the client doesn't ask.
+        max_page_size (int): Upper bound for the ``page_size`` query parameter.
+        optional (bool): When True, the queryset is only paginated if the client
+                         sends a ``cursor`` or ``page_size`` parameter, so existing
+                         clients keep getting a plain list.
+    """
+
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    optional = False
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.request = None
+        self.base_url = None
+        self.page = []
+        self.has_next = False
+        self.has_previous = False
+
+    def is_requested(self, request):
+        """Returns True if the client asked for a paginated response."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        """Returns the page size requested by the client, clamped to `max_page_size`."""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns one page of `queryset` as a list, or None when pagination is optional
+        and wasn't requested.
+
+        Args:
+            queryset (QuerySet): The unordered queryset to paginate.
+            request (Request): The current request.
+            view (APIView): The calling view, unused.
+        """
+        if self.optional and not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        reverse, position = False, None
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            reverse, position = self.decode_cursor(encoded, queryset.model)
+
+        ordering = list(self.ordering)
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        """Wraps the serialized page with links to the neighbouring pages."""
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def to_html(self):
+        """Renders no page controls in the browsable API; clients follow the links."""
+        return ''
+
+    def get_next_link(self):
+        """Returns the URL of the following page, or None on the last page."""
+        if not self.has_next or not self.page:
+            return None
+        return self._link(False, self.page[-1])
+
+    def get_previous_link(self):
+        """Returns the URL of the preceding page, or None on the first page."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(True, self.page[0])
+
+    def encode_cursor(self, reverse, row):
+        """
+        Encodes the ordering values of `row` into an opaque cursor token.
+
+        Args:
+            reverse (bool): True if the cursor points at the previous page.
+            row (Model): The boundary row of the current page.
+
+        Returns:
+            str: A URL-safe base64 token.
+        """
+        values = [self._dump(getattr(row, field.lstrip('-'))) for field in self.ordering]
+        payload = json.dumps({'r': int(reverse), 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded, model):
+        """
+        Decodes a cursor token produced by `encode_cursor`.
+
+        Args:
+            encoded (str): The token from the query string.
+            model (Model): The model being paginated, used to parse column values.
+
+        Returns:
+            tuple: ``(reverse, values)`` where `values` lines up with `ordering`.
+
+        Raises:
+            NotFound: If the token is malformed.
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['v']
+            if len(values) != len(self.ordering):
+                raise ValueError(encoded)
+            parsed = [self._load(model, field.lstrip('-'), value)
+                      for field, value in zip(self.ordering, values)]
+            return bool(payload['r']), parsed
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error,
+                ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def _link(self, reverse, row):
+        cursor = self.encode_cursor(reverse, row)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        Builds the filter selecting rows that sort strictly after `position`.
+
+        For ``(a, b)`` ascending this is ``a >= x AND (a > x OR b > y)``. The leading
+        ``a >= x`` term gives the planner a range bound on the index's first column,
+        and the rest is the usual row-value comparison expanded into ORs.
+        """
+        clauses = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[i]})
+            for j in range(i):
+                clause &= Q(**{ordering[j].lstrip('-'): position[j]})
+            clauses |= clause
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & clauses
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _load(model, name, value):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotated columns such as search rank are plain JSON numbers.
+            return value
+        return field.to_python(value)
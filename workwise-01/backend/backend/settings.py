@@ -46,6 +46,8 @@ INSTALLED_APPS = [
     'machines',
     'notifications',
     'jobs',
+    'sync',
+    'telemetry',
     'corsheaders',
     'django_extensions',
 ]
@@ -130,6 +132,43 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Default number of jobs a department or machine can take per day when planning,
+# for resources without their own SchedulingCapacity row.
+JOB_SCHEDULER_SLOTS_PER_DAY = 5
+
+# Completed jobs stay in the hot job table for this many days before the
+# archive_jobs command moves them to the archive.
+JOB_ARCHIVE_AFTER_DAYS = 7
+
+# Number of rows fetched per database round trip by the streaming export endpoints.
+EXPORT_CHUNK_SIZE = 2000
+
+# How long deletions are remembered for delta sync. Clients that haven't synced for
+# longer than this get a full resync.
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Days between maintenances for machine model numbers without their own interval.
+MAINTENANCE_INTERVAL_DAYS = 30
+
+# Raw telemetry readings are pruned after this many days; rollups are kept.
+TELEMETRY_RAW_RETENTION_DAYS = 30
+
+# Length of the windows compared by the reliability failure-rate trend: failures in
+# the last N days against the N days before.
+RELIABILITY_TREND_DAYS = 90
+
+# New notifications reach connected event-stream clients within this many seconds;
+# idle streams get a keep-alive comment every NOTIFICATION_PUSH_HEARTBEAT_SECONDS.
+NOTIFICATION_PUSH_POLL_SECONDS = 0.5
+NOTIFICATION_PUSH_HEARTBEAT_SECONDS = 15
+
+# Broadcast notifications are written by this many background threads per process.
+NOTIFICATION_BROADCAST_WORKERS = 2
+
+# Hours a maintenance ticket of each priority (1 = Low ... 4 = Critical) may stay
+# unfinished before it counts as an SLA breach.
+TICKET_SLA_HOURS = {1: 168, 2: 72, 3: 24, 4: 4}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -13,6 +13,8 @@ urlpatterns = [
     path('api/machines/', include('machines.urls')),  # Machines-related URLs
     path('api/notifications/', include('notifications.urls')),  # Notifications-related URLs
     path('api/jobs/', include('jobs.urls')),  # Jobs-related URLs
+    path('api/sync/', include('sync.urls')),  # Delta-sync URLs
+    path('api/telemetry/', include('telemetry.urls')),  # Machine telemetry URLs
     path('api/accounts/', include('accounts.urls')),
     path('', home_view),  # Homepage
 ]
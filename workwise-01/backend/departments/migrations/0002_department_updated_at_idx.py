@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['updated_at'], name='department_updated_at_idx'),
+        ),
+    ]
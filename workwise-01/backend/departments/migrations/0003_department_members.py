@@ -0,0 +1,20 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_department_updated_at_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='departments', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,12 +1,20 @@
+from django.contrib.auth.models import User
 from django.db import models
 
 class Department(models.Model):
-    """Department model"""
+    """Department model; `members` are the users a department broadcast reaches."""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    members = models.ManyToManyField(User, blank=True, related_name='departments')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        """Meta options; `updated_at` is indexed for delta sync."""
+        indexes = [
+            models.Index(fields=['updated_at'], name='department_updated_at_idx'),
+        ]
+
     def __str__(self):
         # Ensure it always returns a string, handling potential None values
         return str(self.name) if self.name else ''
@@ -1,3 +1,21 @@
 from django.contrib import admin
+from .models import JobTemplate, SchedulingCapacity
 
-# Register your models here.
+
+@admin.register(SchedulingCapacity)
+class SchedulingCapacityAdmin(admin.ModelAdmin):
+    """
+    Admin interface options for the SchedulingCapacity model.
+
+    Lets planners set how many jobs each department or machine can take per day.
+    """
+    list_display = ('department', 'machine', 'slots_per_day')
+
+
+@admin.register(JobTemplate)
+class JobTemplateAdmin(admin.ModelAdmin):
+    """
+    Admin interface options for the JobTemplate model.
+    """
+    list_display = ('title', 'frequency', 'interval', 'start_date', 'end_date', 'is_active')
+    list_filter = ('frequency', 'is_active')
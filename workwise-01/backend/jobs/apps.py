@@ -6,10 +6,14 @@ class JobsConfig(AppConfig):
     Configuration class for the Jobs application.
 
     This class sets up the Jobs application with the default auto-incrementing
-    primary key field type (`BigAutoField`) and registers the application under
-    the name 'jobs'.
+    primary key field type (`BigAutoField`), registers the application under
+    the name 'jobs' and connects the signal handlers that keep the scheduler
+    up to date.
     """
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "jobs"
+
+    def ready(self):
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
     
\ No newline at end of file
@@ -0,0 +1,198 @@
+# pylint: disable=no-member
+"""
+Job dependency graph: cycle-checked edges, topological order and critical path.
+
+Every job has a rank, `Job.topo_rank` or its id when the rank was never set, and
+the ranks of the jobs form a topological order of the graph: a job always ranks
+after everything it depends on. Adding an edge that already agrees with the order
+costs one query. Otherwise only the jobs ranked between the two endpoints and
+connected to them are searched and reshuffled among their own ranks (Pearce and
+Kelly's dynamic topological sort), and reaching the prerequisite from the
+dependent job during that search is how cycles are detected.
+
+With the order maintained, earliest and latest start dates for every active job
+come from one forward and one backward pass over the jobs sorted by rank, linear
+in the number of jobs and edges.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Coalesce
+
+from .models import Job, JobDependency
+
+# Key of the PostgreSQL advisory lock serializing graph edits. Two edges that are
+# each acyclic can close a cycle together, so edits must not interleave.
+GRAPH_LOCK_KEY = 7311
+
+
+class DependencyCycleError(ValueError):
+    """Raised when a new dependency would close a cycle."""
+
+
+def rank_of(prefix=''):
+    """Returns the expression for the effective topological rank of a job."""
+    return Coalesce(f'{prefix}topo_rank', f'{prefix}id', output_field=BigIntegerField())
+
+
+def _lock_graph():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [GRAPH_LOCK_KEY])
+
+
+def _reach(start, start_rank, forward, bound):
+    """
+    Collects the jobs reachable from `start` without leaving the rank window.
+
+    Args:
+        start (int): The job id to search from.
+        start_rank (int): Its rank.
+        forward (bool): Follow edges to dependent jobs if True, to prerequisites if False.
+        bound (int): Forward searches keep ranks <= `bound`, backward ones >= `bound`.
+
+    Returns:
+        dict: Maps every reached job id, `start` included, to its rank.
+    """
+    reached = {start: start_rank}
+    frontier = [start]
+    while frontier:
+        if forward:
+            edges = JobDependency.objects.filter(depends_on__in=frontier).annotate(
+                node=F('job_id'), rank=rank_of('job__')).filter(rank__lte=bound)
+        else:
+            edges = JobDependency.objects.filter(job__in=frontier).annotate(
+                node=F('depends_on_id'), rank=rank_of('depends_on__')).filter(rank__gte=bound)
+        frontier = []
+        for node, rank in edges.values_list('node', 'rank'):
+            if node not in reached:
+                reached[node] = rank
+                frontier.append(node)
+    return reached
+
+
+def add_dependency(job, depends_on):
+    """
+    Records that `job` can't start before `depends_on` is finished.
+
+    Args:
+        job (Job): The job that waits.
+        depends_on (Job): The job that must be finished first.
+
+    Returns:
+        tuple: ``(dependency, created)``.
+
+    Raises:
+        DependencyCycleError: If `depends_on` already depends on `job`, directly or not.
+    """
+    if job.id == depends_on.id:
+        raise DependencyCycleError('A job cannot depend on itself')
+
+    with transaction.atomic():
+        _lock_graph()
+        ranks = dict(Job.objects.filter(id__in=[job.id, depends_on.id])
+                     .annotate(rank=rank_of()).values_list('id', 'rank'))
+        upper, lower = ranks[depends_on.id], ranks[job.id]
+        if upper > lower:
+            # `job` currently ranks first: gather what follows it up to
+            # `depends_on`, and what precedes `depends_on` down to `job`.
+            following = _reach(job.id, lower, forward=True, bound=upper)
+            if depends_on.id in following:
+                raise DependencyCycleError(f'Job {depends_on.id} already depends on job {job.id}')
+            preceding = _reach(depends_on.id, upper, forward=False, bound=lower)
+            _reorder(preceding, following)
+        return JobDependency.objects.get_or_create(job=job, depends_on=depends_on)
+
+
+def _reorder(preceding, following):
+    """
+    Gives the `preceding` jobs the lowest of the combined ranks and the `following`
+    jobs the rest, each group keeping its internal order.
+    """
+    ordered = sorted(preceding, key=preceding.get) + sorted(following, key=following.get)
+    ranks = sorted(list(preceding.values()) + list(following.values()))
+    jobs = [Job(id=job_id, topo_rank=rank) for job_id, rank in zip(ordered, ranks)]
+    # The rank is internal bookkeeping, not part of the job's representation, so
+    # `updated_at` is deliberately left alone.
+    Job.objects.bulk_update(jobs, ['topo_rank'], batch_size=1000)
+
+
+def remove_dependency(job, depends_on):
+    """
+    Deletes the edge from `depends_on` to `job`; the order stays valid as is.
+
+    Args:
+        job (Job or int): The job that waits.
+        depends_on (Job or int): The job it waited for.
+
+    Returns:
+        bool: True if an edge was deleted.
+    """
+    deleted, _ = JobDependency.objects.filter(job=job, depends_on=depends_on).delete()
+    return bool(deleted)
+
+
+def critical_path(start):
+    """
+    Computes earliest/latest start dates and the critical path of the active jobs.
+
+    Dependencies on completed jobs count as satisfied. Durations are whole days and
+    a job may start on the day its last prerequisite finishes.
+
+    Args:
+        start (date): The day work can begin.
+
+    Returns:
+        dict: ``finish`` (the first day after all work ends), ``duration_days``,
+        ``critical_path`` (job ids from first to last) and ``jobs``, one entry per
+        job in topological order with its dates and slack.
+    """
+    jobs = list(Job.objects.active().annotate(rank=rank_of()).order_by('rank')
+                .values_list('id', 'title', 'duration_days'))
+    predecessors = defaultdict(list)
+    successors = defaultdict(list)
+    edges = JobDependency.objects.filter(job__status=Job.STATUS_ACTIVE,
+                                         depends_on__status=Job.STATUS_ACTIVE)
+    for job_id, depends_on_id in edges.values_list('job_id', 'depends_on_id'):
+        predecessors[job_id].append(depends_on_id)
+        successors[depends_on_id].append(job_id)
+
+    earliest, finish = {}, {}
+    for job_id, _, duration in jobs:
+        earliest[job_id] = max((finish[p] for p in predecessors[job_id]), default=0)
+        finish[job_id] = earliest[job_id] + duration
+    total = max(finish.values(), default=0)
+
+    latest = {}
+    for job_id, _, duration in reversed(jobs):
+        latest[job_id] = min((latest[s] for s in successors[job_id]), default=total) - duration
+
+    path = []
+    current = next((job_id for job_id, _, _ in reversed(jobs)
+                    if finish[job_id] == total and latest[job_id] == earliest[job_id]), None)
+    while current is not None:
+        path.append(current)
+        current = next((p for p in predecessors[current]
+                        if latest[p] == earliest[p] and finish[p] == earliest[current]), None)
+    path.reverse()
+
+    def day(offset):
+        return start + datetime.timedelta(days=offset)
+
+    return {
+        'start': start,
+        'finish': day(total),
+        'duration_days': total,
+        'critical_path': path,
+        'jobs': [{
+            'job': job_id,
+            'title': title,
+            'duration_days': duration,
+            'earliest_start': day(earliest[job_id]),
+            'latest_start': day(latest[job_id]),
+            'slack': latest[job_id] - earliest[job_id],
+            'critical': latest[job_id] == earliest[job_id],
+        } for job_id, title, duration in jobs],
+    }
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+
+from jobs.models import ArchivedJob, Job
+from sync.signals import bulk_delete
+
+ARCHIVED_FIELDS = ['id', 'title', 'description', 'priority', 'scheduled_date', 'deadline',
+                   'department_id', 'machine_id', 'template_id', 'occurrence_date',
+                   'created_at', 'updated_at', 'completed_at']
+
+
+class Command(BaseCommand):
+    """
+    Moves completed jobs from the hot `Job` table into `ArchivedJob`.
+
+    Each batch is copied and deleted in its own short transaction, so archiving a
+    large backlog never holds locks on many rows at once. On PostgreSQL rows being
+    edited concurrently are skipped and picked up by the next run.
+    """
+
+    help = 'Move completed jobs into the archive table in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of jobs moved per transaction.')
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'JOB_ARCHIVE_AFTER_DAYS', 7),
+                            help='Only archive jobs completed at least this many days ago.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['older_than_days'] < 0:
+            raise CommandError('--batch-size must be positive and --older-than-days not negative')
+
+        cutoff = now() - timedelta(days=options['older_than_days'])
+        total = 0
+        while True:
+            moved = self.archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Archived {total} jobs...')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} completed jobs.'))
+
+    @staticmethod
+    def archive_batch(cutoff, batch_size):
+        """
+        Moves one batch of jobs completed before `cutoff` to the archive.
+
+        Returns:
+            int: The number of jobs moved; 0 when there is nothing left.
+        """
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.completed()
+                .filter(completed_at__lt=cutoff)
+                .order_by('completed_at', 'id')
+                .only(*ARCHIVED_FIELDS)
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not jobs:
+                return 0
+            ArchivedJob.objects.bulk_create(
+                [ArchivedJob(**{field: getattr(job, field) for field in ARCHIVED_FIELDS})
+                 for job in jobs],
+                ignore_conflicts=True,
+            )
+            bulk_delete(Job, [job.id for job in jobs])
+        return len(jobs)
@@ -0,0 +1,54 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+from django.utils.timezone import now
+
+from jobs.scheduling import CapacityModel, get_scheduler
+
+
+class Command(BaseCommand):
+    """
+    Prints the deadline/priority plan for pending jobs.
+
+    Uses the same scheduler and capacity model as the `jobs/schedule/` endpoint.
+    """
+
+    help = 'Plan pending jobs into daily slots by deadline and priority.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start',
+                            help='First day of the window (YYYY-MM-DD), defaults to today.')
+        parser.add_argument('--days', type=int, default=14, help='Length of the window in days.')
+        parser.add_argument('--slots-per-day', type=int,
+                            help='Default daily capacity per resource.')
+        parser.add_argument('--json', action='store_true', help='Print the plan as JSON.')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['start']) if options['start'] else now().date()
+        if start is None:
+            raise CommandError('--start must be YYYY-MM-DD')
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+
+        assignments, unassigned = get_scheduler().plan(
+            start, options['days'], CapacityModel.from_db(options['slots_per_day'])
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'start': start, 'assignments': assignments, 'unassigned': unassigned},
+                cls=DjangoJSONEncoder, indent=2,
+            ))
+            return
+
+        for item in assignments:
+            late = ' LATE' if item['late'] else ''
+            self.stdout.write(f"{item['date']:%Y-%m-%d}  {item['resource']:<16} "
+                              f"#{item['job']} {item['title']}{late}")
+        end = start + datetime.timedelta(days=options['days'] - 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Planned {len(assignments)} jobs from {start} to {end}; {unassigned} did not fit.'
+        ))
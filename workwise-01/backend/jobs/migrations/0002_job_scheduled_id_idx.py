@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['scheduled_date', 'id'], name='job_scheduled_id_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0001_initial'),
+        ('jobs', '0002_job_scheduled_id_idx'),
+        ('machines', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='deadline',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='departments.department'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='machine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='machines.machine'),
+        ),
+        migrations.CreateModel(
+            name='SchedulingCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slots_per_day', models.PositiveIntegerField(default=1)),
+                ('department', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='capacity', to='departments.department')),
+                ('machine', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='capacity', to='machines.machine')),
+            ],
+            options={
+                'verbose_name_plural': 'scheduling capacities',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('department__isnull', False), ('machine__isnull', True)), models.Q(('department__isnull', True), ('machine__isnull', False)), _connector='OR'), name='capacity_single_resource')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_department_updated_at_idx'),
+        ('jobs', '0003_job_scheduling'),
+        ('machines', '0002_machine_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at'], name='job_updated_at_idx'),
+        ),
+    ]
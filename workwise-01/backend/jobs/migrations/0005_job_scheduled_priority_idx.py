@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_department_updated_at_idx'),
+        ('jobs', '0004_job_updated_at_idx'),
+        ('machines', '0002_machine_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['scheduled_date', 'priority'], name='job_scheduled_priority_idx'),
+        ),
+    ]
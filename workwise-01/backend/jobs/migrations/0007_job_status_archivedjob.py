@@ -0,0 +1,83 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_legacy_completed(apps, schema_editor):  # pylint: disable=unused-argument
+    # Completion used to be recorded as priority 0.
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(priority=0).update(status='completed', completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_department_updated_at_idx'),
+        ('jobs', '0006_job_search_vector'),
+        ('machines', '0002_machine_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('priority', models.IntegerField()),
+                ('scheduled_date', models.DateField()),
+                ('deadline', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_scheduled_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_scheduled_priority_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('completed', 'Completed')], default='active', max_length=20),
+        ),
+        migrations.RunPython(mark_legacy_completed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['scheduled_date', 'id'], name='job_active_scheduled_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['scheduled_date', 'priority'], name='job_active_sched_prio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['completed_at', 'id'], name='job_completed_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedjob',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_jobs', to='departments.department'),
+        ),
+        migrations.AddField(
+            model_name='archivedjob',
+            name='machine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_jobs', to='machines.machine'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedjob',
+            index=models.Index(fields=['completed_at', 'id'], name='archivedjob_completed_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_jobtemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='duration_days',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='topo_rank',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='JobDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('depends_on', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='jobs.job')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='jobs.job')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'depends_on'), name='jobdependency_unique_edge'), models.CheckConstraint(condition=models.Q(('job', models.F('depends_on')), _negated=True), name='jobdependency_no_self_loop')],
+            },
+        ),
+    ]
@@ -1,5 +1,19 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+
+class JobQuerySet(models.QuerySet):
+    """QuerySet for jobs with shortcuts for the hot (active) and completed sets."""
+
+    def active(self):
+        """Returns the jobs that still need doing."""
+        return self.filter(status=Job.STATUS_ACTIVE)
+
+    def completed(self):
+        """Returns the completed jobs waiting to be archived."""
+        return self.filter(status=Job.STATUS_COMPLETED)
+
+
 class Job(models.Model):
     """
     Model representing a job entry with a title, description, priority, and scheduling information.
@@ -9,8 +23,22 @@ class Job(models.Model):
         description (TextField): Detailed description of the job.
         priority (IntegerField): Priority level of the job, with choices for Low, Medium, and High.
         scheduled_date (DateField): The date the job is scheduled for.
+        deadline (DateField): The date the job must be finished by, optional.
+        duration_days (PositiveIntegerField): Working days the job takes, used by the
+            critical-path computation.
+        department (ForeignKey): The department whose capacity the job uses, optional.
+        machine (ForeignKey): The machine whose capacity the job uses, optional.
+        status (CharField): Either 'active' or 'completed'. Completed jobs are moved to
+            `ArchivedJob` by the `archive_jobs` command.
+        completed_at (DateTimeField): The timestamp when the job was completed, optional.
+        template (ForeignKey): The recurring template this job was materialized from, optional.
+        occurrence_date (DateField): The template occurrence this job stands for, optional.
         created_at (DateTimeField): The timestamp when the job was created (auto-set on creation).
         updated_at (DateTimeField): The timestamp when the job was last updated (auto-updated).
+        search_vector (SearchVectorField): Weighted `tsvector` of the title and description,
+            maintained by a database trigger on PostgreSQL and unused elsewhere.
+        topo_rank (BigIntegerField): Position in the topological order of the dependency
+            graph; jobs never reordered use their id (see `jobs.dependencies`).
     """
 
     PRIORITY_CHOICES = [
@@ -20,12 +48,61 @@ class Job(models.Model):
     ]
     """Priority choices for the job, with levels Low, Medium, and High."""
 
+    STATUS_ACTIVE = 'active'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+    """Status choices for the job."""
+
     title = models.CharField(max_length=255)
     description = models.TextField()
     priority = models.IntegerField(choices=PRIORITY_CHOICES)
     scheduled_date = models.DateField()
+    deadline = models.DateField(null=True, blank=True)
+    duration_days = models.PositiveIntegerField(default=1)
+    department = models.ForeignKey('departments.Department', on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='jobs')
+    machine = models.ForeignKey('machines.Machine', on_delete=models.SET_NULL,
+                                null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    template = models.ForeignKey('JobTemplate', on_delete=models.SET_NULL,
+                                 null=True, blank=True, related_name='jobs')
+    occurrence_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    topo_rank = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        """
+        Meta options for the Job model.
+
+        The composite index on `scheduled_date` and `id` backs keyset pagination of
+        the job list, so fetching any page is a single index range scan. The
+        `updated_at` index serves delta sync and the scheduler's catch-up reads, and
+        the `scheduled_date`/`priority` index lets the calendar aggregate be answered
+        from the index alone. Both hot-path indexes only cover active jobs, and the
+        `completed_at` index lets the archiver find completed jobs without scanning.
+        """
+        indexes = [
+            models.Index(fields=['scheduled_date', 'id'], name='job_active_scheduled_id_idx',
+                         condition=models.Q(status='active')),
+            models.Index(fields=['updated_at'], name='job_updated_at_idx'),
+            models.Index(fields=['scheduled_date', 'priority'], name='job_active_sched_prio_idx',
+                         condition=models.Q(status='active')),
+            models.Index(fields=['completed_at', 'id'], name='job_completed_at_idx',
+                         condition=models.Q(status='completed')),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['template', 'occurrence_date'],
+                                    name='job_unique_occurrence',
+                                    condition=models.Q(template__isnull=False)),
+        ]
 
     def __str__(self):
         """
@@ -35,4 +112,206 @@ class Job(models.Model):
             str: The title of the job, or "No Title" if the title is empty.
         """
         return str(self.title) if self.title else "No Title"
-    
\ No newline at end of file
+    
+
+class JobTemplate(models.Model):
+    """
+    Model representing a job that recurs on a fixed rule.
+
+    Occurrences are not stored. They are expanded lazily for whatever date window is
+    requested (see `jobs.recurrence`), and an occurrence only becomes a `Job` row
+    once someone acts on it.
+
+    Attributes:
+        title (CharField): The title given to each occurrence.
+        description (TextField): The description given to each occurrence.
+        priority (IntegerField): The priority given to each occurrence.
+        department (ForeignKey): The department occurrences are assigned to, optional.
+        machine (ForeignKey): The machine occurrences are assigned to, optional.
+        frequency (CharField): 'daily', 'weekly' or 'monthly'.
+        interval (PositiveIntegerField): Repeat every `interval` days, weeks or months.
+        start_date (DateField): The first occurrence; it also fixes the weekday or day
+            of the month later occurrences fall on.
+        end_date (DateField): The last day an occurrence may fall on, optional.
+        is_active (BooleanField): Inactive templates produce no occurrences.
+        created_at (DateTimeField): The timestamp when the template was created.
+        updated_at (DateTimeField): The timestamp when the template was last updated.
+    """
+
+    FREQUENCY_DAILY = 'daily'
+    FREQUENCY_WEEKLY = 'weekly'
+    FREQUENCY_MONTHLY = 'monthly'
+    FREQUENCY_CHOICES = [
+        (FREQUENCY_DAILY, 'Daily'),
+        (FREQUENCY_WEEKLY, 'Weekly'),
+        (FREQUENCY_MONTHLY, 'Monthly'),
+    ]
+    """Frequency choices for the recurrence rule."""
+
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    priority = models.IntegerField(choices=Job.PRIORITY_CHOICES)
+    department = models.ForeignKey('departments.Department', on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='job_templates')
+    machine = models.ForeignKey('machines.Machine', on_delete=models.SET_NULL,
+                                null=True, blank=True, related_name='job_templates')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta options for the JobTemplate model."""
+        constraints = [
+            models.CheckConstraint(condition=models.Q(interval__gte=1),
+                                   name='jobtemplate_interval_positive'),
+        ]
+
+    def __str__(self):
+        """
+        Returns the string representation of the template, showing its title and rule.
+
+        Returns:
+            str: The title and the recurrence frequency.
+        """
+        return f"{self.title} ({self.get_frequency_display()})"
+
+
+class JobDependency(models.Model):
+    """
+    Model representing a precedence edge: `job` can't start before `depends_on` ends.
+
+    Edges form a directed acyclic graph. Create them through
+    `jobs.dependencies.add_dependency()`, which rejects cycles and keeps
+    `Job.topo_rank` consistent.
+
+    Attributes:
+        job (ForeignKey): The job that waits.
+        depends_on (ForeignKey): The job that must be finished first.
+        created_at (DateTimeField): The timestamp when the edge was added.
+    """
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='dependencies')
+    depends_on = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='dependents')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options; each edge is stored once and never points at its own job."""
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'depends_on'], name='jobdependency_unique_edge'),
+            models.CheckConstraint(condition=~models.Q(job=models.F('depends_on')),
+                                   name='jobdependency_no_self_loop'),
+        ]
+
+    def __str__(self):
+        """
+        Returns the string representation of the edge.
+
+        Returns:
+            str: The dependent job id and the id it waits for.
+        """
+        return f"{self.job_id} after {self.depends_on_id}"
+
+
+class SchedulingCapacity(models.Model):
+    """
+    Model representing how many jobs a department or machine can take on per day.
+
+    Each row applies to exactly one department or one machine. Resources without a
+    row fall back to the `JOB_SCHEDULER_SLOTS_PER_DAY` setting.
+
+    Attributes:
+        department (OneToOneField): The department this capacity applies to, optional.
+        machine (OneToOneField): The machine this capacity applies to, optional.
+        slots_per_day (PositiveIntegerField): The number of jobs that fit in one day.
+    """
+
+    department = models.OneToOneField('departments.Department', on_delete=models.CASCADE,
+                                      null=True, blank=True, related_name='capacity')
+    machine = models.OneToOneField('machines.Machine', on_delete=models.CASCADE,
+                                   null=True, blank=True, related_name='capacity')
+    slots_per_day = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        """Meta options for the SchedulingCapacity model."""
+        verbose_name_plural = 'scheduling capacities'
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(department__isnull=False, machine__isnull=True)
+                    | models.Q(department__isnull=True, machine__isnull=False)
+                ),
+                name='capacity_single_resource',
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the capacity, naming its resource.
+
+        Returns:
+            str: The resource and its daily slot count.
+        """
+        resource = self.machine if self.machine_id else self.department
+        return f"{resource}: {self.slots_per_day} per day"
+
+
+class ArchivedJob(models.Model):
+    """
+    Model representing a completed job moved out of the hot `Job` table.
+
+    Rows keep the id, fields and timestamps they had as a `Job`, so references to
+    a job id stay meaningful after archival.
+
+    Attributes:
+        id (BigIntegerField): The id the job had in the `Job` table.
+        title (CharField): The title of the job.
+        description (TextField): Detailed description of the job.
+        priority (IntegerField): Priority level the job had.
+        scheduled_date (DateField): The date the job was scheduled for.
+        deadline (DateField): The date the job had to be finished by, optional.
+        department (ForeignKey): The department the job was assigned to, optional.
+        machine (ForeignKey): The machine the job was assigned to, optional.
+        template (ForeignKey): The recurring template the job was materialized from, optional.
+        occurrence_date (DateField): The template occurrence the job stood for, optional.
+        created_at (DateTimeField): When the job was created.
+        updated_at (DateTimeField): When the job was last updated before archival.
+        completed_at (DateTimeField): When the job was completed.
+        archived_at (DateTimeField): When the job was archived, auto-set on creation.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    priority = models.IntegerField()
+    scheduled_date = models.DateField()
+    deadline = models.DateField(null=True, blank=True)
+    department = models.ForeignKey('departments.Department', on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='archived_jobs')
+    machine = models.ForeignKey('machines.Machine', on_delete=models.SET_NULL,
+                                null=True, blank=True, related_name='archived_jobs')
+    template = models.ForeignKey('JobTemplate', on_delete=models.SET_NULL,
+                                 null=True, blank=True, related_name='archived_jobs')
+    occurrence_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    completed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options; archived jobs are listed most recently completed first."""
+        indexes = [
+            models.Index(fields=['completed_at', 'id'], name='archivedjob_completed_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns the string representation of the archived job, showing its title.
+
+        Returns:
+            str: The title of the job, or "No Title" if the title is empty.
+        """
+        return str(self.title) if self.title else "No Title"
@@ -0,0 +1,155 @@
+# pylint: disable=no-member
+"""
+Lazy expansion of recurring job templates.
+
+A `JobTemplate` stores a rule ("every 2 weeks from 2026-01-05") rather than rows.
+`occurrences()` turns the rule into dates for one window with a generator that
+jumps straight to the first occurrence in the window, so reading next month costs
+the same whether the template started last week or ten years ago.
+
+`expand()` merges the generators of many templates into one date-ordered stream
+and overlays the occurrences that were already materialized into `Job` rows (or
+archived since), which is what the occurrences endpoint returns.
+"""
+import calendar
+import datetime
+import heapq
+import itertools
+
+from .models import ArchivedJob, Job, JobTemplate
+
+
+def add_months(day, months, anchor_day):
+    """
+    Returns the date `months` months after `day`, on `anchor_day` of the month.
+
+    Days past the end of the target month are clamped, so a template anchored on
+    the 31st falls on the last day of shorter months.
+    """
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return datetime.date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(template, start, end):
+    """
+    Yields the occurrence dates of `template` between `start` and `end`, inclusive.
+
+    Args:
+        template (JobTemplate): The recurrence rule.
+        start (date): First day of the window.
+        end (date): Last day of the window.
+    """
+    first = max(start, template.start_date)
+    last = min(end, template.end_date) if template.end_date else end
+    if not template.is_active or first > last:
+        return
+
+    origin = template.start_date
+    if template.frequency == JobTemplate.FREQUENCY_MONTHLY:
+        months = (first.year - origin.year) * 12 + first.month - origin.month
+        step = months // template.interval
+        while True:
+            day = add_months(origin, step * template.interval, origin.day)
+            if day > last:
+                return
+            if day >= first:
+                yield day
+            step += 1
+
+    days = template.interval * (7 if template.frequency == JobTemplate.FREQUENCY_WEEKLY else 1)
+    step = -(-(first - origin).days // days)
+    day = origin + datetime.timedelta(days=step * days)
+    while day <= last:
+        yield day
+        day += datetime.timedelta(days=days)
+
+
+def expand(templates, start, end, limit=None):
+    """
+    Lists the occurrences of `templates` in a window, ordered by date.
+
+    Occurrences that already have a `Job` (or `ArchivedJob`) carry its id and status;
+    the others are virtual and have ``job`` set to None.
+
+    Args:
+        templates (iterable): The templates to expand.
+        start (date): First day of the window.
+        end (date): Last day of the window.
+        limit (int): Stop after this many occurrences, optional.
+
+    Returns:
+        list: One dict per occurrence with ``template``, ``date``, ``title``,
+        ``priority``, ``department``, ``machine``, ``job`` and ``status``.
+    """
+    templates = list(templates)
+    streams = [
+        ((day, template.id, template) for day in occurrences(template, start, end))
+        for template in templates
+    ]
+    merged = heapq.merge(*streams, key=lambda item: (item[0], item[1]))
+    if limit is not None:
+        merged = itertools.islice(merged, limit)
+    merged = list(merged)
+    if not merged:
+        return []
+
+    materialized = {}
+    window = {'template__in': [template.id for template in templates],
+              'occurrence_date__range': (start, merged[-1][0])}
+    for job_id, template_id, day in ArchivedJob.objects.filter(**window).values_list(
+            'id', 'template_id', 'occurrence_date'):
+        materialized[(template_id, day)] = (job_id, Job.STATUS_COMPLETED)
+    for job_id, template_id, day, job_status in Job.objects.filter(**window).values_list(
+            'id', 'template_id', 'occurrence_date', 'status'):
+        materialized[(template_id, day)] = (job_id, job_status)
+
+    results = []
+    for day, template_id, template in merged:
+        job_id, job_status = materialized.get((template_id, day), (None, None))
+        results.append({
+            'template': template_id,
+            'date': day,
+            'title': template.title,
+            'priority': template.priority,
+            'department': template.department_id,
+            'machine': template.machine_id,
+            'job': job_id,
+            'status': job_status,
+        })
+    return results
+
+
+def is_occurrence(template, day):
+    """Returns True if `template` has an occurrence on `day`."""
+    return next(occurrences(template, day, day), None) == day
+
+
+def materialize(template, day):
+    """
+    Returns the `Job` standing for the occurrence of `template` on `day`, creating it
+    on first use.
+
+    Concurrent callers race on the `job_unique_occurrence` constraint, so at most one
+    row is ever created per occurrence.
+
+    Args:
+        template (JobTemplate): The template the occurrence belongs to.
+        day (date): The occurrence date; must satisfy `is_occurrence()`.
+
+    Returns:
+        tuple: ``(job, created)``.
+    """
+    return Job.objects.get_or_create(
+        template=template,
+        occurrence_date=day,
+        defaults={
+            'title': template.title,
+            'description': template.description,
+            'priority': template.priority,
+            'scheduled_date': day,
+            'department_id': template.department_id,
+            'machine_id': template.machine_id,
+        },
+    )
@@ -0,0 +1,346 @@
+# pylint: disable=no-member
+"""
+Deadline/priority scheduling of pending jobs.
+
+Every job competes for the daily slots of one resource: its machine if it has one,
+otherwise its department, otherwise a shared "unassigned" pool. Within a resource,
+jobs are served earliest deadline first (falling back to the scheduled date when no
+deadline is set), ties going to the higher priority. The n-th job in that order
+lands on day ``n // slots_per_day`` of the planning window.
+
+The scheduler keeps one binary heap per resource with lazy deletion, so adding,
+reprioritizing or removing a job is a single O(log n) heap push (or an O(1)
+tombstone) instead of a full re-plan. Producing the plan for a window walks each
+heap from the root in order and stops after the first ``slots_per_day * days`` live
+entries, so its cost follows the window, not the backlog.
+"""
+import datetime
+import heapq
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, SchedulingCapacity
+
+UNASSIGNED = 'unassigned'
+
+# Jobs written by this process reach its scheduler when their transaction commits
+# (see `jobs.signals` and the bulk views). Rows saved by other processes are picked
+# up by re-reading everything updated since the last sync. The overlap absorbs clock
+# skew between app servers and commits that land shortly after their `updated_at`
+# stamp; re-applying a job that is already up to date is a no-op.
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# How often the scheduler is rebuilt from scratch. A transaction that commits more
+# than `SYNC_OVERLAP` after stamping `updated_at`, a job deleted by another process
+# or one changed without touching `updated_at` is only picked up by a rebuild.
+REBUILD_INTERVAL = datetime.timedelta(hours=1)
+
+
+def resource_for(job):
+    """
+    Returns the resource key whose capacity `job` consumes.
+
+    Args:
+        job (Job): The job to place.
+
+    Returns:
+        str: ``'machine:<id>'``, ``'department:<id>'`` or ``'unassigned'``.
+    """
+    if job.machine_id:
+        return f'machine:{job.machine_id}'
+    if job.department_id:
+        return f'department:{job.department_id}'
+    return UNASSIGNED
+
+
+def is_pending(job):
+    """Returns True if `job` still needs a slot."""
+    return job.status == Job.STATUS_ACTIVE
+
+
+class CapacityModel:
+    """
+    Daily slot counts per resource.
+
+    Attributes:
+        default_slots (int): Slots per day for resources without an override.
+        overrides (dict): Maps resource keys to their own slots per day.
+    """
+
+    def __init__(self, default_slots, overrides=None):
+        self.default_slots = max(int(default_slots), 1)
+        self.overrides = overrides or {}
+
+    @classmethod
+    def from_db(cls, default_slots=None):
+        """
+        Builds the capacity model from the `SchedulingCapacity` table.
+
+        Args:
+            default_slots (int): Slots per day for resources without a row. Defaults
+                                 to the `JOB_SCHEDULER_SLOTS_PER_DAY` setting.
+        """
+        if default_slots is None:
+            default_slots = getattr(settings, 'JOB_SCHEDULER_SLOTS_PER_DAY', 5)
+        overrides = {}
+        for capacity in SchedulingCapacity.objects.all():
+            if capacity.machine_id:
+                overrides[f'machine:{capacity.machine_id}'] = capacity.slots_per_day
+            else:
+                overrides[f'department:{capacity.department_id}'] = capacity.slots_per_day
+        return cls(default_slots, overrides)
+
+    def slots_for(self, resource):
+        """Returns the number of jobs `resource` can take per day."""
+        return max(self.overrides.get(resource, self.default_slots), 0)
+
+
+class ResourceQueue:
+    """
+    Priority queue of the pending jobs of one resource.
+
+    Entries are ``[key, job_id, alive]`` lists. Removing a job only flips `alive`, and
+    the heap is compacted once dead entries outnumber live ones, keeping every update
+    at O(log n) amortized.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, job_id, key):
+        """Adds `job_id` with `key`, replacing any previous entry for it."""
+        self.discard(job_id)
+        entry = [key, job_id, True]
+        self.entries[job_id] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [entry for entry in self.heap if entry[2]]
+            heapq.heapify(self.heap)
+
+    def discard(self, job_id):
+        """Removes `job_id` from the queue if present."""
+        entry = self.entries.pop(job_id, None)
+        if entry is not None:
+            entry[2] = False
+
+    def key_of(self, job_id):
+        """Returns the ordering key of `job_id`, or None if it isn't queued."""
+        entry = self.entries.get(job_id)
+        return entry[0] if entry else None
+
+    def first(self, count):
+        """
+        Returns the `count` live entries that are served first, in order.
+
+        Walks the heap lazily: a small frontier heap holds the children of the
+        entries taken so far, so only about `count` entries (plus the dead ones
+        among them) are looked at, however long the queue is.
+        """
+        heap, found = self.heap, []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(found) < count:
+            entry, index = heapq.heappop(frontier)
+            if entry[2]:
+                found.append(entry)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return found
+
+
+class JobScheduler:
+    """
+    Incrementally maintained plan of pending jobs per resource.
+
+    Use `get_scheduler()` for the process-wide instance; it is built from the
+    database on first use and brought up to date with `sync()` before each plan.
+    Writes made by this process are also applied as they commit, through
+    `add_on_commit()`, `remove_on_commit()` and `reprioritize_on_commit()`.
+    """
+
+    def __init__(self):
+        self.queues = {}
+        self.resource_of = {}
+        self.synced_at = None
+        self.built_at = None
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key_for(job):
+        """
+        Returns the ordering key of `job`: earliest due date, then highest priority.
+        """
+        due = job.deadline or job.scheduled_date
+        return (due, -job.priority, job.id)
+
+    def __len__(self):
+        return len(self.resource_of)
+
+    def add(self, job):
+        """
+        Inserts or updates `job` in O(log n). Jobs that are no longer pending are removed.
+
+        Args:
+            job (Job): The job as currently stored.
+        """
+        with self.lock:
+            if not is_pending(job):
+                self.remove(job.id)
+                return
+            resource = resource_for(job)
+            previous = self.resource_of.get(job.id)
+            if previous is not None and previous != resource:
+                self.queues[previous].discard(job.id)
+            self.resource_of[job.id] = resource
+            self.queues.setdefault(resource, ResourceQueue()).push(job.id, self.key_for(job))
+
+    def reprioritize(self, job_id, priority):
+        """
+        Changes the priority of a queued job in O(log n) without reloading it.
+
+        Args:
+            job_id (int): The job to update.
+            priority (int): Its new priority.
+        """
+        with self.lock:
+            resource = self.resource_of.get(job_id)
+            if resource is None:
+                return
+            due, _, _ = self.queues[resource].key_of(job_id)
+            self.queues[resource].push(job_id, (due, -priority, job_id))
+
+    def remove(self, job_id):
+        """Removes `job_id` from the plan in O(1)."""
+        with self.lock:
+            resource = self.resource_of.pop(job_id, None)
+            if resource is not None:
+                self.queues[resource].discard(job_id)
+
+    def rebuild(self):
+        """Reloads every pending job from the database."""
+        with self.lock:
+            self.queues = {}
+            self.resource_of = {}
+            self.synced_at = self.built_at = timezone.now()
+            for job in _plan_fields(Job.objects.active()).iterator(chunk_size=2000):
+                self.add(job)
+
+    def sync(self):
+        """
+        Applies jobs changed since the last sync, rebuilding the scheduler if it is
+        new or older than `REBUILD_INTERVAL`.
+
+        Only rows whose `updated_at` moved are read, so the cost is proportional to
+        the number of changes rather than the size of the table.
+        """
+        with self.lock:
+            if self.built_at is None or timezone.now() - self.built_at > REBUILD_INTERVAL:
+                self.rebuild()
+                return
+            since = self.synced_at - SYNC_OVERLAP
+            self.synced_at = timezone.now()
+            for job in _plan_fields(Job.objects.filter(updated_at__gte=since)):
+                self.add(job)
+
+    def plan(self, start, days, capacity):
+        """
+        Assigns queued jobs to days of the planning window.
+
+        Jobs deleted by another process since the last sync are discovered while
+        loading the planned rows and dropped from their queue.
+
+        Args:
+            start (date): The first day of the window.
+            days (int): The number of days in the window.
+            capacity (CapacityModel): Daily slots per resource.
+
+        Returns:
+            tuple: ``(assignments, unassigned)`` where `assignments` is a list of dicts
+            ordered by date and `unassigned` counts pending jobs that don't fit.
+        """
+        with self.lock:
+            while True:
+                placed = []
+                unassigned = 0
+                for resource, queue in self.queues.items():
+                    slots = capacity.slots_for(resource)
+                    entries = queue.first(slots * days) if slots else []
+                    unassigned += len(queue) - len(entries)
+                    for rank, (_, job_id, _) in enumerate(entries):
+                        day = start + datetime.timedelta(days=rank // slots)
+                        placed.append((day, resource, job_id))
+
+                jobs = Job.objects.in_bulk([job_id for _, _, job_id in placed])
+                missing = [job_id for _, _, job_id in placed if job_id not in jobs]
+                if not missing:
+                    break
+                for job_id in missing:
+                    self.remove(job_id)
+
+        placed.sort(key=lambda item: (item[0], self.key_for(jobs[item[2]])))
+        assignments = []
+        for date, resource, job_id in placed:
+            job = jobs[job_id]
+            due = job.deadline
+            assignments.append({
+                'job': job.id,
+                'title': job.title,
+                'priority': job.priority,
+                'deadline': due,
+                'resource': resource,
+                'date': date,
+                'late': due is not None and date > due,
+            })
+        return assignments, unassigned
+
+
+def _plan_fields(queryset):
+    return queryset.only('id', 'priority', 'status', 'scheduled_date', 'deadline', 'department',
+                         'machine')
+
+
+_scheduler = JobScheduler()
+
+
+def get_scheduler():
+    """Returns the process-wide scheduler, synced with the database."""
+    _scheduler.sync()
+    return _scheduler
+
+
+def _on_commit(method, items, *args):
+    """
+    Calls `method` of the process-wide scheduler for each of `items` once the
+    current transaction commits. Skipped while the scheduler hasn't been built,
+    since building it reads the committed rows anyway.
+    """
+    items = list(items)
+
+    def run():
+        with _scheduler.lock:
+            if _scheduler.built_at is not None:
+                for item in items:
+                    method(_scheduler, item, *args)
+    transaction.on_commit(run)
+
+
+def add_on_commit(jobs):
+    """Adds or updates the saved `jobs` in the process-wide scheduler on commit."""
+    _on_commit(JobScheduler.add, jobs)
+
+
+def remove_on_commit(job_ids):
+    """Removes the deleted `job_ids` from the process-wide scheduler on commit."""
+    _on_commit(JobScheduler.remove, job_ids)
+
+
+def reprioritize_on_commit(job_ids, priority):
+    """Moves `job_ids` to `priority` in the process-wide scheduler on commit."""
+    _on_commit(JobScheduler.reprioritize, job_ids, priority)
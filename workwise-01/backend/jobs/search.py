@@ -0,0 +1,167 @@
+# pylint: disable=no-member
+"""
+Full-text search over job titles and descriptions.
+
+On PostgreSQL, `Job.search_vector` is a `tsvector` column maintained by a trigger
+(see migration 0006) and covered by a GIN index, and searches run entirely in the
+database. Other backends, in practice the SQLite databases used by tests and local
+development, fall back to an in-process inverted index that tokenizes, weights and
+ranks the same way closely enough that both return the same shape of results.
+
+Either way `search_jobs()` returns a `Job` queryset annotated with a `rank` column,
+so callers can order and keyset-paginate it identically.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Job
+from .scheduling import SYNC_OVERLAP
+
+SEARCH_CONFIG = 'english'
+
+# Weights PostgreSQL gives to the A (title) and B (description) labels by default.
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+# The fallback hands its matches to the database as an `IN` list; past this many it
+# keeps the best ranked ones. Test databases never come close.
+FALLBACK_MAX_RESULTS = 1000
+
+TOKEN_RE = re.compile(r'\w+')
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in into is it its no not of on or '
+    'that the their then there these they this to was were will with'.split()
+)
+
+
+def tokenize(text):
+    """
+    Splits `text` into normalized search terms.
+
+    Lowercases, drops English stop words and strips the most common inflection
+    suffixes, a rough stand-in for the stemming of PostgreSQL's english config.
+    """
+    terms = []
+    for word in TOKEN_RE.findall((text or '').lower()):
+        if word in STOP_WORDS:
+            continue
+        for suffix in ('ing', 'ed', 'es', 's'):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        terms.append(word)
+    return terms
+
+
+class InvertedIndex:
+    """
+    In-process inverted index of job titles and descriptions.
+
+    Maps every term to the jobs containing it along with a weighted term frequency.
+    It is built from the database on first use and then kept current by re-reading
+    only the jobs whose `updated_at` moved since the last sync. Jobs deleted in the
+    meantime can linger in the postings but drop out when their rows are loaded.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.terms_of = {}
+        self.synced_at = None
+        self.lock = threading.RLock()
+
+    def add(self, job):
+        """Indexes `job`, replacing what was indexed for it before."""
+        with self.lock:
+            self.remove(job.id)
+            weights = Counter()
+            for term in tokenize(job.title):
+                weights[term] += TITLE_WEIGHT
+            for term in tokenize(job.description):
+                weights[term] += DESCRIPTION_WEIGHT
+            for term, weight in weights.items():
+                self.postings[term][job.id] = weight
+            self.terms_of[job.id] = list(weights)
+
+    def remove(self, job_id):
+        """Drops `job_id` from the index."""
+        with self.lock:
+            for term in self.terms_of.pop(job_id, ()):
+                self.postings[term].pop(job_id, None)
+                if not self.postings[term]:
+                    del self.postings[term]
+
+    def sync(self):
+        """Indexes jobs changed since the last sync, building the index if needed."""
+        with self.lock:
+            jobs = Job.objects.only('id', 'title', 'description')
+            if self.synced_at is not None:
+                jobs = jobs.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP)
+            self.synced_at = timezone.now()
+            for job in jobs.iterator(chunk_size=2000):
+                self.add(job)
+
+    def search(self, query):
+        """
+        Returns the jobs containing every term of `query` with their scores.
+
+        Scores add up ``log(1 + weighted frequency)`` over the query terms, so title
+        hits outrank description hits and repeated terms have diminishing returns.
+
+        Returns:
+            dict: Maps job ids to scores.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+        with self.lock:
+            postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+            matches = set(postings[0]).intersection(*postings[1:])
+            return {
+                job_id: sum(math.log1p(posting[job_id]) for posting in postings)
+                for job_id in matches
+            }
+
+
+_fallback_index = InvertedIndex()
+
+
+def uses_database_search():
+    """Returns True if the database can run the search itself."""
+    return connection.vendor == 'postgresql'
+
+
+def search_jobs(query, queryset=None):
+    """
+    Returns the jobs matching `query`, annotated with a `rank` (higher is better).
+
+    Args:
+        query (str): Free text; on PostgreSQL it follows `websearch_to_tsquery`
+                     syntax (quoted phrases, `or`, `-term`).
+        queryset (QuerySet): Jobs to search within, defaults to active jobs.
+    """
+    if queryset is None:
+        queryset = Job.objects.active()
+
+    if uses_database_search():
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        # ts_rank returns a real; casting to double precision keeps the value
+        # returned to Python identical to the one compared in keyset filters.
+        rank = Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        return queryset.filter(search_vector=search_query).annotate(rank=rank)
+
+    _fallback_index.sync()
+    scores = _fallback_index.search(query)
+    best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:FALLBACK_MAX_RESULTS]
+    if not best:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    rank = Case(*[When(id=job_id, then=Value(score)) for job_id, score in best],
+                output_field=FloatField())
+    return queryset.filter(id__in=[job_id for job_id, _ in best]).annotate(rank=rank)
@@ -1,5 +1,33 @@
 from rest_framework import serializers
-from .models import Job
+from departments.models import Department
+from machines.models import Machine
+from .models import ArchivedJob, Job, JobTemplate
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves ids from objects preloaded into the serializer
+    context instead of running one query per item.
+
+    Bulk endpoints put ``{field_name: {pk: instance}}`` under the `preloaded` context
+    key after fetching every referenced row with a single `in_bulk()`. Without that
+    key the field behaves exactly like `PrimaryKeyRelatedField`.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = preloaded.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
 
 class JobSerializer(serializers.ModelSerializer):
     """
@@ -9,6 +37,11 @@ class JobSerializer(serializers.ModelSerializer):
     scheduling date, and timestamps for creation and updates.
     """
 
+    department = PreloadedPrimaryKeyRelatedField(queryset=Department.objects.all(), required=False,
+                                                 allow_null=True)
+    machine = PreloadedPrimaryKeyRelatedField(queryset=Machine.objects.all(), required=False,
+                                              allow_null=True)
+
     class Meta:
         """
         Meta options for the JobSerializer.
@@ -19,9 +52,65 @@ class JobSerializer(serializers.ModelSerializer):
         - `description`: Detailed description of the job.
         - `priority`: Priority level of the job (Low, Medium, High).
         - `scheduled_date`: Date the job is scheduled.
+        - `deadline`: Date the job must be finished by.
+        - `duration_days`: Working days the job takes.
+        - `department`: Department whose capacity the job uses.
+        - `machine`: Machine whose capacity the job uses.
+        - `status`: Whether the job is active or completed (read-only).
+        - `completed_at`: Timestamp of completion (read-only).
+        - `template`: Recurring template the job was materialized from (read-only).
+        - `occurrence_date`: Template occurrence the job stands for (read-only).
         - `created_at`: Timestamp of job creation.
         - `updated_at`: Timestamp of the last update.
         """
         model = Job
-        fields = ['id', 'title', 'description', 'priority', 'scheduled_date', 'created_at', 'updated_at']
-        
\ No newline at end of file
+        fields = ['id', 'title', 'description', 'priority', 'scheduled_date', 'deadline',
+                  'duration_days', 'department', 'machine', 'status', 'completed_at', 'template',
+                  'occurrence_date', 'created_at', 'updated_at']
+        read_only_fields = ['status', 'completed_at', 'template', 'occurrence_date']
+        
+
+class ArchivedJobSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for jobs moved to the archive.
+    """
+
+    class Meta:
+        """
+        Meta options for the ArchivedJobSerializer.
+
+        Includes every ArchivedJob field; all of them are read-only.
+        """
+        model = ArchivedJob
+        fields = ['id', 'title', 'description', 'priority', 'scheduled_date', 'deadline',
+                  'department', 'machine', 'template', 'occurrence_date',
+                  'created_at', 'updated_at', 'completed_at', 'archived_at']
+        read_only_fields = fields
+
+
+class JobTemplateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for recurring job templates.
+
+    Validates that the recurrence window isn't empty.
+    """
+
+    class Meta:
+        """
+        Meta options for the JobTemplateSerializer.
+
+        Includes the job fields copied to each occurrence and the recurrence rule
+        (`frequency`, `interval`, `start_date`, `end_date`, `is_active`).
+        """
+        model = JobTemplate
+        fields = ['id', 'title', 'description', 'priority', 'department', 'machine', 'frequency',
+                  'interval', 'start_date', 'end_date', 'is_active', 'created_at', 'updated_at']
+        extra_kwargs = {'interval': {'min_value': 1}}
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError(
+                {'end_date': 'end_date must not be before start_date.'})
+        return attrs
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+
+from . import scheduling
+from .models import Job
+
+
+def job_post_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Applies the saved job to this process's scheduler once it commits."""
+    scheduling.add_on_commit([instance])
+
+
+def job_post_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Drops the deleted job from this process's scheduler once the delete commits."""
+    scheduling.remove_on_commit([instance.pk])
+
+
+post_save.connect(job_post_save, sender=Job, dispatch_uid='scheduler_job_post_save')
+post_delete.connect(job_post_delete, sender=Job, dispatch_uid='scheduler_job_post_delete')
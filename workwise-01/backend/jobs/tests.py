@@ -3,7 +3,20 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from .models import Job
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+from io import StringIO
+from unittest import mock
+import json
+from .models import Job, JobTemplate, SchedulingCapacity
+from .dependencies import DependencyCycleError, add_dependency, rank_of
+from . import scheduling
+from .recurrence import occurrences
+from .scheduling import CapacityModel, JobScheduler, ResourceQueue
+from departments.models import Department
 
 
 class JobTests(APITestCase):
@@ -73,4 +86,467 @@ class JobTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.job.refresh_from_db()
         self.assertEqual(self.job.title, "Updated Job Title")
-       
\ No newline at end of file
+       
+    def test_get_job_list_paginated(self):
+        """
+        Ensure the keyset-paginated job list walks forward and back in schedule order.
+        """
+        for day in range(1, 6):
+            Job.objects.create(title=f"Job {day}", description="Paged", priority=1,
+                               scheduled_date=f"2024-11-0{day}")
+        url = reverse('job_list')
+        first = self.client.get(url, {'page_size': 4}, format='json')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['title'] for job in first.data['results']],
+                         ["Job 1", "Job 2", "Job 3", "Job 4"])
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'], format='json')
+        self.assertEqual([job['title'] for job in second.data['results']], ["Job 5", "Test Job"])
+        self.assertIsNone(second.data['next'])
+
+        back = self.client.get(second.data['previous'], format='json')
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_get_job_list_invalid_cursor(self):
+        """
+        Ensure a tampered cursor is rejected.
+        """
+        response = self.client.get(reverse('job_list'), {'cursor': 'not-a-cursor'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_job_schedule(self):
+        """
+        Ensure the schedule endpoint plans pending jobs and rejects bad windows.
+        """
+        url = reverse('job_schedule')
+        response = self.client.get(url, {'start': '2024-11-30', 'days': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        planned = [item['job'] for item in response.data['assignments']]
+        self.assertIn(self.job.id, planned)
+
+        response = self.client.get(url, {'days': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_operations(self):
+        """
+        Ensure the bulk endpoint applies creates, updates and deletes together.
+        """
+        doomed = Job.objects.create(title="Doomed", description="", priority=1,
+                                    scheduled_date="2024-12-02")
+        department = Department.objects.create(name="Assembly")
+        operations = [
+            {"op": "create", "data": {"title": "Bulk", "description": "Imported", "priority": 3,
+                                      "scheduled_date": "2024-12-03", "department": department.id}},
+            {"op": "update", "id": self.job.id, "data": {"priority": 1}},
+            {"op": "delete", "id": doomed.id},
+        ]
+        response = self.client.post(reverse('job_bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], [201, 200, 204])
+        created = Job.objects.get(id=response.data['results'][0]['id'])
+        self.assertEqual(created.department, department)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.priority, 1)
+        self.assertFalse(Job.objects.filter(id=doomed.id).exists())
+
+    def test_bulk_operations_invalid_item_applies_nothing(self):
+        """
+        Ensure one invalid item rejects the whole batch with per-item errors.
+        """
+        operations = [
+            {"op": "create", "data": {"title": "Fine", "description": "Imported", "priority": 1,
+                                      "scheduled_date": "2024-12-03"}},
+            {"op": "create", "data": {"title": "Bad", "description": "Imported", "priority": 9,
+                                      "scheduled_date": "2024-12-03"}},
+            {"op": "update", "id": 999999, "data": {"priority": 1}},
+        ]
+        response = self.client.post(reverse('job_bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data['results']
+        self.assertNotIn('errors', results[0])
+        self.assertIn('priority', results[1]['errors'])
+        self.assertIn('id', results[2]['errors'])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_bulk_operations_query_count_is_bounded(self):
+        """
+        Ensure the number of queries does not grow with the number of items.
+        """
+        department = Department.objects.create(name="Assembly")
+
+        def run(count):
+            operations = [{"op": "create", "data": {"title": f"Job {i}", "description": "Imported",
+                                                    "priority": 2, "scheduled_date": "2024-12-03",
+                                                    "department": department.id}}
+                          for i in range(count)]
+            operations.append({"op": "update", "id": self.job.id, "data": {"priority": 3}})
+            doomed = Job.objects.bulk_create([Job(**self.job_data) for _ in range(count)])
+            operations += [{"op": "delete", "id": job.id} for job in doomed]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('job_bulk'), operations, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        self.assertEqual(run(3), run(30))
+
+    def test_bulk_update_priority(self):
+        """
+        Ensure bulk priority updates return the number of rows changed.
+        """
+        url = reverse('job_bulk_update_priority')
+        response = self.client.post(url, {"job_ids": [self.job.id], "priority": 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"updated": 1})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.priority, 3)
+
+        for priority in (True, [1], {"a": 1}, "1"):
+            data = {"job_ids": [self.job.id], "priority": priority}
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.priority, 3)
+
+    def test_export_jobs(self):
+        """
+        Ensure jobs can be streamed as NDJSON and CSV, and unknown formats are rejected.
+        """
+        response = self.client.get(reverse('job_export', args=['ndjson']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], [self.job.title])
+
+        response = self.client.get(reverse('job_export', args=['csv']))
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(rows[0].startswith('id,title,description,priority'))
+        self.assertEqual(len(rows), 2)
+
+        response = self.client.get(reverse('job_export', args=['xml']))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_job_calendar(self):
+        """
+        Ensure the calendar counts jobs per day and priority within the range.
+        """
+        Job.objects.create(title="Same day", description="Calendar", priority=3,
+                           scheduled_date="2024-12-01")
+        Job.objects.create(title="Next day", description="Calendar", priority=2,
+                           scheduled_date="2024-12-02")
+        Job.objects.create(title="Outside", description="Calendar", priority=2,
+                           scheduled_date="2025-01-01")
+        url = reverse('job_calendar')
+        response = self.client.get(url, {'start': '2024-12-01', 'end': '2024-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        days = response.data['days']
+        self.assertEqual([str(day['date']) for day in days], ['2024-12-01', '2024-12-02'])
+        self.assertEqual(days[0]['priorities'], {2: 1, 3: 1})
+        self.assertEqual(days[0]['total'], 2)
+
+        response = self.client.get(url, {'start': '2024-12-31', 'end': '2024-12-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_jobs(self):
+        """
+        Ensure search ranks title matches first and pages through the results.
+        """
+        Job.objects.create(title="Replace hydraulic pump", description="Line 2", priority=3,
+                           scheduled_date="2024-12-02")
+        Job.objects.create(title="Inspect conveyor", description="Check the hydraulic pumps too",
+                           priority=1, scheduled_date="2024-12-03")
+        Job.objects.create(title="Paint hall", description="Unrelated", priority=1,
+                           scheduled_date="2024-12-04")
+        url = reverse('job_search')
+
+        response = self.client.get(url, {'q': 'hydraulic pump', 'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['title'] for job in response.data['results']],
+                         ["Replace hydraulic pump"])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([job['title'] for job in response.data['results']], ["Inspect conveyor"])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(url, {'q': 'unknownword'})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_sees_updated_jobs(self):
+        """
+        Ensure edits are reflected in subsequent searches.
+        """
+        url = reverse('job_search')
+        self.assertEqual(len(self.client.get(url, {'q': 'purposes'}).data['results']), 1)
+        self.client.put(reverse('job_detail', args=[self.job.id]), {"description": "Renamed"},
+                        format='json')
+        self.assertEqual(self.client.get(url, {'q': 'purposes'}).data['results'], [])
+
+    def test_complete_and_archive_job(self):
+        """
+        Ensure completed jobs leave the active list and can be archived and browsed.
+        """
+        response = self.client.post(reverse('job_complete', args=[self.job.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['priority'], 2)
+        self.assertEqual(self.client.get(reverse('job_list')).data, [])
+
+        call_command('archive_jobs', '--older-than-days', '0', '--batch-size', '1',
+                     stdout=StringIO())
+        self.assertFalse(Job.objects.filter(id=self.job.id).exists())
+
+        response = self.client.get(reverse('archived_job_list'))
+        self.assertEqual([job['id'] for job in response.data['results']], [self.job.id])
+        response = self.client.get(reverse('archived_job_detail', args=[self.job.id]))
+        self.assertEqual(response.data['title'], self.job.title)
+
+    def test_archive_keeps_recently_completed_jobs(self):
+        """
+        Ensure jobs completed within the retention window stay in the hot table.
+        """
+        self.client.post(reverse('job_complete', args=[self.job.id]))
+        call_command('archive_jobs', '--older-than-days', '7', stdout=StringIO())
+        self.assertTrue(Job.objects.filter(id=self.job.id).exists())
+
+    def test_template_occurrences_and_materialize(self):
+        """
+        Ensure template occurrences are listed without creating jobs, and that
+        materializing one is idempotent and shows up in the listing.
+        """
+        response = self.client.post(reverse('job_template_list'), {
+            "title": "Weekly oiling",
+            "description": "Oil the press",
+            "priority": 1,
+            "frequency": "weekly",
+            "start_date": "2024-12-02",
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        template_id = response.data['id']
+
+        url = reverse('job_template_occurrences')
+        response = self.client.get(url, {'start': '2024-12-01', 'end': '2024-12-31'})
+        self.assertEqual([item['date'] for item in response.data['occurrences']],
+                         [date(2024, 12, 2), date(2024, 12, 9), date(2024, 12, 16),
+                          date(2024, 12, 23), date(2024, 12, 30)])
+        self.assertEqual(Job.objects.count(), 1)
+
+        materialize_url = reverse('job_template_materialize', args=[template_id])
+        response = self.client.post(materialize_url, {"date": "2024-12-09"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['scheduled_date'], '2024-12-09')
+        job_id = response.data['id']
+        response = self.client.post(materialize_url, {"date": "2024-12-09"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], job_id)
+        response = self.client.post(materialize_url, {"date": "2024-12-10"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {'start': '2024-12-01', 'end': '2024-12-31'})
+        jobs = [item['job'] for item in response.data['occurrences']]
+        self.assertEqual(jobs, [None, job_id, None, None, None])
+
+
+    def test_dependencies_and_critical_path(self):
+        """
+        Ensure dependencies reject cycles and drive the critical-path computation.
+        """
+        weld = Job.objects.create(title="Weld", description="Weld frame", priority=2,
+                                  scheduled_date="2024-12-01", duration_days=3)
+        paint = Job.objects.create(title="Paint", description="Paint frame", priority=2,
+                                   scheduled_date="2024-12-01", duration_days=2)
+        url = reverse('job_dependencies', args=[paint.id])
+        response = self.client.post(url, {"depends_on": weld.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('job_dependencies', args=[self.job.id]),
+                                    {"depends_on": paint.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(url).data['depends_on'], [weld.id])
+
+        response = self.client.post(reverse('job_dependencies', args=[weld.id]),
+                                    {"depends_on": self.job.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.get(reverse('job_critical_path'), {'start': '2024-12-02'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['critical_path'], [weld.id, paint.id, self.job.id])
+        self.assertEqual(response.data['finish'], date(2024, 12, 8))
+        starts = {item['job']: item['earliest_start'] for item in response.data['jobs']}
+        self.assertEqual(starts[self.job.id], date(2024, 12, 7))
+
+        response = self.client.delete(reverse('job_dependency_detail', args=[paint.id, weld.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(reverse('job_critical_path'), {'start': '2024-12-02'})
+        self.assertEqual(response.data['duration_days'], 3)
+
+
+class JobSchedulerTests(TestCase):
+    """
+    Tests for the incremental deadline/priority scheduler.
+    """
+
+    def setUp(self):
+        self.department = Department.objects.create(name='Assembly')
+        SchedulingCapacity.objects.create(department=self.department, slots_per_day=1)
+        self.capacity = CapacityModel.from_db(default_slots=2)
+
+    def create_job(self, title, priority, deadline):
+        return Job.objects.create(title=title, description='', priority=priority,
+                                  scheduled_date=date(2024, 12, 1), deadline=deadline,
+                                  department=self.department)
+
+    def test_plan_orders_by_deadline_then_priority(self):
+        """Jobs are served earliest deadline first, ties broken by priority."""
+        low = self.create_job('Low', 1, date(2024, 12, 2))
+        high = self.create_job('High', 3, date(2024, 12, 2))
+        later = self.create_job('Later', 3, date(2024, 12, 5))
+        scheduler = JobScheduler()
+        scheduler.rebuild()
+
+        assignments, unassigned = scheduler.plan(date(2024, 12, 1), 2, self.capacity)
+        self.assertEqual([(a['job'], a['date']) for a in assignments],
+                         [(high.id, date(2024, 12, 1)), (low.id, date(2024, 12, 2))])
+        self.assertEqual(unassigned, 1)
+        self.assertFalse(any(a['late'] for a in assignments))
+
+        assignments, _ = scheduler.plan(date(2024, 12, 3), 3, self.capacity)
+        self.assertTrue(assignments[0]['late'])
+        self.assertEqual(assignments[-1]['job'], later.id)
+
+    def test_incremental_updates(self):
+        """Reprioritizing, removing and syncing change the plan without a rebuild."""
+        first = self.create_job('First', 1, date(2024, 12, 2))
+        second = self.create_job('Second', 1, date(2024, 12, 2))
+        scheduler = JobScheduler()
+        scheduler.rebuild()
+
+        scheduler.reprioritize(second.id, 3)
+        assignments, _ = scheduler.plan(date(2024, 12, 1), 1, self.capacity)
+        self.assertEqual(assignments[0]['job'], second.id)
+
+        scheduler.remove(second.id)
+        assignments, _ = scheduler.plan(date(2024, 12, 1), 1, self.capacity)
+        self.assertEqual(assignments[0]['job'], first.id)
+
+        first.status = Job.STATUS_COMPLETED
+        first.save()
+        third = self.create_job('Third', 2, date(2024, 12, 9))
+        scheduler.sync()
+        self.assertEqual(len(scheduler), 2)
+        self.assertNotIn(first.id, scheduler.resource_of)
+        self.assertIn(third.id, scheduler.resource_of)
+
+    def test_committed_writes_reach_the_scheduler(self):
+        """Saves, bulk updates and deletes are applied to a built scheduler as they commit."""
+        scheduler = JobScheduler()
+        with mock.patch.object(scheduling, '_scheduler', scheduler):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = self.create_job('Unbuilt', 1, date(2024, 12, 2))
+            self.assertEqual(len(scheduler), 0)
+
+            scheduler.rebuild()
+            with self.captureOnCommitCallbacks(execute=True):
+                other = self.create_job('Saved', 1, date(2024, 12, 3))
+            self.assertIn(other.id, scheduler.resource_of)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Job.objects.filter(id=other.id).update(priority=3)
+                scheduling.reprioritize_on_commit([other.id], 3)
+            assignments, _ = scheduler.plan(date(2024, 12, 1), 1, self.capacity)
+            self.assertEqual(assignments[0]['job'], job.id)
+            queue = scheduler.queues[f'department:{self.department.id}']
+            self.assertEqual(queue.key_of(other.id)[1], -3)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                job.delete()
+            self.assertEqual(list(scheduler.resource_of), [other.id])
+
+    def test_sync_rebuilds_after_interval(self):
+        """A sync rebuilds the scheduler once it is older than REBUILD_INTERVAL."""
+        job = self.create_job('Stale', 1, date(2024, 12, 2))
+        scheduler = JobScheduler()
+        scheduler.rebuild()
+        # Committed long after its updated_at stamp, so the incremental sync misses it.
+        stamp = job.updated_at - scheduling.SYNC_OVERLAP * 2
+        Job.objects.filter(id=job.id).update(status=Job.STATUS_COMPLETED, updated_at=stamp)
+        scheduler.sync()
+        self.assertIn(job.id, scheduler.resource_of)
+
+        scheduler.built_at -= scheduling.REBUILD_INTERVAL
+        scheduler.sync()
+        self.assertEqual(len(scheduler), 0)
+
+    def test_queue_first_walks_live_entries_in_order(self):
+        """The first entries come out in key order, skipping removed jobs."""
+        queue = ResourceQueue()
+        for job_id in range(200):
+            queue.push(job_id, ((job_id * 37) % 200, job_id))
+        for job_id in range(0, 200, 3):
+            queue.discard(job_id)
+        live = sorted(entry for entry in queue.heap if entry[2])
+        self.assertEqual(queue.first(10), live[:10])
+        self.assertEqual(queue.first(500), live)
+        self.assertEqual(ResourceQueue().first(5), [])
+
+    def test_plan_drops_jobs_deleted_elsewhere(self):
+        """Jobs deleted behind the scheduler's back are dropped when planning."""
+        job = self.create_job('Gone', 2, date(2024, 12, 2))
+        scheduler = JobScheduler()
+        scheduler.rebuild()
+        Job.objects.filter(id=job.id).delete()
+
+        assignments, unassigned = scheduler.plan(date(2024, 12, 1), 1, self.capacity)
+        self.assertEqual((assignments, unassigned), ([], 0))
+        self.assertEqual(len(scheduler), 0)
+
+    def test_schedule_jobs_command(self):
+        """The management command prints the plan."""
+        self.create_job('Command', 2, date(2024, 12, 2))
+        out = StringIO()
+        call_command('schedule_jobs', '--start', '2024-12-01', '--days', '1', stdout=out)
+        self.assertIn('Command', out.getvalue())
+
+class JobDependencyTests(TestCase):
+    """
+    Tests for the incrementally maintained topological order.
+    """
+
+    def ordered_ids(self):
+        ranked = Job.objects.annotate(rank=rank_of()).order_by('rank')
+        return list(ranked.values_list('id', flat=True))
+
+    def test_back_edge_reorders_affected_jobs(self):
+        """An edge against the current order moves only the connected jobs."""
+        a, b, c, d = [Job.objects.create(title=name, description=name, priority=1,
+                                         scheduled_date='2024-12-01')
+                      for name in 'abcd']
+        add_dependency(b, a)  # a -> b, already in order
+        add_dependency(a, d)  # d -> a -> b, against the order
+        order = self.ordered_ids()
+        self.assertLess(order.index(d.id), order.index(a.id))
+        self.assertLess(order.index(a.id), order.index(b.id))
+        self.assertEqual(order.index(c.id), 2)
+        with self.assertRaises(DependencyCycleError):
+            add_dependency(d, b)
+
+
+class RecurrenceTests(TestCase):
+    """
+    Tests for the lazy expansion of recurrence rules.
+    """
+
+    def test_occurrences_jump_to_window(self):
+        """Occurrences start at the first date of the rule inside the window."""
+        template = JobTemplate(title='Check', description='Check', priority=1,
+                               frequency=JobTemplate.FREQUENCY_DAILY, interval=3,
+                               start_date=date(2020, 1, 1))
+        self.assertEqual(list(occurrences(template, date(2020, 1, 5), date(2020, 1, 12))),
+                         [date(2020, 1, 7), date(2020, 1, 10)])
+
+    def test_monthly_occurrences_clamp_to_month_end(self):
+        """Monthly rules anchored late in the month fall on the last day of short months."""
+        template = JobTemplate(title='Audit', description='Audit', priority=1,
+                               frequency=JobTemplate.FREQUENCY_MONTHLY, interval=1,
+                               start_date=date(2024, 1, 31), end_date=date(2024, 4, 15))
+        self.assertEqual(list(occurrences(template, date(2024, 1, 1), date(2024, 12, 31))),
+                         [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
@@ -1,7 +1,33 @@
 from django.urls import path
-from .views import JobListView, JobDetailView
+from .views import (
+    JobListView, JobDetailView, JobScheduleView, JobBulkView, JobExportView,
+    JobCalendarView, JobSearchView, BulkUpdatePriorityView, MarkJobCompletedView,
+    ArchivedJobListView, ArchivedJobDetailView, JobTemplateListView, JobTemplateDetailView,
+    JobTemplateOccurrencesView, MaterializeOccurrenceView, JobCriticalPathView,
+    JobDependencyListView, JobDependencyDetailView,
+)
 
 urlpatterns = [
     path('jobs/', JobListView.as_view(), name='job_list'),
+    path('jobs/bulk/', JobBulkView.as_view(), name='job_bulk'),
+    path('jobs/bulk-update-priority/', BulkUpdatePriorityView.as_view(),
+         name='job_bulk_update_priority'),
+    path('jobs/calendar/', JobCalendarView.as_view(), name='job_calendar'),
+    path('jobs/critical-path/', JobCriticalPathView.as_view(), name='job_critical_path'),
+    path('jobs/export/<str:export_format>/', JobExportView.as_view(), name='job_export'),
+    path('jobs/search/', JobSearchView.as_view(), name='job_search'),
+    path('jobs/schedule/', JobScheduleView.as_view(), name='job_schedule'),
     path('jobs/<int:id>/', JobDetailView.as_view(), name='job_detail'),
+    path('jobs/<int:id>/complete/', MarkJobCompletedView.as_view(), name='job_complete'),
+    path('jobs/<int:id>/dependencies/', JobDependencyListView.as_view(), name='job_dependencies'),
+    path('jobs/<int:id>/dependencies/<int:depends_on>/', JobDependencyDetailView.as_view(),
+         name='job_dependency_detail'),
+    path('archive/', ArchivedJobListView.as_view(), name='archived_job_list'),
+    path('archive/<int:id>/', ArchivedJobDetailView.as_view(), name='archived_job_detail'),
+    path('templates/', JobTemplateListView.as_view(), name='job_template_list'),
+    path('templates/occurrences/', JobTemplateOccurrencesView.as_view(),
+         name='job_template_occurrences'),
+    path('templates/<int:id>/', JobTemplateDetailView.as_view(), name='job_template_detail'),
+    path('templates/<int:id>/materialize/', MaterializeOccurrenceView.as_view(),
+         name='job_template_materialize'),
 ]
@@ -2,26 +2,58 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Job
-from .serializers import JobSerializer
+from django.db import transaction
+from django.db.models import Count
+from backend.exports import EXPORT_FORMATS, export_response
+from backend.pagination import KeysetPagination
+from departments.models import Department
+from machines.models import Machine
+from sync.signals import bulk_delete
+from .dependencies import DependencyCycleError, add_dependency, critical_path, remove_dependency
+from .models import ArchivedJob, Job, JobTemplate
+from .recurrence import expand, is_occurrence, materialize
+from .scheduling import CapacityModel, add_on_commit, get_scheduler, reprioritize_on_commit
+from .search import search_jobs
+from .serializers import ArchivedJobSerializer, JobSerializer, JobTemplateSerializer
+from django.utils.dateparse import parse_date
 from django.utils.timezone import now, timedelta
 
+
+class JobPagination(KeysetPagination):
+    """
+    Keyset pagination for job lists, ordered by schedule date.
+
+    Backed by the `job_scheduled_id_idx` index. Only applied when the client passes
+    `cursor` or `page_size`, so callers expecting the full list are unaffected.
+    """
+    ordering = ('scheduled_date', 'id')
+    optional = True
+
 class JobListView(APIView):
     """
-    API view to retrieve a list of all jobs.
+    API view to retrieve a list of all active jobs.
 
-    This view provides a GET method that retrieves all instances of the Job model
+    This view provides a GET method that retrieves the active instances of the Job model
     and serializes them using JobSerializer. The serialized data is returned as a response.
+    Passing `page_size` or `cursor` switches to keyset pagination ordered by
+    `scheduled_date` and `id`, returning `next`/`previous` links alongside `results`.
     """
+    pagination_class = JobPagination
 
     def get(self, request):
         """
         Handle GET requests to retrieve a list of jobs.
 
         Returns:
-            Response: JSON representation of the list of jobs.
+            Response: JSON representation of the list of jobs, or of one page of it
+            when pagination was requested.
         """
-        jobs = Job.objects.all()
+        jobs = Job.objects.active()
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(jobs, request, view=self)
+        if page is not None:
+            serializer = JobSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         serializer = JobSerializer(jobs, many=True)
         return Response(serializer.data)
 
@@ -32,6 +64,254 @@ class JobListView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class JobExportView(APIView):
+    """
+    API view to download every job as NDJSON or CSV.
+
+    Rows are streamed from a database cursor as they are rendered, so memory use
+    stays flat however large the table is.
+    """
+
+    def get(self, request, export_format):
+        """
+        Handle GET requests to stream the job table.
+
+        Args:
+            request: The HTTP request object.
+            export_format (str): Either `ndjson` or `csv`.
+
+        Returns:
+            StreamingHttpResponse: The export, or a 400 response for unknown formats.
+        """
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "Format must be ndjson or csv"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return export_response(Job.objects.order_by('id'), JobSerializer, export_format, 'jobs')
+
+
+class JobSearchPagination(KeysetPagination):
+    """Keyset pagination for search results, best match first."""
+    ordering = ('-rank', 'id')
+    page_size = 20
+    max_page_size = 100
+
+
+class JobSearchView(APIView):
+    """
+    API view to search job titles and descriptions.
+
+    On PostgreSQL the match runs against the GIN-indexed `search_vector` column;
+    other databases use an in-process inverted index. Results are ranked with
+    title matches weighted above description matches and are always paginated.
+    """
+    pagination_class = JobSearchPagination
+
+    def get(self, request):
+        """
+        Handle GET requests to search jobs.
+
+        Query parameters:
+            q (str): The search text.
+
+        Returns:
+            Response: A page of matching jobs, each with its `rank`, plus
+            `next`/`previous` links.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "No search query provided"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(search_jobs(query), request, view=self)
+        data = JobSerializer(page, many=True).data
+        for item, job in zip(data, page):
+            item['rank'] = job.rank
+        return paginator.get_paginated_response(data)
+
+
+class JobCalendarView(APIView):
+    """
+    API view to count jobs per day and priority over a date range.
+
+    The counts come from a single `GROUP BY scheduled_date, priority` query with
+    ``COUNT(*)``, which the partial `job_active_sched_prio_idx` index answers on its
+    own, so a month view transfers a few dozen numbers instead of every job.
+    """
+
+    max_days = 366
+
+    def get(self, request):
+        """
+        Handle GET requests for the calendar between `start` and `end` (inclusive).
+
+        Query parameters:
+            start (str): First day as YYYY-MM-DD.
+            end (str): Last day as YYYY-MM-DD.
+
+        Returns:
+            Response: One entry per day that has jobs, with counts by priority.
+        """
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None or not 0 <= (end - start).days < self.max_days:
+            return Response(
+                {"error": f"start and end must be YYYY-MM-DD, at most {self.max_days} days apart"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = (
+            Job.objects.active().filter(scheduled_date__range=(start, end))
+            .values('scheduled_date', 'priority')
+            .annotate(count=Count('*'))
+            .order_by('scheduled_date', 'priority')
+        )
+        days = {}
+        for row in rows:
+            day = days.setdefault(row['scheduled_date'],
+                                  {'date': row['scheduled_date'], 'total': 0, 'priorities': {}})
+            day['priorities'][row['priority']] = row['count']
+            day['total'] += row['count']
+        return Response({'start': start, 'end': end, 'days': list(days.values())})
+
+
+class JobScheduleView(APIView):
+    """
+    API view to plan pending jobs into daily slots by deadline and priority.
+
+    Each job uses the capacity of its machine, else its department, else a shared
+    pool. Capacities come from `SchedulingCapacity` rows; `slots_per_day` overrides
+    the default for resources without one.
+    """
+
+    max_days = 366
+
+    def get(self, request):
+        """
+        Handle GET requests to build the plan for a window of days.
+
+        Query parameters:
+            start (str): First day of the window as YYYY-MM-DD, defaults to today.
+            days (int): Length of the window, defaults to 14.
+            slots_per_day (int): Default daily capacity per resource.
+
+        Returns:
+            Response: The assignments ordered by date, and the number of pending
+            jobs that don't fit in the window.
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params['start']) if 'start' in params else now().date()
+            days = int(params.get('days', 14))
+            slots = int(params['slots_per_day']) if 'slots_per_day' in params else None
+        except ValueError:
+            start = None
+        if start is None or not 1 <= days <= self.max_days or (slots is not None and slots < 1):
+            return Response(
+                {"error": f"start must be YYYY-MM-DD, days between 1 and {self.max_days} "
+                          "and slots_per_day positive"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        assignments, unassigned = get_scheduler().plan(start, days, CapacityModel.from_db(slots))
+        return Response({
+            'start': start,
+            'days': days,
+            'assignments': assignments,
+            'unassigned': unassigned,
+        })
+
+class JobCriticalPathView(APIView):
+    """
+    API view to compute start dates and the critical path of the active jobs.
+
+    Uses `duration_days` and the job dependency graph. The jobs are already kept in
+    topological order, so the computation is one forward and one backward pass.
+    """
+
+    def get(self, request):
+        """
+        Handle GET requests to compute the critical path.
+
+        Query parameters:
+            start (str): The day work begins as YYYY-MM-DD, defaults to today.
+
+        Returns:
+            Response: The finish date, the critical path as job ids, and for every
+            active job its earliest and latest start and its slack in days.
+        """
+        try:
+            start = now().date()
+            if 'start' in request.query_params:
+                start = parse_date(request.query_params['start'])
+        except ValueError:
+            start = None
+        if start is None:
+            return Response({"error": "start must be YYYY-MM-DD"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(critical_path(start))
+
+
+class JobDependencyListView(APIView):
+    """
+    API view to list and add the jobs a job depends on.
+    """
+
+    def get(self, request, id):
+        """
+        Handle GET requests to list a job's prerequisites.
+
+        Returns:
+            Response: The ids of the jobs that must finish before this one.
+        """
+        if not Job.objects.filter(id=id).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        depends_on = (Job.objects.filter(dependents__job_id=id).order_by('id')
+                      .values_list('id', flat=True))
+        return Response({'job': id, 'depends_on': list(depends_on)})
+
+    def post(self, request, id):
+        """
+        Handle POST requests to add a prerequisite.
+
+        Request body:
+            depends_on (int): The id of the job that must finish first.
+
+        Returns:
+            Response: 201 when the dependency is added, 200 if it existed, 400 for an
+            unknown job and 409 if it would create a cycle.
+        """
+        try:
+            job = Job.objects.get(id=id)
+        except Job.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        try:
+            depends_on = Job.objects.get(id=int(request.data.get('depends_on')))
+        except (TypeError, ValueError, Job.DoesNotExist):
+            return Response({"error": "depends_on must be the id of an existing job"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            _, created = add_dependency(job, depends_on)
+        except DependencyCycleError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({'job': job.id, 'depends_on': depends_on.id},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class JobDependencyDetailView(APIView):
+    """
+    API view to remove one dependency of a job.
+    """
+
+    def delete(self, request, id, depends_on):
+        if not remove_dependency(id, depends_on):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 # Job detail API view (supports GET, PUT, and DELETE)
 class JobDetailView(APIView):
     """
@@ -80,17 +360,331 @@ class JobDetailView(APIView):
 
         job.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+class JobBulkView(APIView):
+    """
+    API view to create, update and delete many jobs in one request.
+
+    The body is a list of operations, each one of:
+        - ``{"op": "create", "data": {...}}``
+        - ``{"op": "update", "id": 1, "data": {...}}`` (partial update)
+        - ``{"op": "delete", "id": 1}``
+
+    Every item is validated with `JobSerializer(many=True)` before anything is
+    written. If any item is invalid nothing is applied and the per-item errors are
+    returned; otherwise all operations run in one transaction using `bulk_create`,
+    `bulk_update` and a single delete. Referenced jobs, departments and machines are
+    loaded with one query each, so the query count doesn't grow with the payload.
+    """
+
+    max_operations = 1000
+    operations = ('create', 'update', 'delete')
+
+    def post(self, request):
+        """
+        Handle POST requests to apply a batch of job operations.
+
+        Returns:
+            Response: One result per operation, in request order, with the affected
+            job id and an HTTP-like status. A 400 response carries `errors` on the
+            items that failed validation instead.
+        """
+        operations = request.data
+        if not isinstance(operations, list) or not 0 < len(operations) <= self.max_operations:
+            return Response(
+                {"error": f"Expected a list of 1 to {self.max_operations} operations"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [{'op': item.get('op') if isinstance(item, dict) else None}
+                   for item in operations]
+        errors = False
+        for item, result in zip(operations, results):
+            if result['op'] not in self.operations:
+                result['errors'] = {'op': [f"Must be one of {', '.join(self.operations)}"]}
+                errors = True
+            elif result['op'] != 'create':
+                result['id'] = item.get('id')
+                if not isinstance(result['id'], int) or isinstance(result['id'], bool):
+                    result['errors'] = {'id': ['A job id is required']}
+                    errors = True
+        if errors:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+        def indexes(op):
+            return [i for i, result in enumerate(results) if result['op'] == op]
+        creates, updates, deletes = indexes('create'), indexes('update'), indexes('delete')
+
+        existing = Job.objects.in_bulk([results[i]['id'] for i in updates + deletes])
+        for i in updates + deletes:
+            if results[i]['id'] not in existing:
+                results[i]['errors'] = {'id': ['Job not found']}
+                errors = True
+
+        payloads = [operations[i].get('data') for i in creates + updates]
+        context = {'request': request, 'preloaded': self.preload(payloads)}
+        create_serializer = JobSerializer(data=payloads[:len(creates)], many=True, context=context)
+        update_serializer = JobSerializer(data=payloads[len(creates):], many=True, partial=True,
+                                          context=context)
+        for positions, serializer in ((creates, create_serializer), (updates, update_serializer)):
+            if not serializer.is_valid():
+                for i, item_errors in zip(positions, serializer.errors):
+                    if item_errors:
+                        results[i]['errors'] = item_errors
+                        errors = True
+        if errors:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            created = Job.objects.bulk_create(
+                Job(**data) for data in create_serializer.validated_data)
+            for i, job in zip(creates, created):
+                results[i].update(id=job.id, status=status.HTTP_201_CREATED)
+
+            changed, fields = [], {'updated_at'}
+            timestamp = now()
+            for i, data in zip(updates, update_serializer.validated_data):
+                job = existing[results[i]['id']]
+                for field, value in data.items():
+                    setattr(job, field, value)
+                job.updated_at = timestamp
+                fields.update(data)
+                changed.append(job)
+                results[i]['status'] = status.HTTP_200_OK
+            if changed:
+                Job.objects.bulk_update(changed, sorted(fields))
+            # bulk_create and bulk_update send no post_save; deletes below do.
+            add_on_commit(created + changed)
+
+            if deletes:
+                bulk_delete(Job, [results[i]['id'] for i in deletes])
+                for i in deletes:
+                    results[i]['status'] = status.HTTP_204_NO_CONTENT
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def preload(payloads):
+        """
+        Fetches every department and machine referenced by `payloads` in one query each.
+
+        Returns:
+            dict: Maps the serializer field names to ``{pk: instance}`` lookups.
+        """
+        preloaded = {}
+        for field, model in (('department', Department), ('machine', Machine)):
+            ids = set()
+            for data in payloads:
+                value = data.get(field) if isinstance(data, dict) else None
+                if isinstance(value, int) and not isinstance(value, bool):
+                    ids.add(value)
+                elif isinstance(value, str) and value.isdigit():
+                    ids.add(int(value))
+            preloaded[field] = model.objects.in_bulk(ids) if ids else {}
+        return preloaded
+
+class ArchivedJobPagination(KeysetPagination):
+    """Keyset pagination for the archive, most recently completed first."""
+    ordering = ('-completed_at', '-id')
+
+
+class ArchivedJobListView(APIView):
+    """
+    API view to browse completed jobs that were moved to the archive.
+
+    Archived jobs live in their own table so they no longer weigh on queries over
+    active jobs. The list is always paginated.
+    """
+    pagination_class = ArchivedJobPagination
+
+    def get(self, request):
+        """
+        Handle GET requests to list archived jobs.
+
+        Returns:
+            Response: One page of archived jobs with `next`/`previous` links.
+        """
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(ArchivedJob.objects.all(), request, view=self)
+        serializer = ArchivedJobSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ArchivedJobDetailView(APIView):
+    """
+    API view to retrieve a single archived job by the id it had as a job.
+    """
+
+    def get(self, request, id):
+        """
+        Handle GET requests to retrieve an archived job.
+
+        Returns:
+            Response: The archived job if found, otherwise a 404 status.
+        """
+        try:
+            job = ArchivedJob.objects.get(id=id)
+        except ArchivedJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(ArchivedJobSerializer(job).data)
+
+
+class JobTemplateListView(APIView):
+    """
+    API view to list and create recurring job templates.
+    """
+
+    def get(self, request):
+        """
+        Handle GET requests to list every template.
+
+        Returns:
+            Response: JSON representation of the templates.
+        """
+        serializer = JobTemplateSerializer(JobTemplate.objects.order_by('id'), many=True)
+        return Response(serializer.data)
+
+    def post(self, request):
+        serializer = JobTemplateSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class JobTemplateDetailView(APIView):
+    """
+    API view to retrieve, update or delete a recurring job template.
+
+    Changing the rule only affects occurrences that haven't been materialized;
+    existing jobs keep their dates and fields.
+    """
+
+    def get(self, request, id):
+        try:
+            template = JobTemplate.objects.get(id=id)
+        except JobTemplate.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(JobTemplateSerializer(template).data)
+
+    def put(self, request, id):
+        try:
+            template = JobTemplate.objects.get(id=id)
+        except JobTemplate.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        serializer = JobTemplateSerializer(template, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, id):
+        try:
+            template = JobTemplate.objects.get(id=id)
+        except JobTemplate.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        template.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobTemplateOccurrencesView(APIView):
+    """
+    API view to list the occurrences of recurring templates over a date range.
+
+    Occurrences are expanded from the recurrence rules at read time and are not
+    stored. Those already materialized into jobs carry the job id and status.
+    """
+
+    max_days = 366
+    max_results = 2000
+
+    def get(self, request):
+        """
+        Handle GET requests to expand templates over a window.
+
+        Query parameters:
+            start (str): First day as YYYY-MM-DD, defaults to today.
+            end (str): Last day as YYYY-MM-DD, defaults to 30 days after `start`.
+            template (int): Only expand this template, optional.
+
+        Returns:
+            Response: The occurrences ordered by date, and whether the list was
+            cut off at `max_results`.
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params['start']) if 'start' in params else now().date()
+            end = parse_date(params['end']) if 'end' in params else start + timedelta(days=30)
+            template_id = int(params['template']) if 'template' in params else None
+        except (ValueError, TypeError):
+            start = end = None
+        if start is None or end is None or not 0 <= (end - start).days < self.max_days:
+            return Response(
+                {"error": f"start and end must be YYYY-MM-DD at most {self.max_days} days apart, "
+                          "and template an id"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        templates = JobTemplate.objects.filter(is_active=True).order_by('id')
+        if template_id is not None:
+            templates = templates.filter(id=template_id)
+        occurrences = expand(templates, start, end, limit=self.max_results + 1)
+        return Response({
+            'start': start,
+            'end': end,
+            'occurrences': occurrences[:self.max_results],
+            'truncated': len(occurrences) > self.max_results,
+        })
+
+
+class MaterializeOccurrenceView(APIView):
+    """
+    API view to turn one occurrence of a template into a real job.
+
+    Call it before acting on an occurrence (editing, assigning or completing it).
+    It is idempotent: repeated calls for the same date return the same job.
+    """
+
+    def post(self, request, id):
+        """
+        Handle POST requests to materialize an occurrence.
+
+        Request body:
+            date (str): The occurrence date as YYYY-MM-DD.
+
+        Returns:
+            Response: The job, with status 201 if it was just created and 200 if it
+            already existed; 400 if the template has no occurrence on `date`.
+        """
+        try:
+            template = JobTemplate.objects.get(id=id)
+        except JobTemplate.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            day = parse_date(str(request.data.get('date', '')))
+        except ValueError:
+            day = None
+        if day is None or not is_occurrence(template, day):
+            return Response({"error": "date must be an occurrence of this template"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        job, created = materialize(template, day)
+        return Response(JobSerializer(job).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 # 1. Get Jobs by Priority
 class JobsByPriorityView(APIView):
     def get(self, request, priority):
-        jobs = Job.objects.filter(priority=priority)
+        jobs = Job.objects.active().filter(priority=priority)
         serializer = JobSerializer(jobs, many=True)
         return Response(serializer.data)
 
 # 2. Get Upcoming Jobs
 class UpcomingJobsView(APIView):
     def get(self, request):
-        jobs = Job.objects.filter(scheduled_date__gte=now().date())
+        jobs = Job.objects.active().filter(scheduled_date__gte=now().date())
         serializer = JobSerializer(jobs, many=True)
         return Response(serializer.data)
 
@@ -102,8 +696,10 @@ class MarkJobCompletedView(APIView):
         except Job.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        job.priority = 0  # Assume 0 is a custom value for 'Completed'
-        job.save()
+        if job.status != Job.STATUS_COMPLETED:
+            job.status = Job.STATUS_COMPLETED
+            job.completed_at = now()
+            job.save(update_fields=['status', 'completed_at', 'updated_at'])
         serializer = JobSerializer(job)
         return Response(serializer.data)
 
@@ -117,6 +713,10 @@ class DuplicateJobView(APIView):
 
         job.pk = None  # Clear the primary key to create a new instance
         job.title = f"{job.title} (Copy)"
+        job.status = Job.STATUS_ACTIVE
+        job.completed_at = None
+        job.template = None  # The copy is a one-off, not another occurrence
+        job.occurrence_date = None
         job.save()
         serializer = JobSerializer(job)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -132,11 +732,14 @@ class BulkUpdatePriorityView(APIView):
                 {"error": "job_ids and priority are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if (isinstance(new_priority, bool) or not isinstance(new_priority, int)
+                or new_priority not in dict(Job.PRIORITY_CHOICES)):
+            return Response({"error": "Invalid priority"}, status=status.HTTP_400_BAD_REQUEST)
 
-        jobs = Job.objects.filter(id__in=job_ids)
-        jobs.update(priority=new_priority)
-        serializer = JobSerializer(jobs, many=True)
-        return Response(serializer.data)
+        # A single UPDATE; the rows are not re-read or re-serialized afterwards.
+        count = Job.objects.filter(id__in=job_ids).update(priority=new_priority, updated_at=now())
+        reprioritize_on_commit(job_ids, new_priority)
+        return Response({"updated": count})
 
 # 6. Get Recently Updated Jobs
 class RecentlyUpdatedJobsView(APIView):
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Machine
+from .maintenance import reschedule_model
+from .models import Location, Machine, MaintenanceInterval
 from .models import MaintenanceTicket
 
 @admin.register(MaintenanceTicket)
@@ -25,7 +26,46 @@ class MachineAdmin(admin.ModelAdmin):
     search by name, model number, status, and location, and provides filters 
     for machine status, location, and last maintenance date.
     """
-    list_display = ('name', 'model_number', 'status', 'location', 'last_maintenance_date')
+    list_display = ('name', 'model_number', 'status', 'location', 'location_node',
+                    'last_maintenance_date')
     search_fields = ('name', 'model_number', 'status', 'location')
     list_filter = ('status', 'location', 'last_maintenance_date')
-    
\ No newline at end of file
+    
+
+
+@admin.register(MaintenanceInterval)
+class MaintenanceIntervalAdmin(admin.ModelAdmin):
+    """
+    Admin interface options for the MaintenanceInterval model.
+
+    Saving or deleting an interval reschedules the machines of its model number.
+    """
+    list_display = ('model_number', 'interval_days')
+    search_fields = ('model_number',)
+
+    def save_model(self, request, obj, form, change):
+        previous = form.initial.get('model_number')
+        super().save_model(request, obj, form, change)
+        reschedule_model(obj.model_number)
+        if previous and previous != obj.model_number:
+            reschedule_model(previous)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        reschedule_model(obj.model_number)
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    """
+    Admin interface options for the Location model.
+
+    Places are listed in path order; the parent of an existing place is changed
+    through the API's move action, which also rewrites the subtree's paths.
+    """
+    list_display = ('name', 'parent', 'depth', 'path')
+    search_fields = ('name',)
+    ordering = ('path',)
+
+    def get_readonly_fields(self, request, obj=None):
+        return ('parent',) if obj else ()
@@ -5,10 +5,14 @@ class MachinesConfig(AppConfig):
     """
     Configuration class for the Machines application.
 
-    Sets the default auto-incrementing primary key field type to `BigAutoField`
-    and registers the application under the name 'machines'.
+    Sets the default auto-incrementing primary key field type to `BigAutoField`,
+    registers the application under the name 'machines' and connects the signal
+    handlers that keep the fleet counters current.
     """
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'machines'
+
+    def ready(self):
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
     
\ No newline at end of file
@@ -0,0 +1,145 @@
+# pylint: disable=no-member
+"""
+Incrementally maintained fleet counts.
+
+`FleetCounter` holds machines per status, machines per location and open tickets
+per machine. Saves and deletes go through the signal handlers in
+`machines.signals`, which call `machine_changed()` and `ticket_changed()` with the
+row's state before and after; code that changes rows with `QuerySet.update()`
+bypasses signals and must call them itself. Nothing is written when a save
+doesn't move a count, so ordinary edits never touch the counter table.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .models import FleetCounter, Machine, MaintenanceTicket
+
+
+def machine_state(machine):
+    """Returns the counted state of `machine`: its ``(status, location)``."""
+    return (machine.status, machine.location)
+
+
+def ticket_state(ticket):
+    """Returns the counted state of `ticket`: its ``(machine_id, status)``."""
+    return (ticket.machine_id, ticket.status)
+
+
+def adjust(deltas):
+    """
+    Applies count changes with atomic ``count = count + delta`` updates.
+
+    Args:
+        deltas (Counter): Maps ``(kind, key)`` to the amount to add.
+    """
+    # Rows are updated in key order so concurrent bulk changes can't deadlock.
+    for (kind, key), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        key = str(key)
+        counter = FleetCounter.objects.filter(kind=kind, key=key)
+        if not counter.update(count=F('count') + delta):
+            FleetCounter.objects.bulk_create([FleetCounter(kind=kind, key=key)],
+                                             ignore_conflicts=True)
+            counter.update(count=F('count') + delta)
+
+
+def machine_changed(before, after):
+    """
+    Updates the counts for a machine going from state `before` to `after`.
+
+    Args:
+        before (tuple): ``(status, location)`` before the change, None if created.
+        after (tuple): ``(status, location)`` after the change, None if deleted.
+    """
+    deltas = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            status, location = state
+            deltas[(FleetCounter.KIND_STATUS, status)] += sign
+            deltas[(FleetCounter.KIND_LOCATION, location)] += sign
+    adjust(deltas)
+
+
+def ticket_changed(before, after):
+    """
+    Updates the counts for a ticket going from state `before` to `after`.
+
+    Args:
+        before (tuple): ``(machine_id, status)`` before the change, None if created.
+        after (tuple): ``(machine_id, status)`` after the change, None if deleted.
+    """
+    tickets_changed([(before, after)])
+
+
+def tickets_changed(changes):
+    """
+    Updates the counts for many tickets at once, one update per affected counter.
+
+    Args:
+        changes (iterable): ``(before, after)`` pairs as taken by `ticket_changed`.
+    """
+    deltas = Counter()
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is not None and state[1] in MaintenanceTicket.OPEN_STATUSES:
+                deltas[(FleetCounter.KIND_OPEN_TICKETS, state[0])] += sign
+    adjust(deltas)
+
+
+def machine_deleted(machine_id):
+    """Drops the per-machine counters of a deleted machine."""
+    FleetCounter.objects.filter(kind=FleetCounter.KIND_OPEN_TICKETS, key=str(machine_id)).delete()
+
+
+def recount():
+    """
+    Rebuilds every counter from the machine and ticket tables.
+
+    On PostgreSQL the counter table is locked first, so saves that commit while the
+    recount runs wait for it and then apply their change on top of the new counts.
+
+    Returns:
+        int: The number of counter rows written.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {FleetCounter._meta.db_table} IN EXCLUSIVE MODE')
+        rows = []
+        for kind, field in ((FleetCounter.KIND_STATUS, 'status'),
+                            (FleetCounter.KIND_LOCATION, 'location')):
+            for key, count in Machine.objects.values_list(field).annotate(n=Count('id')).order_by():
+                rows.append(FleetCounter(kind=kind, key=str(key), count=count))
+        open_tickets = (MaintenanceTicket.objects.filter(status__in=MaintenanceTicket.OPEN_STATUSES)
+                        .values_list('machine_id').annotate(n=Count('id')).order_by())
+        for machine_id, count in open_tickets:
+            rows.append(FleetCounter(kind=FleetCounter.KIND_OPEN_TICKETS, key=str(machine_id),
+                                     count=count))
+        FleetCounter.objects.all().delete()
+        FleetCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def summary():
+    """
+    Reads the fleet summary from the counter table.
+
+    Returns:
+        dict: ``machines`` (total), ``status`` and ``location`` (machines per value)
+        and ``open_tickets`` (open or in-progress tickets per machine id).
+    """
+    result = {FleetCounter.KIND_STATUS: {}, FleetCounter.KIND_LOCATION: {},
+              FleetCounter.KIND_OPEN_TICKETS: {}}
+    counts = FleetCounter.objects.filter(count__gt=0).values_list('kind', 'key', 'count')
+    for kind, key, count in counts:
+        if kind in result:
+            result[kind][int(key) if kind == FleetCounter.KIND_OPEN_TICKETS else key] = count
+    return {
+        'machines': sum(result[FleetCounter.KIND_STATUS].values()),
+        'status': result[FleetCounter.KIND_STATUS],
+        'location': result[FleetCounter.KIND_LOCATION],
+        'open_tickets': result[FleetCounter.KIND_OPEN_TICKETS],
+    }
@@ -0,0 +1,216 @@
+# pylint: disable=no-member
+"""
+Near-duplicate detection for maintenance tickets.
+
+Each unfinished ticket is reduced to the set of 4-character shingles of its
+normalized issue description and summarized by a 64-value MinHash signature, the
+minimum of 64 fixed random hash functions over the shingles. Two signatures agree
+in a given position with probability equal to the Jaccard similarity of the
+shingle sets, so the signature is split into 32 bands of 2 values and tickets that
+share any band land in the same bucket. Buckets are keyed per machine, which makes
+a lookup a handful of dictionary probes however many tickets are open.
+
+Bucket hits are only candidates: their descriptions are loaded and compared
+exactly, which also discards tickets that were closed or deleted since the index
+last saw them, and evicts them from the index. Like the job search fallback, the
+index lives in process and is kept current by re-reading tickets whose
+`updated_at` moved since the last sync. A deleted ticket never shows up in that
+sync, so the index is also rebuilt from scratch every `REBUILD_INTERVAL`.
+"""
+import datetime
+import re
+import threading
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from . import transitions
+from .models import MaintenanceTicket
+
+SHINGLE_SIZE = 4
+NUM_BANDS = 32
+ROWS_PER_BAND = 2
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+
+# Tickets whose shingle sets overlap at least this much are reported.
+SIMILARITY_THRESHOLD = 0.5
+
+# The universal hash functions ``(a * x + b) mod p`` behind the signature. The seed
+# is fixed so every process computes the same signatures; with p below 2**31 the
+# products fit in 64 bits.
+_PRIME = (1 << 31) - 1
+_A, _B = np.random.default_rng(20240611).integers(1, _PRIME, size=(2, NUM_HASHES), dtype=np.int64)
+
+# See `jobs.scheduling.SYNC_OVERLAP`.
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# How often the index is rebuilt, dropping tickets deleted behind its back.
+REBUILD_INTERVAL = datetime.timedelta(hours=1)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def shingles(text):
+    """Returns the set of character shingles of `text`, ignoring case and punctuation."""
+    normalized = ' '.join(WORD_RE.findall((text or '').lower()))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(first, second):
+    """Returns the Jaccard similarity of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def signature(shingle_set):
+    """Returns the MinHash signature of a non-empty shingle set."""
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingle_set),
+                         dtype=np.int64, count=len(shingle_set)) % _PRIME
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_keys(machine_id, sig):
+    """Returns the LSH bucket keys of a signature on `machine_id`."""
+    bands = sig.reshape(NUM_BANDS, ROWS_PER_BAND)
+    return [(machine_id, band, bands[band].tobytes()) for band in range(NUM_BANDS)]
+
+
+class MinHashIndex:
+    """
+    In-process LSH index of the unfinished tickets of every machine.
+
+    Attributes:
+        buckets (dict): Maps ``(machine_id, band, band values)`` to ticket ids.
+        keys_of (dict): Maps ticket ids to their bucket keys, for removal.
+        synced_at (datetime): When the index last read the database.
+        built_at (datetime): When the index was last built from scratch.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(set)
+        self.keys_of = {}
+        self.synced_at = None
+        self.built_at = None
+        self.lock = threading.RLock()
+
+    def add(self, ticket):
+        """Indexes `ticket` if it is unfinished, replacing what was indexed for it."""
+        with self.lock:
+            self.remove(ticket.id)
+            shingle_set = shingles(ticket.issue_description)
+            if ticket.status not in MaintenanceTicket.OPEN_STATUSES or not shingle_set:
+                return
+            keys = band_keys(ticket.machine_id, signature(shingle_set))
+            for key in keys:
+                self.buckets[key].add(ticket.id)
+            self.keys_of[ticket.id] = keys
+
+    def remove(self, ticket_id):
+        """Drops `ticket_id` from the index."""
+        with self.lock:
+            for key in self.keys_of.pop(ticket_id, ()):
+                self.buckets[key].discard(ticket_id)
+                if not self.buckets[key]:
+                    del self.buckets[key]
+
+    def sync(self):
+        """
+        Indexes tickets changed since the last sync, building the index if it is
+        new or older than `REBUILD_INTERVAL`.
+        """
+        with self.lock:
+            now = timezone.now()
+            tickets = MaintenanceTicket.objects.only('id', 'machine_id', 'issue_description',
+                                                     'status')
+            if self.built_at is None or now - self.built_at > REBUILD_INTERVAL:
+                self.buckets.clear()
+                self.keys_of.clear()
+                self.built_at = now
+                tickets = tickets.filter(status__in=MaintenanceTicket.OPEN_STATUSES)
+            else:
+                tickets = tickets.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP)
+            self.synced_at = now
+            for ticket in tickets.iterator(chunk_size=2000):
+                self.add(ticket)
+
+    def candidates(self, machine_id, shingle_set):
+        """
+        Returns the ids of indexed tickets on `machine_id` sharing a bucket with
+        `shingle_set`.
+        """
+        if not shingle_set:
+            return set()
+        with self.lock:
+            found = set()
+            for key in band_keys(machine_id, signature(shingle_set)):
+                found.update(self.buckets.get(key, ()))
+            return found
+
+
+_index = MinHashIndex()
+
+
+def find_duplicates(machine_id, issue_description, exclude=None):
+    """
+    Finds unfinished tickets on a machine whose description nearly matches.
+
+    Args:
+        machine_id (int): The machine the description was reported for.
+        issue_description (str): The description to match.
+        exclude (int): A ticket id to leave out, usually the ticket being checked.
+
+    Returns:
+        list: ``{'ticket': id, 'similarity': float}`` dicts, most similar first.
+    """
+    _index.sync()
+    shingle_set = shingles(issue_description)
+    candidates = _index.candidates(machine_id, shingle_set) - {exclude}
+    if not candidates:
+        return []
+    rows = MaintenanceTicket.objects.filter(id__in=candidates, machine_id=machine_id,
+                                            status__in=MaintenanceTicket.OPEN_STATUSES)
+    matches = []
+    for ticket_id, description in rows.values_list('id', 'issue_description'):
+        candidates.discard(ticket_id)
+        similarity = jaccard(shingle_set, shingles(description))
+        if similarity >= SIMILARITY_THRESHOLD:
+            matches.append({'ticket': ticket_id, 'similarity': round(similarity, 3)})
+    # The rest were closed, deleted or moved to another machine: drop them until a
+    # sync says otherwise.
+    for ticket_id in candidates:
+        _index.remove(ticket_id)
+    matches.sort(key=lambda match: (-match['similarity'], match['ticket']))
+    return matches
+
+
+def merge(primary, duplicate_ids, actor=None):
+    """
+    Folds duplicate tickets into `primary`.
+
+    The duplicates, unfinished tickets of the same machine, are closed as regular
+    transitions and point at `primary` through `duplicate_of`.
+
+    Args:
+        primary (MaintenanceTicket): The ticket that stays open.
+        duplicate_ids (list): The tickets to fold in.
+        actor (User): The user merging, optional.
+
+    Returns:
+        list: The ids of the merged tickets. Ids that aren't unfinished tickets of
+        the same machine are skipped.
+    """
+    tickets = (MaintenanceTicket.objects
+               .filter(id__in=duplicate_ids, machine_id=primary.machine_id,
+                       status__in=MaintenanceTicket.OPEN_STATUSES)
+               .exclude(id=primary.id))
+    with transaction.atomic():
+        merged, _ = transitions.bulk_transition(tickets, transitions.CLOSED, actor=actor)
+        MaintenanceTicket.objects.filter(id__in=merged).update(duplicate_of=primary,
+                                                               updated_at=timezone.now())
+    return merged
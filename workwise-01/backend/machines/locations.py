@@ -0,0 +1,138 @@
+# pylint: disable=no-member
+"""
+Queries and maintenance for the location hierarchy.
+
+Locations keep a materialized path (see `Location`), so everything below a place
+is a prefix match on `location_path_idx`, and the machines there are found through
+the index on `Machine.location_node`. Moving a place rewrites the path prefix of
+its whole subtree with a single `UPDATE`; machines point at their place by id and
+don't change at all.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from .models import Location, Machine
+
+
+class LocationMoveError(ValueError):
+    """Raised when a place can't be moved under the requested parent."""
+
+
+def subtree(location):
+    """Returns `location` and every place below it."""
+    return Location.objects.filter(path__startswith=location.path)
+
+
+def machines_in(location):
+    """Returns the machines placed at `location` or anywhere below it."""
+    return Machine.objects.filter(location_node__path__startswith=location.path)
+
+
+def summary(location):
+    """
+    Counts the machines below `location` by status, in total and per child place.
+
+    Machines are grouped per place and status in the database; the groups, a few
+    per place, are then rolled up to the direct children by their path prefix.
+
+    Returns:
+        dict: ``machines`` and ``status`` for the whole subtree and ``children``,
+        the same figures for each direct child.
+    """
+    children = list(Location.objects.filter(parent=location).order_by('name')
+                    .values_list('id', 'name', 'path'))
+    totals = Counter()
+    per_child = defaultdict(Counter)
+    groups = (machines_in(location).values_list('location_node__path', 'status')
+              .annotate(n=Count('id')).order_by())
+    for path, machine_status, count in groups:
+        totals[machine_status] += count
+        # The child's segment follows the location's own path.
+        child_id = int(path[len(location.path):].split('/', 1)[0] or 0)
+        per_child[child_id][machine_status] += count
+    return {
+        'machines': sum(totals.values()),
+        'status': dict(totals),
+        'children': [{'id': child_id, 'name': name, 'machines': sum(per_child[child_id].values()),
+                      'status': dict(per_child[child_id])}
+                     for child_id, name, _ in children],
+    }
+
+
+def move(location, parent):
+    """
+    Moves `location`, with everything below it, under `parent`.
+
+    Args:
+        location (Location): The place to move.
+        parent (Location): The new enclosing place, None to make it a site.
+
+    Returns:
+        int: The number of places whose path changed.
+
+    Raises:
+        LocationMoveError: If `parent` lies inside the moved subtree or the subtree
+            would end up deeper than cells.
+    """
+    with transaction.atomic():
+        # Locking re-reads the paths, which a concurrent move of an ancestor may
+        # have changed since these objects were loaded.
+        location = Location.objects.select_for_update().get(pk=location.pk)
+        if parent is not None:
+            parent = Location.objects.select_for_update().get(pk=parent.pk)
+            if parent.path.startswith(location.path):
+                raise LocationMoveError('A place cannot be moved below itself')
+        old_path = location.path
+        new_path = f'{parent.path if parent else ""}{location.pk}/'
+        shift = (parent.depth + 1 if parent else 0) - location.depth
+        deepest = subtree(location).order_by('-depth').values_list('depth', flat=True).first()
+        if deepest + shift >= len(Location.KINDS):
+            raise LocationMoveError('The move would place locations below cell level')
+
+        moved = subtree(location).update(
+            path=Concat(Value(new_path), Substr('path', len(old_path) + 1),
+                        output_field=CharField()),
+            depth=F('depth') + shift,
+        )
+        Location.objects.filter(pk=location.pk).update(parent=parent)
+    return moved
+
+
+def import_strings(separator='/'):
+    """
+    Builds the hierarchy from the free-text `Machine.location` values.
+
+    Each distinct value of machines without a place is split on `separator` into
+    up to four levels (``'Plant 2 / Hall B / Line 1'``), the missing places are
+    created, and the machines are linked to the deepest one. Running it again only
+    handles machines that still have no place.
+
+    Args:
+        separator (str): The string between levels.
+
+    Returns:
+        tuple: ``(linked, skipped)``, the number of machines linked and the location
+        values that were empty or too deep.
+    """
+    unplaced = Machine.objects.filter(location_node__isnull=True)
+    places = {}
+    linked, skipped = 0, []
+    for value in unplaced.order_by('location').values_list('location', flat=True).distinct():
+        names = [name.strip() for name in value.split(separator) if name.strip()]
+        if not names or len(names) > len(Location.KINDS):
+            skipped.append(value)
+            continue
+        with transaction.atomic():
+            parent = None
+            for name in names:
+                key = (parent.pk if parent else None, name)
+                if key not in places:
+                    places[key], _ = Location.objects.get_or_create(parent=parent, name=name)
+                parent = places[key]
+            linked += unplaced.filter(location=value).update(location_node=parent,
+                                                             updated_at=timezone.now())
+    return linked, skipped
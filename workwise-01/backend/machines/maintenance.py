@@ -0,0 +1,43 @@
+# pylint: disable=no-member
+"""
+Maintenance scheduling helpers.
+
+`Machine.next_maintenance_due` is stored so the maintenance queue is a range scan
+on `machine_maintenance_due_idx`. A machine recomputes it on save; changing the
+interval of a model number recomputes it for every machine of that model here.
+"""
+from django.utils import timezone
+
+from .models import Machine, MaintenanceInterval
+
+BATCH_SIZE = 2000
+
+
+def reschedule_model(model_number):
+    """
+    Recomputes `next_maintenance_due` for all machines of `model_number`.
+
+    Args:
+        model_number (str): The model number whose interval changed.
+
+    Returns:
+        int: The number of machines whose due date moved.
+    """
+    interval_days = MaintenanceInterval.days_for(model_number)
+    machines = (Machine.objects
+                .filter(model_number=model_number, last_maintenance_date__isnull=False)
+                .only('id', 'model_number', 'last_maintenance_date', 'next_maintenance_due'))
+    changed = []
+    moved = 0
+    for machine in machines.iterator(chunk_size=BATCH_SIZE):
+        due = machine.compute_next_maintenance_due(interval_days)
+        if due != machine.next_maintenance_due:
+            machine.next_maintenance_due = due
+            machine.updated_at = timezone.now()
+            changed.append(machine)
+        if len(changed) == BATCH_SIZE:
+            Machine.objects.bulk_update(changed, ['next_maintenance_due', 'updated_at'])
+            moved += len(changed)
+            changed = []
+    Machine.objects.bulk_update(changed, ['next_maintenance_due', 'updated_at'])
+    return moved + len(changed)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from machines.sla import overdue, record_breaches
+
+
+class Command(BaseCommand):
+    """
+    Finds maintenance tickets that outlived their SLA.
+
+    Meant to run every few minutes. Each overdue ticket is stamped and its assignee
+    (or reporter) notified once; later runs skip it.
+    """
+
+    help = 'Flag unfinished maintenance tickets past their SLA and notify their owners.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the overdue tickets, without flagging or notifying.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = overdue(timezone.now()).count()
+            self.stdout.write(f'{count} tickets are past their SLA.')
+            return
+        count = record_breaches()
+        self.stdout.write(self.style.SUCCESS(f'Flagged {count} tickets past their SLA.'))
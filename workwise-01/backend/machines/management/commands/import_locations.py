@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from machines.locations import import_strings
+
+
+class Command(BaseCommand):
+    """
+    Migrates the free-text machine locations into the location hierarchy.
+
+    Values like ``Plant 2 / Hall B / Line 1`` become a site, a building and a line,
+    and each machine is linked to the deepest place of its value. Safe to re-run:
+    machines that already have a place are left alone.
+    """
+
+    help = 'Create location hierarchy nodes from Machine.location strings and link the machines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--separator', default='/',
+                            help='String separating the levels of a location value (default "/").')
+
+    def handle(self, *args, **options):
+        linked, skipped = import_strings(options['separator'])
+        self.stdout.write(self.style.SUCCESS(f'Linked {linked} machines to locations.'))
+        for value in skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped location {value!r}: empty or deeper than four levels.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from machines.counters import recount
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the fleet counters from the machine and ticket tables.
+
+    The counters are kept current on every save and delete; this is the repair
+    path for rows changed behind the application's back (raw SQL, restores).
+    """
+
+    help = 'Recompute the fleet summary counters from scratch.'
+
+    def handle(self, *args, **options):
+        rows = recount()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} fleet counters.'))
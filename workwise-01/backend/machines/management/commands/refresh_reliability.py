@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from machines.reliability import refresh
+
+
+class Command(BaseCommand):
+    """
+    Updates the MTBF/MTTR tables used by the reliability endpoints.
+
+    Meant to run periodically. By default only machines whose tickets changed since
+    the previous run are recomputed; run with --full now and then (e.g. nightly) so
+    the failure-rate trend windows also move forward for quiet machines.
+    """
+
+    help = 'Recompute reliability figures for machines with new or updated tickets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every machine instead of only the changed ones.')
+
+    def handle(self, *args, **options):
+        written = refresh(full=options['full'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed reliability figures for {written} machines.'))
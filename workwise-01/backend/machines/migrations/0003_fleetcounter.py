@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:22
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_fleet(apps, schema_editor):  # pylint: disable=unused-argument
+    FleetCounter = apps.get_model('machines', 'FleetCounter')
+    Machine = apps.get_model('machines', 'Machine')
+    MaintenanceTicket = apps.get_model('machines', 'MaintenanceTicket')
+    rows = []
+    for kind in ('status', 'location'):
+        for key, count in Machine.objects.values_list(kind).annotate(n=Count('id')).order_by():
+            rows.append(FleetCounter(kind=kind, key=str(key), count=count))
+    open_tickets = (MaintenanceTicket.objects.filter(status__in=['open', 'in_progress'])
+                    .values_list('machine_id').annotate(n=Count('id')).order_by())
+    for machine_id, count in open_tickets:
+        rows.append(FleetCounter(kind='open_tickets', key=str(machine_id), count=count))
+    FleetCounter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0002_machine_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FleetCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='fleetcounter_unique_kind_key')],
+            },
+        ),
+        migrations.RunPython(count_fleet, migrations.RunPython.noop),
+    ]
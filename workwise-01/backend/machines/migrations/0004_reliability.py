@@ -0,0 +1,62 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closed_at(apps, schema_editor):  # pylint: disable=unused-argument
+    # The real closing time of old tickets isn't known; their last update is the
+    # closest record of it.
+    MaintenanceTicket = apps.get_model('machines', 'MaintenanceTicket')
+    MaintenanceTicket.objects.filter(status='closed').update(closed_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0003_fleetcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelReliability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_number', models.CharField(max_length=100, unique=True)),
+                ('machines', models.IntegerField(default=0)),
+                ('failures', models.IntegerField(default=0)),
+                ('mtbf_hours', models.FloatField(blank=True, null=True)),
+                ('mttr_hours', models.FloatField(blank=True, null=True)),
+                ('recent_failures', models.IntegerField(default=0)),
+                ('previous_failures', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='MachineReliability',
+            fields=[
+                ('machine', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reliability', serialize=False, to='machines.machine')),
+                ('model_number', models.CharField(max_length=100)),
+                ('failures', models.IntegerField(default=0)),
+                ('interval_count', models.IntegerField(default=0)),
+                ('interval_hours_total', models.FloatField(default=0)),
+                ('repairs', models.IntegerField(default=0)),
+                ('repair_hours_total', models.FloatField(default=0)),
+                ('mtbf_hours', models.FloatField(blank=True, null=True)),
+                ('mttr_hours', models.FloatField(blank=True, null=True)),
+                ('recent_failures', models.IntegerField(default=0)),
+                ('previous_failures', models.IntegerField(default=0)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-failures', 'machine'], name='reliability_failures_idx'), models.Index(fields=['model_number'], name='reliability_model_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_closed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:30
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_next_maintenance_due(apps, schema_editor):  # pylint: disable=unused-argument
+    # No per-model intervals exist yet, so every machine gets the default.
+    Machine = apps.get_model('machines', 'Machine')
+    interval = datetime.timedelta(days=getattr(settings, 'MAINTENANCE_INTERVAL_DAYS', 30))
+    machines = Machine.objects.filter(last_maintenance_date__isnull=False).only('id', 'last_maintenance_date')
+    batch = []
+    for machine in machines.iterator(chunk_size=2000):
+        machine.next_maintenance_due = machine.last_maintenance_date + interval
+        batch.append(machine)
+        if len(batch) == 2000:
+            Machine.objects.bulk_update(batch, ['next_maintenance_due'])
+            batch = []
+    Machine.objects.bulk_update(batch, ['next_maintenance_due'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0004_reliability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_number', models.CharField(max_length=100, unique=True)),
+                ('interval_days', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='machine',
+            name='next_maintenance_due',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='machine',
+            index=models.Index(fields=['next_maintenance_due', 'id'], name='machine_maintenance_due_idx'),
+        ),
+        migrations.RunPython(fill_next_maintenance_due, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0007_maintenanceticket_assigned_to'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='machines.maintenanceticket'),
+        ),
+    ]
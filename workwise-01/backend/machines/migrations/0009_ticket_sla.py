@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:02
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_sla_due_at(apps, schema_editor):  # pylint: disable=unused-argument
+    # Existing tickets get the default priority, so their SLA runs from creation
+    # with that priority's allowance.
+    MaintenanceTicket = apps.get_model('machines', 'MaintenanceTicket')
+    hours = getattr(settings, 'TICKET_SLA_HOURS', {2: 72})[2]
+    MaintenanceTicket.objects.update(sla_due_at=models.F('created_at') + datetime.timedelta(hours=hours))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0008_maintenanceticket_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='priority',
+            field=models.IntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Critical')], default=2),
+        ),
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='sla_breached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='sla_due_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_sla_due_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='maintenanceticket',
+            name='sla_due_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(condition=models.Q(('status__in', ['open', 'in_progress'])), fields=['sla_due_at', 'id'], name='ticket_sla_queue_idx'),
+        ),
+    ]
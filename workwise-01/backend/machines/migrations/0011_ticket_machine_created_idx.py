@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0010_location'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['machine', '-created_at'], name='ticket_machine_created_idx'),
+        ),
+    ]
@@ -1,7 +1,106 @@
 # pylint: disable=no-member
 
-from django.db import models
+import datetime
+
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+class Location(models.Model):
+    """
+    Model representing a place in the site -> building -> line -> cell hierarchy.
+
+    Each node stores its materialized path, the ids of its ancestors and itself
+    (``'3/17/42/'``), so a subtree is every node whose path starts with the root's
+    path: a prefix range scan on `location_path_idx`. Moves rewrite the paths of the
+    moved subtree in one statement (see `machines.locations`).
+
+    Attributes:
+        name (CharField): The name of the place, unique among its siblings.
+        parent (ForeignKey): The enclosing place, None for sites.
+        path (CharField): The materialized path, maintained on save and move.
+        depth (PositiveSmallIntegerField): 0 for sites up to 3 for cells.
+    """
+
+    KINDS = ('site', 'building', 'line', 'cell')
+    """Levels of the hierarchy, indexed by depth."""
+
+    name = models.CharField(max_length=100)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True,
+                               related_name='children')
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
+
+    class Meta:
+        """
+        Meta options for the Location model.
+
+        The path index uses a pattern operator class on PostgreSQL so that
+        ``LIKE 'prefix%'`` subtree filters can use it regardless of collation.
+        """
+        indexes = [
+            models.Index(fields=['path'], name='location_path_idx',
+                         opclasses=['varchar_pattern_ops']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['parent', 'name'], name='location_unique_child_name'),
+            models.UniqueConstraint(fields=['name'], name='location_unique_site_name',
+                                    condition=models.Q(parent__isnull=True)),
+        ]
+
+    @property
+    def kind(self):
+        """Returns the level of the place: site, building, line or cell."""
+        return self.KINDS[self.depth]
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the place, deriving `depth` and `path` from its parent when it is created.
+
+        The path embeds the id, so a new row is written first and its path filled
+        in right after, in the same transaction. Use `machines.locations.move()` to
+        change the parent of an existing place.
+        """
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        self.depth = self.parent.depth + 1 if self.parent_id else 0
+        if self.depth >= len(self.KINDS):
+            raise ValueError('Cells cannot contain other places')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = f'{self.parent.path if self.parent_id else ""}{self.pk}/'
+            Location.objects.filter(pk=self.pk).update(path=self.path)
+
+    def __str__(self):
+        """Returns the name of the place."""
+        return self.name
+
+
+class MachineQuerySet(models.QuerySet):
+    """QuerySet for machines with an opt-in annotation of their ticket statistics."""
+
+    def with_ticket_stats(self):
+        """
+        Annotates each machine with `open_ticket_count`, `last_ticket_at` and
+        `last_reporter` (the username behind its latest ticket).
+
+        The figures are correlated subqueries in the same `SELECT`, so a page of
+        machines still costs one query; the latest ticket is found through
+        `ticket_machine_created_idx`.
+        """
+        tickets = MaintenanceTicket.objects.filter(machine=models.OuterRef('pk')).order_by()
+        latest = tickets.order_by('-created_at', '-id')
+        open_count = (tickets.filter(status__in=MaintenanceTicket.OPEN_STATUSES)
+                      .values('machine').annotate(n=models.Count('id')).values('n'))
+        return self.annotate(
+            open_ticket_count=Coalesce(models.Subquery(open_count), 0),
+            last_ticket_at=models.Subquery(latest.values('created_at')[:1]),
+            last_reporter=models.Subquery(latest.values('reported_by__username')[:1]),
+        )
+
 
 class Machine(models.Model):
     """
@@ -10,16 +109,69 @@ class Machine(models.Model):
     Attributes:
         name (CharField): The name of the machine.
         model_number (CharField): The model number of the machine.
-        location (CharField): The location where the machine is placed.
+        location (CharField): The location where the machine is placed, as free text.
+        location_node (ForeignKey): The place in the location hierarchy, optional.
         status (CharField): The operational status of the machine, either 'operational' or 'maintenance'.
         last_maintenance_date (DateField): The date of the last maintenance, optional.
+        next_maintenance_due (DateField): When maintenance is due next, derived on save from
+            `last_maintenance_date` and the interval of the machine's model number.
+        updated_at (DateTimeField): The timestamp when the machine was last updated, auto-updated.
     """
 
     name = models.CharField(max_length=100)
     model_number = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
+    location_node = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='machines')
     status = models.CharField(max_length=50, choices=[('operational', 'Operational'), ('maintenance', 'Maintenance')])
     last_maintenance_date = models.DateField(null=True, blank=True)
+    next_maintenance_due = models.DateField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MachineQuerySet.as_manager()
+
+    class Meta:
+        """
+        Meta options for the Machine model; `updated_at` is indexed for delta sync and
+        `next_maintenance_due` for the maintenance queue.
+        """
+        indexes = [
+            models.Index(fields=['updated_at'], name='machine_updated_at_idx'),
+            models.Index(fields=['next_maintenance_due', 'id'], name='machine_maintenance_due_idx'),
+        ]
+
+    def compute_next_maintenance_due(self, interval_days=None):
+        """
+        Returns the date maintenance is due after `last_maintenance_date`.
+
+        Args:
+            interval_days (int): The interval to apply; looked up for the machine's
+                                 model number when omitted.
+
+        Returns:
+            date: The due date, or None if the machine was never maintained.
+        """
+        if self.last_maintenance_date is None:
+            return None
+        if interval_days is None:
+            interval_days = MaintenanceInterval.days_for(self.model_number)
+        return self.last_maintenance_date + datetime.timedelta(days=interval_days)
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the machine, recomputing `next_maintenance_due` when the last maintenance
+        date or the model number may have changed.
+
+        The save runs in a transaction so the fleet counter signals can lock the
+        stored row while they compare it with the new values.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'last_maintenance_date', 'model_number'} & set(update_fields):
+            self.next_maintenance_due = self.compute_next_maintenance_due()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'next_maintenance_due'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -31,6 +183,39 @@ class Machine(models.Model):
         return f"Machine: {self.name} (Model: {self.model_number})"
 
 
+class MaintenanceInterval(models.Model):
+    """
+    Model representing how often machines of one model number need maintenance.
+
+    Model numbers without a row use the `MAINTENANCE_INTERVAL_DAYS` setting.
+
+    Attributes:
+        model_number (CharField): The model number the interval applies to.
+        interval_days (PositiveIntegerField): Days between maintenances.
+    """
+
+    model_number = models.CharField(max_length=100, unique=True)
+    interval_days = models.PositiveIntegerField()
+
+    @classmethod
+    def days_for(cls, model_number):
+        """
+        Returns the maintenance interval of `model_number` in days.
+        """
+        days = (cls.objects.filter(model_number=model_number)
+                .values_list('interval_days', flat=True).first())
+        return days if days is not None else getattr(settings, 'MAINTENANCE_INTERVAL_DAYS', 30)
+
+    def __str__(self):
+        """
+        Returns a string representation of the interval.
+
+        Returns:
+            str: The model number and its interval.
+        """
+        return f"{self.model_number}: every {self.interval_days} days"
+
+
 class MaintenanceTicket(models.Model):
     """
     Model representing a maintenance ticket associated with a machine.
@@ -39,17 +224,101 @@ class MaintenanceTicket(models.Model):
         machine (ForeignKey): The machine associated with this ticket.
         issue_description (TextField): A description of the issue with the machine.
         reported_by (ForeignKey): The user who reported the issue.
+        assigned_to (ForeignKey): The technician working on the ticket, optional.
+        duplicate_of (ForeignKey): The ticket this one was merged into, if any.
         status (CharField): The current status of the ticket, choices are 'open', 'in_progress', or 'closed'.
+        priority (IntegerField): Urgency of the ticket, from Low to Critical; sets the SLA.
         created_at (DateTimeField): The date and time when the ticket was created, auto-set on creation.
         updated_at (DateTimeField): The date and time when the ticket was last updated, auto-updated.
+        closed_at (DateTimeField): The date and time when the ticket was closed, set on save.
+        sla_due_at (DateTimeField): When the ticket must be finished by, set on save from
+            `created_at` and the `TICKET_SLA_HOURS` of its priority.
+        sla_breached_at (DateTimeField): When the ticket was found overdue, if it was.
     """
 
+    PRIORITY_LOW = 1
+    PRIORITY_MEDIUM = 2
+    PRIORITY_HIGH = 3
+    PRIORITY_CRITICAL = 4
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, 'Low'),
+        (PRIORITY_MEDIUM, 'Medium'),
+        (PRIORITY_HIGH, 'High'),
+        (PRIORITY_CRITICAL, 'Critical'),
+    ]
+    """Priority choices for the ticket, with levels Low, Medium, High, and Critical."""
+
+    DEFAULT_SLA_HOURS = {PRIORITY_LOW: 168, PRIORITY_MEDIUM: 72, PRIORITY_HIGH: 24,
+                         PRIORITY_CRITICAL: 4}
+    """SLA per priority used when the `TICKET_SLA_HOURS` setting is absent."""
+
     machine = models.ForeignKey(Machine, on_delete=models.CASCADE, related_name='tickets')
     issue_description = models.TextField()
     reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='assigned_tickets')
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='duplicates')
     status = models.CharField(max_length=50, choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('closed', 'Closed')])
+    priority = models.IntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_MEDIUM)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    sla_due_at = models.DateTimeField(editable=False)
+    sla_breached_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    OPEN_STATUSES = ('open', 'in_progress')
+    """Statuses of tickets that still need work."""
+
+    class Meta:
+        """
+        Meta options for the MaintenanceTicket model.
+
+        `updated_at` is indexed for delta sync and `machine`/`created_at` for the
+        latest ticket of each machine. The SLA queue index covers only
+        unfinished tickets, ordered by due time, so both the queue pages and the
+        breach check are range scans over the small set of tickets still open.
+        """
+        indexes = [
+            models.Index(fields=['updated_at'], name='ticket_updated_at_idx'),
+            models.Index(fields=['machine', '-created_at'], name='ticket_machine_created_idx'),
+            models.Index(fields=['sla_due_at', 'id'], name='ticket_sla_queue_idx',
+                         condition=models.Q(status__in=['open', 'in_progress'])),
+        ]
+
+    @classmethod
+    def sla_hours(cls):
+        """Returns the SLA in hours of each priority, from `TICKET_SLA_HOURS` or the defaults."""
+        return getattr(settings, 'TICKET_SLA_HOURS', cls.DEFAULT_SLA_HOURS)
+
+    @classmethod
+    def sla_due(cls, priority, start):
+        """Returns when a ticket of `priority` raised at `start` must be finished by."""
+        hours = cls.sla_hours()[priority]
+        return start + datetime.timedelta(hours=hours)
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the ticket, stamping `closed_at` when it is closed and clearing it when
+        it is reopened, and deriving `sla_due_at` from its age and priority.
+
+        The save runs in a transaction so the fleet counter signals can lock the
+        stored row while they compare it with the new values.
+        """
+        if self.status == 'closed' and self.closed_at is None:
+            self.closed_at = timezone.now()
+        elif self.status != 'closed':
+            self.closed_at = None
+        self.sla_due_at = self.sla_due(self.priority, self.created_at or timezone.now())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            update_fields = {*update_fields, 'closed_at'}
+        if update_fields is not None and 'priority' in update_fields:
+            update_fields = {*update_fields, 'sla_due_at'}
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -63,4 +332,187 @@ class MaintenanceTicket(models.Model):
             return f"Ticket for {self.machine.name}: {self.issue_description[:20]}... (Status: {self.status})"
         else:
             return f"Ticket for {self.machine.name}: No description provided (Status: {self.status})"
-        
\ No newline at end of file
+        
+
+class TicketEvent(models.Model):
+    """
+    Model recording one status change of a maintenance ticket.
+
+    The table is append-only: rows are written by `machines.transitions` in the
+    same transaction as the change they describe and never updated. Ticket,
+    machine and actor are soft references, so history survives their deletion.
+
+    Attributes:
+        ticket (ForeignKey): The ticket that changed.
+        machine (ForeignKey): The ticket's machine at the time.
+        from_status (CharField): The status before the change, null when the ticket was created.
+        to_status (CharField): The status after the change.
+        actor (ForeignKey): The user who made the change, optional.
+        created_at (DateTimeField): When the change happened, auto-set on creation.
+    """
+
+    ticket = models.ForeignKey(MaintenanceTicket, on_delete=models.DO_NOTHING, db_constraint=False,
+                               related_name='events')
+    machine = models.ForeignKey(Machine, on_delete=models.DO_NOTHING, db_constraint=False,
+                                related_name='ticket_events')
+    from_status = models.CharField(max_length=50, null=True, blank=True)
+    to_status = models.CharField(max_length=50)
+    actor = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False,
+                              null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options; events are read per ticket and as a stream by time."""
+        indexes = [
+            models.Index(fields=['ticket', 'created_at'], name='ticketevent_ticket_idx'),
+            models.Index(fields=['created_at', 'id'], name='ticketevent_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Inserts the event; events can't be changed once written.
+
+        Raises:
+            ValueError: If the event already exists.
+        """
+        if not self._state.adding:
+            raise ValueError('Ticket events are append-only')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        """
+        Returns a string representation of the event.
+
+        Returns:
+            str: The ticket id and the status change.
+        """
+        return f"Ticket {self.ticket_id}: {self.from_status} -> {self.to_status}"
+
+
+class FleetCounter(models.Model):
+    """
+    Model holding one precomputed count for the fleet summary.
+
+    Rows are adjusted by `machines.counters` whenever a machine or ticket is saved
+    or deleted, so the summary never has to scan the machine or ticket tables.
+    `python manage.py recount_fleet` rebuilds them from scratch.
+
+    Attributes:
+        kind (CharField): What is counted: machines per 'status', machines per
+            'location', or 'open_tickets' per machine.
+        key (CharField): The status, the location or the machine id.
+        count (IntegerField): The current count.
+    """
+
+    KIND_STATUS = 'status'
+    KIND_LOCATION = 'location'
+    KIND_OPEN_TICKETS = 'open_tickets'
+
+    kind = models.CharField(max_length=20)
+    key = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        """Meta options; there is one row per kind and key."""
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'key'], name='fleetcounter_unique_kind_key'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the counter.
+
+        Returns:
+            str: The kind, key and count.
+        """
+        return f"{self.kind}:{self.key} = {self.count}"
+
+
+class MachineReliability(models.Model):
+    """
+    Model holding precomputed reliability figures for one machine.
+
+    Each maintenance ticket counts as a failure. Rows are written by
+    `machines.reliability.refresh()`; the sums are kept alongside the means so
+    per-model figures can be aggregated from these rows without reading tickets.
+
+    Attributes:
+        machine (OneToOneField): The machine the figures describe.
+        model_number (CharField): The machine's model number when last refreshed.
+        failures (IntegerField): Number of tickets ever raised.
+        interval_count (IntegerField): Number of gaps between consecutive failures.
+        interval_hours_total (FloatField): Sum of those gaps in hours.
+        repairs (IntegerField): Number of closed tickets.
+        repair_hours_total (FloatField): Sum of their open-to-closed times in hours.
+        mtbf_hours (FloatField): Mean time between failures, null with fewer than two.
+        mttr_hours (FloatField): Mean time to repair, null with no closed tickets.
+        recent_failures (IntegerField): Failures in the last trend window.
+        previous_failures (IntegerField): Failures in the window before it.
+        last_failure_at (DateTimeField): When the latest ticket was raised.
+        computed_at (DateTimeField): When the row was last refreshed.
+    """
+
+    machine = models.OneToOneField(Machine, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='reliability')
+    model_number = models.CharField(max_length=100)
+    failures = models.IntegerField(default=0)
+    interval_count = models.IntegerField(default=0)
+    interval_hours_total = models.FloatField(default=0)
+    repairs = models.IntegerField(default=0)
+    repair_hours_total = models.FloatField(default=0)
+    mtbf_hours = models.FloatField(null=True, blank=True)
+    mttr_hours = models.FloatField(null=True, blank=True)
+    recent_failures = models.IntegerField(default=0)
+    previous_failures = models.IntegerField(default=0)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        """Meta options; rows are listed most failing first and grouped by model number."""
+        indexes = [
+            models.Index(fields=['-failures', 'machine'], name='reliability_failures_idx'),
+            models.Index(fields=['model_number'], name='reliability_model_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the figures.
+
+        Returns:
+            str: The machine id with its failure count.
+        """
+        return f"Reliability of machine {self.machine_id}: {self.failures} failures"
+
+
+class ModelReliability(models.Model):
+    """
+    Model holding reliability figures aggregated over all machines of a model number.
+
+    Attributes:
+        model_number (CharField): The model number.
+        machines (IntegerField): Number of machines with figures.
+        failures (IntegerField): Tickets raised across those machines.
+        mtbf_hours (FloatField): Mean time between failures over all their gaps.
+        mttr_hours (FloatField): Mean time to repair over all their closed tickets.
+        recent_failures (IntegerField): Failures in the last trend window.
+        previous_failures (IntegerField): Failures in the window before it.
+        computed_at (DateTimeField): When the row was last refreshed.
+    """
+
+    model_number = models.CharField(max_length=100, unique=True)
+    machines = models.IntegerField(default=0)
+    failures = models.IntegerField(default=0)
+    mtbf_hours = models.FloatField(null=True, blank=True)
+    mttr_hours = models.FloatField(null=True, blank=True)
+    recent_failures = models.IntegerField(default=0)
+    previous_failures = models.IntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        """
+        Returns a string representation of the figures.
+
+        Returns:
+            str: The model number with its failure count.
+        """
+        return f"Reliability of model {self.model_number}: {self.failures} failures"
@@ -0,0 +1,211 @@
+# pylint: disable=no-member
+"""
+Reliability analytics: MTBF, MTTR and failure-rate trends.
+
+Every maintenance ticket counts as a failure of its machine. For a batch of
+machines the tickets are pulled with one `values_list()` query, sorted by machine
+and creation time, and turned into NumPy arrays; every figure is then a
+vectorized group-by (`np.bincount` over the machine index) instead of a Python
+loop per ticket:
+
+* MTBF is the mean gap between consecutive tickets of a machine.
+* MTTR is the mean time from creation to `closed_at` over closed tickets.
+* The trend compares failures in the last `RELIABILITY_TREND_DAYS` days with the
+  same span before it.
+
+Results land in `MachineReliability`, and `ModelReliability` is aggregated from
+those rows in the database, so pages read precomputed figures only. `refresh()`
+recomputes just the machines whose tickets changed since the last run.
+"""
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import Machine, MachineReliability, MaintenanceTicket, ModelReliability
+
+BATCH_SIZE = 2000
+
+# Tickets saved while a refresh runs are picked up by the next one: it re-reads
+# everything updated since the previous run started, minus this margin for clock
+# skew between app servers.
+REFRESH_OVERLAP = datetime.timedelta(seconds=5)
+
+MACHINE_FIELDS = ['model_number', 'failures', 'interval_count', 'interval_hours_total', 'repairs',
+                  'repair_hours_total', 'mtbf_hours', 'mttr_hours', 'recent_failures',
+                  'previous_failures', 'last_failure_at', 'computed_at']
+MODEL_FIELDS = ['machines', 'failures', 'mtbf_hours', 'mttr_hours', 'recent_failures',
+                'previous_failures', 'computed_at']
+
+
+def _timestamps(values):
+    return np.fromiter((np.nan if value is None else value.timestamp() for value in values),
+                       dtype=np.float64, count=len(values))
+
+
+def _mean(total, count):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def compute(machine_ids, now):
+    """
+    Computes the reliability figures of `machine_ids` from their tickets.
+
+    Args:
+        machine_ids (list): The machines to compute.
+        now (datetime): The reference time for the trend windows.
+
+    Returns:
+        list: Unsaved `MachineReliability` rows for the machines that have tickets.
+    """
+    rows = list(MaintenanceTicket.objects.filter(machine_id__in=machine_ids)
+                .order_by('machine_id', 'created_at', 'id')
+                .values_list('machine_id', 'created_at', 'closed_at'))
+    if not rows:
+        return []
+
+    machines, created, closed = zip(*rows)
+    machines = np.fromiter(machines, dtype=np.int64, count=len(rows))
+    created = _timestamps(created)
+    closed = _timestamps(closed)
+
+    ids, group = np.unique(machines, return_inverse=True)
+    size = len(ids)
+    failures = np.bincount(group, minlength=size)
+
+    same = group[1:] == group[:-1]
+    gaps = np.diff(created)[same] / 3600
+    interval_count = np.bincount(group[1:][same], minlength=size)
+    interval_total = np.bincount(group[1:][same], weights=gaps, minlength=size)
+
+    repaired = ~np.isnan(closed)
+    repairs = np.bincount(group[repaired], minlength=size)
+    repair_total = np.bincount(group[repaired], weights=(closed - created)[repaired] / 3600,
+                               minlength=size)
+
+    window = getattr(settings, 'RELIABILITY_TREND_DAYS', 90) * 86400
+    reference = now.timestamp()
+    recent = np.bincount(group[created >= reference - window], minlength=size)
+    earlier = (created >= reference - 2 * window) & (created < reference - window)
+    previous = np.bincount(group[earlier], minlength=size)
+
+    # Tickets are sorted by time within each machine, so a machine's last row
+    # holds its latest failure.
+    last = created[np.flatnonzero(np.append(group[1:] != group[:-1], True))]
+
+    mtbf = _mean(interval_total, interval_count)
+    mttr = _mean(repair_total, repairs)
+    model_numbers = dict(Machine.objects.filter(id__in=ids.tolist())
+                         .values_list('id', 'model_number'))
+    return [
+        MachineReliability(
+            machine_id=int(machine_id),
+            model_number=model_numbers.get(int(machine_id), ''),
+            failures=int(failures[i]),
+            interval_count=int(interval_count[i]),
+            interval_hours_total=float(interval_total[i]),
+            repairs=int(repairs[i]),
+            repair_hours_total=float(repair_total[i]),
+            mtbf_hours=_optional(mtbf[i]),
+            mttr_hours=_optional(mttr[i]),
+            recent_failures=int(recent[i]),
+            previous_failures=int(previous[i]),
+            last_failure_at=datetime.datetime.fromtimestamp(last[i], tz=datetime.timezone.utc),
+            computed_at=now,
+        )
+        for i, machine_id in enumerate(ids)
+    ]
+
+
+def refresh_models(model_numbers, now):
+    """
+    Re-aggregates `ModelReliability` for `model_numbers` from the machine rows.
+    """
+    model_numbers = set(model_numbers)
+    totals = (MachineReliability.objects.filter(model_number__in=model_numbers)
+              .values('model_number')
+              .annotate(machines=Count('machine'), failures=Sum('failures'),
+                        interval_count=Sum('interval_count'),
+                        interval_hours=Sum('interval_hours_total'),
+                        repairs=Sum('repairs'), repair_hours=Sum('repair_hours_total'),
+                        recent=Sum('recent_failures'), previous=Sum('previous_failures'))
+              .order_by())
+    rows = [
+        ModelReliability(
+            model_number=total['model_number'],
+            machines=total['machines'],
+            failures=total['failures'],
+            mtbf_hours=(total['interval_hours'] / total['interval_count']
+                        if total['interval_count'] else None),
+            mttr_hours=total['repair_hours'] / total['repairs'] if total['repairs'] else None,
+            recent_failures=total['recent'],
+            previous_failures=total['previous'],
+            computed_at=now,
+        )
+        for total in totals
+    ]
+    ModelReliability.objects.bulk_create(rows, update_conflicts=True,
+                                         unique_fields=['model_number'], update_fields=MODEL_FIELDS)
+    gone = model_numbers - {row.model_number for row in rows}
+    ModelReliability.objects.filter(model_number__in=gone).delete()
+
+
+def refresh_machines(machine_ids, now):
+    """
+    Recomputes the figures of `machine_ids` and of their model numbers.
+
+    Returns:
+        int: The number of machine rows written.
+    """
+    with transaction.atomic():
+        stats = compute(machine_ids, now)
+        previous_models = set(MachineReliability.objects.filter(machine_id__in=machine_ids)
+                              .values_list('model_number', flat=True))
+        MachineReliability.objects.bulk_create(stats, update_conflicts=True,
+                                               unique_fields=['machine'],
+                                               update_fields=MACHINE_FIELDS)
+        computed = {row.machine_id for row in stats}
+        MachineReliability.objects.filter(machine_id__in=set(machine_ids) - computed).delete()
+        refresh_models(previous_models | {row.model_number for row in stats}, now)
+    return len(stats)
+
+
+def changed_machines(since):
+    """Returns the ids of machines whose tickets were created or updated since `since`."""
+    return list(MaintenanceTicket.objects.filter(updated_at__gte=since)
+                .order_by().values_list('machine_id', flat=True).distinct())
+
+
+def refresh(full=False):
+    """
+    Brings the reliability tables up to date.
+
+    Only machines with tickets saved since the previous run are recomputed, unless
+    `full` is set or nothing was computed yet. A full refresh also rolls the trend
+    windows forward for machines without new tickets.
+
+    Args:
+        full (bool): Recompute every machine.
+
+    Returns:
+        int: The number of machine rows written.
+    """
+    now = timezone.now()
+    since = MachineReliability.objects.aggregate(Max('computed_at'))['computed_at__max']
+    if full or since is None:
+        machine_ids = list(Machine.objects.order_by('id').values_list('id', flat=True))
+    else:
+        machine_ids = sorted(changed_machines(since - REFRESH_OVERLAP))
+
+    written = 0
+    for start in range(0, len(machine_ids), BATCH_SIZE):
+        written += refresh_machines(machine_ids[start:start + BATCH_SIZE], now)
+    return written
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Machine, MaintenanceTicket
+from .models import (
+    Location, Machine, MachineReliability, MaintenanceInterval, MaintenanceTicket, ModelReliability,
+    TicketEvent,
+)
 
 class MachineSerializer(serializers.ModelSerializer):
     """
@@ -8,8 +11,23 @@ class MachineSerializer(serializers.ModelSerializer):
 
     This serializer is used to convert Machine model instances to JSON format
     and vice versa, allowing CRUD operations on Machine objects via the API.
+
+    The ticket statistics are only included when the `ticket_stats` context flag is
+    set, in which case the machines must come from `Machine.objects.with_ticket_stats()`.
     """
 
+    TICKET_STATS_FIELDS = ('open_ticket_count', 'last_ticket_at', 'last_reporter')
+
+    open_ticket_count = serializers.IntegerField(read_only=True)
+    last_ticket_at = serializers.DateTimeField(read_only=True)
+    last_reporter = serializers.CharField(read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('ticket_stats'):
+            for field in self.TICKET_STATS_FIELDS:
+                self.fields.pop(field)
+
     class Meta:
         """
         Meta options for MachineSerializer.
@@ -21,6 +39,22 @@ class MachineSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MaintenanceIntervalSerializer(serializers.ModelSerializer):
+    """
+    Serializer for per-model maintenance intervals.
+    """
+
+    class Meta:
+        """
+        Meta options for MaintenanceIntervalSerializer.
+
+        Includes the model number and its interval, which must be at least one day.
+        """
+        model = MaintenanceInterval
+        fields = ['id', 'model_number', 'interval_days']
+        extra_kwargs = {'interval_days': {'min_value': 1}}
+
+
 class MaintenanceTicketSerializer(serializers.ModelSerializer):
     """
     Serializer for the MaintenanceTicket model, handling serialization and deserialization
@@ -35,7 +69,92 @@ class MaintenanceTicketSerializer(serializers.ModelSerializer):
         Meta options for MaintenanceTicketSerializer.
 
         Specifies that all fields from the MaintenanceTicket model should be included
-        in the serialized representation.
+        in the serialized representation. `closed_at` is set by the model on save and
+        `duplicate_of` by the merge action.
         """
         model = MaintenanceTicket
         fields = '__all__'
+        read_only_fields = ['closed_at', 'duplicate_of']
+
+
+class MachineReliabilitySerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for the precomputed reliability figures of a machine.
+    """
+
+    class Meta:
+        """
+        Meta options for MachineReliabilitySerializer.
+
+        Exposes the means and trend counts; the running sums stay internal.
+        """
+        model = MachineReliability
+        fields = ['machine', 'model_number', 'failures', 'mtbf_hours', 'mttr_hours',
+                  'recent_failures', 'previous_failures', 'last_failure_at', 'computed_at']
+        read_only_fields = fields
+
+
+class ModelReliabilitySerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for the reliability figures of a model number.
+    """
+
+    class Meta:
+        """
+        Meta options for ModelReliabilitySerializer.
+
+        Includes every field of the ModelReliability model.
+        """
+        model = ModelReliability
+        fields = ['model_number', 'machines', 'failures', 'mtbf_hours', 'mttr_hours',
+                  'recent_failures', 'previous_failures', 'computed_at']
+        read_only_fields = fields
+
+
+
+class TicketEventSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for ticket status events.
+    """
+
+    class Meta:
+        """
+        Meta options for TicketEventSerializer.
+
+        Includes every TicketEvent field; all of them are read-only.
+        """
+        model = TicketEvent
+        fields = ['id', 'ticket', 'machine', 'from_status', 'to_status', 'actor', 'created_at']
+        read_only_fields = fields
+
+
+class LocationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for places in the location hierarchy.
+
+    The parent can only be set when a place is created; existing places change
+    parent through the move action, which also rewrites their subtree.
+    """
+
+    parent = serializers.PrimaryKeyRelatedField(queryset=Location.objects.all(), allow_null=True,
+                                                default=None)
+    kind = serializers.CharField(read_only=True)
+
+    class Meta:
+        """
+        Meta options for LocationSerializer.
+
+        `path` and `depth` are maintained by the model and read-only.
+        """
+        model = Location
+        fields = ['id', 'name', 'parent', 'kind', 'depth', 'path']
+        read_only_fields = ['depth', 'path']
+
+    def validate_parent(self, value):
+        """Rejects parent changes on update and places below cell level."""
+        if self.instance is not None and value != self.instance.parent:
+            raise serializers.ValidationError(
+                'Use the move action to change the parent of a place.')
+        if value is not None and value.depth + 1 >= len(Location.KINDS):
+            raise serializers.ValidationError('Cells cannot contain other places.')
+        return value
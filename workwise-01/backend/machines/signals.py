@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from . import counters
+from .models import Machine, MaintenanceTicket
+
+MACHINE_FIELDS = ('status', 'location')
+TICKET_FIELDS = ('machine_id', 'status')
+
+
+def stored_state(sender, instance, fields):
+    """
+    Returns the values of `fields` currently stored for `instance`, or None for a
+    row that doesn't exist yet.
+
+    Read from the database rather than from the instance, which may have been
+    loaded long before it is saved. The row stays locked until the save commits
+    (`Machine.save` and `MaintenanceTicket.save` open the transaction), so
+    concurrent saves of the same row take turns instead of both applying their
+    change to the same before-state.
+    """
+    if instance._state.adding:
+        return None
+    return sender.objects.select_for_update().filter(pk=instance.pk).values_list(*fields).first()
+
+
+def saved_state(instance, fields, before, update_fields):
+    """
+    Returns the values of `fields` as stored after a save.
+
+    Fields left out of `update_fields` weren't written, so they keep their stored
+    value even if the instance holds a different (possibly stale) one.
+    """
+    after = tuple(getattr(instance, field) for field in fields)
+    if before is None or update_fields is None:
+        return after
+    written = set(update_fields)
+    return tuple(
+        value if field in written or field.removesuffix('_id') in written else stored
+        for field, value, stored in zip(fields, after, before)
+    )
+
+
+def machine_pre_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    instance._fleet_before = stored_state(sender, instance, MACHINE_FIELDS)
+
+
+def machine_post_save(sender, instance, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    """Moves the machine between status and location counts."""
+    before = getattr(instance, '_fleet_before', None)
+    after = saved_state(instance, MACHINE_FIELDS, before, update_fields)
+    if before != after:
+        counters.machine_changed(before, after)
+
+
+def machine_post_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Removes the machine from the counts; its tickets were deleted just before."""
+    counters.machine_changed(counters.machine_state(instance), None)
+    counters.machine_deleted(instance.pk)
+
+
+def ticket_pre_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    instance._fleet_before = stored_state(sender, instance, TICKET_FIELDS)
+
+
+def ticket_post_save(sender, instance, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    """Updates the open-ticket count of the ticket's machine."""
+    before = getattr(instance, '_fleet_before', None)
+    after = saved_state(instance, TICKET_FIELDS, before, update_fields)
+    if before != after:
+        counters.ticket_changed(before, after)
+
+
+def ticket_post_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Removes the ticket from its machine's open-ticket count."""
+    counters.ticket_changed(counters.ticket_state(instance), None)
+
+
+pre_save.connect(machine_pre_save, sender=Machine, dispatch_uid='fleet_machine_pre_save')
+post_save.connect(machine_post_save, sender=Machine, dispatch_uid='fleet_machine_post_save')
+post_delete.connect(machine_post_delete, sender=Machine, dispatch_uid='fleet_machine_post_delete')
+pre_save.connect(ticket_pre_save, sender=MaintenanceTicket, dispatch_uid='fleet_ticket_pre_save')
+post_save.connect(ticket_post_save, sender=MaintenanceTicket, dispatch_uid='fleet_ticket_post_save')
+post_delete.connect(ticket_post_delete, sender=MaintenanceTicket,
+                    dispatch_uid='fleet_ticket_post_delete')
@@ -0,0 +1,68 @@
+# pylint: disable=no-member
+"""
+Service-level tracking for maintenance tickets.
+
+Every ticket carries `sla_due_at`, its creation time plus the allowance of its
+priority, so "most urgent first" and "overdue" are both questions about one column.
+Both are answered from `ticket_sla_queue_idx`, a partial index over unfinished
+tickets only: the queue is a keyset walk along it and the breach check a range
+scan from its start up to now, never touching closed tickets.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from notifications import counters as notification_counters
+from notifications.models import Notification
+from .models import MaintenanceTicket
+
+BATCH_SIZE = 1000
+
+
+def queue():
+    """Returns the unfinished tickets, matching the predicate of `ticket_sla_queue_idx`."""
+    return MaintenanceTicket.objects.filter(status__in=MaintenanceTicket.OPEN_STATUSES)
+
+
+def overdue(now):
+    """Returns the unfinished tickets past their SLA at `now` that weren't reported yet."""
+    return queue().filter(sla_due_at__lt=now, sla_breached_at__isnull=True)
+
+
+def record_breaches(now=None):
+    """
+    Stamps `sla_breached_at` on overdue tickets and notifies whoever owns them.
+
+    The ticket's assignee is notified, or its reporter when nobody is assigned.
+    Tickets are handled in batches, oldest deadline first; on PostgreSQL a batch
+    skips tickets another run has locked, so overlapping runs never notify twice.
+
+    Args:
+        now (datetime): The reference time, defaults to now.
+
+    Returns:
+        int: The number of tickets newly found in breach.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(overdue(now).order_by('sla_due_at', 'id')
+                        .select_for_update(skip_locked=True, of=('self',))
+                        .values_list('id', 'machine__name', 'status', 'sla_due_at',
+                                     'assigned_to_id', 'reported_by_id')[:BATCH_SIZE])
+            if not rows:
+                return total
+            MaintenanceTicket.objects.filter(id__in=[row[0] for row in rows]).update(
+                sla_breached_at=now, updated_at=now)
+            notification_counters.lock(assignee or reporter for *_, assignee, reporter in rows
+                                       if assignee or reporter)
+            notifications = Notification.objects.bulk_create([
+                Notification(user_id=assignee or reporter,
+                             title=f'SLA breached: ticket #{ticket_id}',
+                             message=f'Ticket #{ticket_id} on {machine} was due '
+                                     f'{due:%Y-%m-%d %H:%M} UTC and is still {status}.')
+                for ticket_id, machine, status, due, assignee, reporter in rows
+                if assignee or reporter
+            ])
+            notification_counters.created(notifications)
+        total += len(rows)
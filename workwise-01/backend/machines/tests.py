@@ -4,8 +4,16 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from .models import Machine, MaintenanceTicket
-from datetime import timedelta, date
+from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+from io import StringIO
+from unittest import mock
+from notifications.models import Notification
+from . import duplicates
+from .duplicates import find_duplicates
+from .models import FleetCounter, Location, Machine, MaintenanceTicket, TicketEvent
+from datetime import datetime, timedelta, date, timezone as dt_timezone
+import json
 
 class MachineAPITestCase(APITestCase):
     """
@@ -72,7 +80,27 @@ class MachineAPITestCase(APITestCase):
         url = reverse('machine-maintenance-due')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(response.data) > 0)
+        self.assertTrue(len(response.data['results']) > 0)
+
+    def test_maintenance_intervals_and_recording(self):
+        """Test that per-model intervals and recorded maintenance move the due date."""
+        self.authenticate()
+        url = reverse('machine-maintenance-due')
+        response = self.client.post(reverse('maintenanceinterval-list'),
+                                    {'model_number': 'M123', 'interval_days': 60}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.machine.refresh_from_db()
+        self.assertEqual(self.machine.next_maintenance_due,
+                         self.machine.last_maintenance_date + timedelta(days=60))
+        self.assertEqual(self.client.get(url).data['results'], [])
+        self.assertEqual(len(self.client.get(url, {'within_days': 30}).data['results']), 1)
+
+        response = self.client.post(reverse('machine-record-maintenance',
+                                            kwargs={'pk': self.machine.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['next_maintenance_due'],
+                         str(date.today() + timedelta(days=60)))
+        self.assertEqual(self.client.get(url, {'within_days': 30}).data['results'], [])
 
     def test_update_location(self):
         """Test updating the location of a machine."""
@@ -84,12 +112,143 @@ class MachineAPITestCase(APITestCase):
         self.machine.refresh_from_db()
         self.assertEqual(self.machine.location, new_location)
 
+    def test_export_machines_csv(self):
+        """Test streaming all machines as CSV."""
+        self.authenticate()
+        url = reverse('machine-export', kwargs={'export_format': 'csv'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn('Machine 1', rows[1])
+
+    def test_fleet_summary_follows_saves_and_deletes(self):
+        """Test that the fleet summary tracks machine and ticket changes, including actions."""
+        self.authenticate()
+        url = reverse('machine-fleet-summary')
+        response = self.client.get(url)
+        self.assertEqual(response.data['status'], {'operational': 1})
+
+        ticket = MaintenanceTicket.objects.create(machine=self.machine, issue_description='Leak',
+                                                  reported_by=self.user, status='open')
+        self.client.post(reverse('machine-schedule-maintenance', kwargs={'pk': self.machine.pk}))
+        self.client.patch(reverse('machine-update-location', kwargs={'pk': self.machine.pk}),
+                          {'location': 'Warehouse 2'}, format='json')
+        response = self.client.get(url)
+        self.assertEqual(response.data['machines'], 1)
+        self.assertEqual(response.data['status'], {'maintenance': 1})
+        self.assertEqual(response.data['location'], {'Warehouse 2': 1})
+        self.assertEqual(response.data['open_tickets'], {self.machine.pk: 1})
+
+        self.client.post(reverse('machine-resolve-issue', kwargs={'pk': self.machine.pk}),
+                         {'ticket_id': ticket.pk}, format='json')
+        self.assertEqual(self.client.get(url).data['open_tickets'], {})
+
+        FleetCounter.objects.all().delete()
+        call_command('recount_fleet', stdout=StringIO())
+        self.assertEqual(self.client.get(url).data['status'], {'maintenance': 1})
+
+        self.client.delete(reverse('machine-detail', kwargs={'pk': self.machine.pk}))
+        self.assertEqual(self.client.get(url).data['machines'], 0)
+        self.assertFalse(FleetCounter.objects.exclude(count=0).exists())
+
+    def test_reliability_figures(self):
+        """Test that MTBF/MTTR are computed from ticket history and refreshed incrementally."""
+        self.authenticate()
+        base = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        for hours, repair in ((0, 4), (10, 2), (30, None)):
+            ticket = MaintenanceTicket.objects.create(machine=self.machine, issue_description='Jam',
+                                                      reported_by=self.user, status='open')
+            MaintenanceTicket.objects.filter(pk=ticket.pk).update(
+                created_at=base + timedelta(hours=hours),
+                closed_at=None if repair is None else base + timedelta(hours=hours + repair),
+                status='open' if repair is None else 'closed',
+            )
+        call_command('refresh_reliability', stdout=StringIO())
+
+        response = self.client.get(reverse('machine-reliability', kwargs={'pk': self.machine.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['failures'], 3)
+        self.assertAlmostEqual(response.data['mtbf_hours'], 15.0)
+        self.assertAlmostEqual(response.data['mttr_hours'], 3.0)
+        response = self.client.get(reverse('machine-model-reliability'))
+        self.assertEqual([(row['model_number'], row['failures']) for row in response.data],
+                         [('M123', 3)])
+
+        MaintenanceTicket.objects.create(machine=self.machine, issue_description='Jam again',
+                                         reported_by=self.user, status='open')
+        call_command('refresh_reliability', stdout=StringIO())
+        response = self.client.get(reverse('machine-reliability-ranking'))
+        self.assertEqual([row['failures'] for row in response.data['results']], [4])
+
+    def test_location_hierarchy_import_summary_and_move(self):
+        """Test importing location strings, subtree queries and moving a subtree."""
+        self.authenticate()
+        Machine.objects.create(name='Press', model_number='P1',
+                               location='Plant 2 / Hall B / Line 1', status='maintenance')
+        Machine.objects.create(name='Lathe', model_number='L1', location='Plant 2 / Hall A',
+                               status='operational')
+        Machine.objects.create(name='Drill', model_number='D1', location='a/b/c/d/e',
+                               status='operational')
+        out = StringIO()
+        call_command('import_locations', stdout=out)
+        self.assertIn('Linked 3 machines', out.getvalue())
+        self.assertIn("'a/b/c/d/e'", out.getvalue())
+
+        plant = Location.objects.get(name='Plant 2')
+        hall_b = Location.objects.get(name='Hall B')
+        self.assertEqual((hall_b.kind, Location.objects.get(name='Line 1').kind),
+                         ('building', 'line'))
+        response = self.client.get(reverse('location-summary', kwargs={'pk': plant.pk}))
+        self.assertEqual(response.data['machines'], 2)
+        self.assertEqual(response.data['status'], {'maintenance': 1, 'operational': 1})
+        self.assertEqual([(c['name'], c['machines']) for c in response.data['children']],
+                         [('Hall A', 1), ('Hall B', 1)])
+        response = self.client.get(reverse('location-machines', kwargs={'pk': plant.pk}))
+        self.assertEqual(sorted(m['name'] for m in response.data['results']), ['Lathe', 'Press'])
+
+        response = self.client.post(reverse('location-list'), {'name': 'Plant 3'}, format='json')
+        plant_3 = Location.objects.get(pk=response.data['id'])
+        move_url = reverse('location-move', kwargs={'pk': hall_b.pk})
+        response = self.client.post(move_url, {'parent': plant_3.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Location.objects.get(name='Line 1').path, f'{plant_3.pk}/{hall_b.pk}/'
+                         f'{Location.objects.get(name="Line 1").pk}/')
+        response = self.client.get(reverse('location-summary', kwargs={'pk': plant.pk}))
+        self.assertEqual(response.data['machines'], 1)
+
+        line = Location.objects.get(name='Line 1')
+        response = self.client.post(move_url, {'parent': line.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.delete(reverse('location-detail', kwargs={'pk': plant_3.pk}))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
     def test_machine_list_authenticated(self):
         """Test retrieving the list of machines with authentication."""
         self.authenticate()
         response = self.client.get(reverse('machine-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_machine_list_with_ticket_stats(self):
+        """Test that ticket statistics are annotated onto the machine list in one query."""
+        self.authenticate()
+        other = Machine.objects.create(name='Machine 2', model_number='M124',
+                                       location='Warehouse 1', status='operational')
+        for ticket_status in ('open', 'in_progress', 'closed'):
+            latest = MaintenanceTicket.objects.create(machine=self.machine,
+                                                      issue_description='Noise',
+                                                      reported_by=self.user, status=ticket_status)
+        with self.assertNumQueries(2):  # the authenticated user and the machine page
+            response = self.client.get(reverse('machine-list'), {'ticket_stats': '1'})
+        stats = {m['id']: (m['open_ticket_count'], m['last_ticket_at'], m['last_reporter'])
+                 for m in response.data}
+        self.assertEqual(stats[other.id], (0, None, None))
+        self.assertEqual(stats[self.machine.id][0], 2)
+        self.assertEqual(stats[self.machine.id][2], 'testuser')
+        self.assertEqual(parse_datetime(stats[self.machine.id][1]), latest.created_at)
+        self.assertNotIn('open_ticket_count', self.client.get(reverse('machine-list')).data[0])
+
     def test_machine_list_unauthenticated(self):
         """Test retrieving the list of machines without authentication."""
         response = self.client.get(reverse('machine-list'))
@@ -181,6 +340,15 @@ class MaintenanceTicketAPITestCase(APITestCase):
         response = self.client.get(reverse('maintenanceticket-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_export_tickets_ndjson(self):
+        """Test streaming all maintenance tickets as NDJSON."""
+        self.authenticate()
+        url = reverse('maintenanceticket-export', kwargs={'export_format': 'ndjson'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['machine'], self.machine.id)
+
     def test_ticket_list_unauthenticated(self):
         """Test retrieving the list of maintenance tickets without authentication."""
         response = self.client.get(reverse('maintenanceticket-list'))
@@ -222,6 +390,173 @@ class MaintenanceTicketAPITestCase(APITestCase):
         response = self.client.put(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_update_ticket_is_all_or_nothing(self):
+        """Test that a failure saving the other fields also undoes the status change."""
+        self.authenticate()
+        data = {'machine': self.machine.id, 'issue_description': 'Updated issue description',
+                'reported_by': self.user.id, 'status': 'in_progress'}
+        url = reverse('maintenanceticket-detail', kwargs={'pk': self.ticket.pk})
+        with mock.patch.object(MaintenanceTicket, 'save', side_effect=RuntimeError('Write failed')):
+            with self.assertRaises(RuntimeError):
+                self.client.put(url, data)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'open')
+        self.assertFalse(TicketEvent.objects.filter(ticket=self.ticket,
+                                                    to_status='in_progress').exists())
+
+    def test_transition_records_events_and_rejects_conflicts(self):
+        """Test status transitions, their event log and conflicting changes."""
+        self.authenticate()
+        url = reverse('maintenanceticket-change-status', kwargs={'pk': self.ticket.pk})
+        response = self.client.post(url, {'status': 'in_progress', 'expected': 'open'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'in_progress')
+
+        # A second technician still looking at the open ticket loses the race.
+        response = self.client.post(url, {'status': 'closed', 'expected': 'open'})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['status'], 'in_progress')
+
+        response = self.client.post(url, {'status': 'closed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.ticket.refresh_from_db()
+        self.assertIsNotNone(self.ticket.closed_at)
+
+        response = self.client.post(url, {'status': 'open'})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.get(reverse('maintenanceticket-events',
+                                           kwargs={'pk': self.ticket.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(event['from_status'], event['to_status']) for event in response.data],
+                         [('open', 'in_progress'), ('in_progress', 'closed')])
+        self.assertEqual(response.data[0]['actor'], self.user.id)
+        self.assertEqual(FleetCounter.objects.get(kind=FleetCounter.KIND_OPEN_TICKETS,
+                                                  key=str(self.machine.id)).count, 0)
+
+    def test_created_ticket_starts_its_event_log(self):
+        """Test that tickets created through the API get an initial event."""
+        self.authenticate()
+        data = {
+            'machine': self.machine.id,
+            'issue_description': 'New issue with machine',
+            'reported_by': self.user.id,
+            'status': 'open',
+        }
+        response = self.client.post(reverse('maintenanceticket-list'), data)
+        event = TicketEvent.objects.get(ticket_id=response.data['id'])
+        self.assertEqual((event.from_status, event.to_status), (None, 'open'))
+
+    def test_create_flags_and_merges_duplicates(self):
+        """Test that near-identical tickets are flagged on creation and can be merged."""
+        self.authenticate()
+        other = Machine.objects.create(name='Machine 2', model_number='M124',
+                                       location='Warehouse 1', status='operational')
+        data = {'machine': self.machine.id, 'issue_description': 'Issue with the machine!',
+                'reported_by': self.user.id, 'status': 'open'}
+        response = self.client.post(reverse('maintenanceticket-list'), data)
+        self.assertEqual([match['ticket'] for match in response.data['possible_duplicates']],
+                         [self.ticket.id])
+        duplicate_id = response.data['id']
+
+        data['machine'] = other.id
+        response = self.client.post(reverse('maintenanceticket-list'), data)
+        self.assertEqual(response.data['possible_duplicates'], [])
+        data.update(machine=self.machine.id,
+                    issue_description='Hydraulic pressure drops under load')
+        response = self.client.post(reverse('maintenanceticket-list'), data)
+        self.assertEqual(response.data['possible_duplicates'], [])
+
+        url = reverse('maintenanceticket-merge', kwargs={'pk': self.ticket.pk})
+        response = self.client.post(url, {'duplicates': [duplicate_id, response.data['id'] + 1]},
+                                    format='json')
+        self.assertEqual(response.data, {'merged': [duplicate_id], 'skipped': 1})
+        duplicate = MaintenanceTicket.objects.get(pk=duplicate_id)
+        self.assertEqual((duplicate.status, duplicate.duplicate_of_id), ('closed', self.ticket.id))
+
+    def test_duplicate_index_evicts_deleted_tickets(self):
+        """Test that tickets deleted behind the index's back are dropped from it on lookup."""
+        matches = find_duplicates(self.machine.id, self.ticket.issue_description)
+        self.assertEqual([m['ticket'] for m in matches], [self.ticket.id])
+        MaintenanceTicket.objects.filter(pk=self.ticket.pk).delete()
+        self.assertEqual(find_duplicates(self.machine.id, self.ticket.issue_description), [])
+        self.assertNotIn(self.ticket.id, duplicates._index.keys_of)  # pylint: disable=protected-access
+
+    def test_sla_queue_and_breach_check(self):
+        """Test the SLA-ordered ticket queue and the breach-detection command."""
+        self.authenticate()
+        critical = MaintenanceTicket.objects.create(machine=self.machine,
+                                                    issue_description='Fire alarm',
+                                                    reported_by=self.user, status='in_progress',
+                                                    priority=4)
+        low = MaintenanceTicket.objects.create(machine=self.machine,
+                                               issue_description='Paint chipped',
+                                               reported_by=self.user, status='open', priority=1)
+        MaintenanceTicket.objects.create(machine=self.machine, issue_description='Done',
+                                         status='closed')
+
+        url = reverse('maintenanceticket-open-tickets')
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual([t['id'] for t in response.data['results']], [critical.id, self.ticket.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([t['id'] for t in response.data['results']], [low.id])
+        response = self.client.get(url, {'status': 'open'})
+        self.assertEqual([t['id'] for t in response.data['results']], [self.ticket.id, low.id])
+
+        MaintenanceTicket.objects.filter(pk=critical.pk).update(
+            created_at=critical.created_at - timedelta(hours=5))
+        critical.refresh_from_db()
+        critical.save()
+        out = StringIO()
+        call_command('check_sla_breaches', stdout=out)
+        self.assertIn('Flagged 1 tickets', out.getvalue())
+        call_command('check_sla_breaches', stdout=out)
+        self.assertIn('Flagged 0 tickets', out.getvalue())
+        self.assertEqual(Notification.objects.get(user=self.user).title,
+                         f'SLA breached: ticket #{critical.id}')
+        response = self.client.get(url, {'breached': '1'})
+        self.assertEqual([t['id'] for t in response.data['results']], [critical.id])
+
+    def test_bulk_open_assign_and_close(self):
+        """Test opening, assigning and closing tickets in bulk."""
+        self.authenticate()
+        other = Machine.objects.create(name='Machine 2', model_number='M124',
+                                       location='Warehouse 1', status='operational')
+        response = self.client.post(reverse('maintenanceticket-bulk-open'), {
+            'machine_ids': [self.machine.id, other.id], 'issue_description': 'Line 3 down',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        events = TicketEvent.objects.filter(ticket_id__in=response.data['ticket_ids'])
+        self.assertEqual(events.count(), 2)
+        for priority in (True, [2], '2', 9):
+            response = self.client.post(reverse('maintenanceticket-bulk-open'), {
+                'machine_ids': [other.id], 'issue_description': 'Line 3 down', 'priority': priority,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('machine-fleet-summary')).data['open_tickets'],
+                         {self.machine.id: 2, other.id: 1})
+
+        response = self.client.post(reverse('maintenanceticket-bulk-assign'), {
+            'machine_ids': [self.machine.id], 'assigned_to': self.user.id,
+        }, format='json')
+        self.assertEqual(response.data, {'updated': 2, 'skipped': 0})
+        self.assertEqual(MaintenanceTicket.objects.filter(assigned_to=self.user).count(), 2)
+
+        self.ticket.status = 'closed'
+        self.ticket.save()
+        response = self.client.post(reverse('maintenanceticket-bulk-close'), {
+            'ticket_ids': list(MaintenanceTicket.objects.values_list('id', flat=True)),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['updated'], response.data['skipped']), (2, 1))
+        self.assertFalse(MaintenanceTicket.objects.exclude(status='closed').exists())
+        self.assertEqual(self.client.get(reverse('machine-fleet-summary')).data['open_tickets'], {})
+
+        response = self.client.post(reverse('maintenanceticket-bulk-close'), {'ticket_ids': []},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_ticket_unauthenticated(self):
         """Test updating a maintenance ticket without authentication."""
         data = {
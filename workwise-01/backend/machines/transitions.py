@@ -0,0 +1,192 @@
+# pylint: disable=no-member
+"""
+Maintenance ticket state machine.
+
+Tickets move ``open -> in_progress -> closed`` (an open ticket may also be closed
+directly). A transition is one conditional statement,
+``UPDATE ... SET status = new WHERE id = ? AND status = expected``, so two
+technicians acting on the same ticket can't both succeed: the second update
+matches no row and is reported as a conflict. No lock is held while the request
+is being handled, only for the short transaction that applies the change, appends
+its `TicketEvent` and adjusts the fleet counters.
+
+The bulk functions apply the same rules to many tickets with set-based
+statements: one locking read, one `UPDATE`, one multi-row insert of events and
+one counter update per affected machine, however many tickets are involved.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .models import MaintenanceTicket, TicketEvent
+
+BULK_MAX_TICKETS = 1000
+"""Upper bound on the tickets or machines a single bulk operation may name."""
+
+OPEN = 'open'
+IN_PROGRESS = 'in_progress'
+CLOSED = 'closed'
+STATUSES = (OPEN, IN_PROGRESS, CLOSED)
+
+TRANSITIONS = {
+    OPEN: {IN_PROGRESS, CLOSED},
+    IN_PROGRESS: {CLOSED},
+    CLOSED: set(),
+}
+"""Maps each status to the statuses a ticket may move to from it."""
+
+
+class TransitionConflict(Exception):
+    """
+    Raised when a ticket can't make the requested transition.
+
+    Attributes:
+        current (str): The ticket's status when the transition was attempted, None
+            if the ticket doesn't exist.
+    """
+
+    def __init__(self, message, current=None):
+        super().__init__(message)
+        self.current = current
+
+
+def status_fields(to_status, now):
+    """Returns the column values a move to `to_status` writes besides the status."""
+    return {'updated_at': now, 'closed_at': now if to_status == CLOSED else None}
+
+
+def transition(ticket_id, to_status, actor=None, expected=None):
+    """
+    Moves a ticket to `to_status` if it is still in the expected state.
+
+    Args:
+        ticket_id (int): The ticket to change.
+        to_status (str): The target status.
+        actor (User): The user making the change, optional.
+        expected (str): The status the caller saw. Defaults to the status read just
+            before the update, which still guards against concurrent changes
+            between that read and the update.
+
+    Returns:
+        TicketEvent: The recorded event.
+
+    Raises:
+        TransitionConflict: If the ticket is missing, no longer in `expected`, or
+            `to_status` isn't reachable from its status.
+    """
+    row = MaintenanceTicket.objects.filter(pk=ticket_id).values_list('status', 'machine_id').first()
+    if row is None:
+        raise TransitionConflict('Ticket not found')
+    current, machine_id = row
+    if expected is not None and expected != current:
+        raise TransitionConflict(f'Ticket is {current}, not {expected}', current)
+    if to_status not in TRANSITIONS.get(current, ()):
+        raise TransitionConflict(f'Cannot move a ticket from {current} to {to_status}', current)
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = MaintenanceTicket.objects.filter(pk=ticket_id, status=current).update(
+            status=to_status, **status_fields(to_status, now))
+        if not updated:
+            latest = (MaintenanceTicket.objects.filter(pk=ticket_id)
+                      .values_list('status', flat=True).first())
+            raise TransitionConflict('Ticket was changed concurrently', latest)
+        # QuerySet.update() sends no signals, so the counters are adjusted here.
+        counters.ticket_changed((machine_id, current), (machine_id, to_status))
+        return TicketEvent.objects.create(ticket_id=ticket_id, machine_id=machine_id,
+                                          from_status=current, to_status=to_status, actor=actor)
+
+
+def record_created(ticket, actor=None):
+    """Appends the event for a newly created ticket."""
+    return TicketEvent.objects.create(ticket=ticket, machine_id=ticket.machine_id, from_status=None,
+                                      to_status=ticket.status, actor=actor)
+
+
+def bulk_transition(tickets, to_status, actor=None):
+    """
+    Moves every ticket in `tickets` that may reach `to_status` there.
+
+    The candidates are locked while they are read, so a ticket changed by someone
+    else in the meantime is either skipped or moved from its new status, never
+    moved twice. Tickets that can't reach `to_status` are left alone.
+
+    Args:
+        tickets (QuerySet): The tickets to move.
+        to_status (str): The target status.
+        actor (User): The user making the change, optional.
+
+    Returns:
+        tuple: ``(moved, skipped)``, the ids of the moved tickets and the number of
+        matching tickets left alone.
+    """
+    sources = [status for status, targets in TRANSITIONS.items() if to_status in targets]
+    now = timezone.now()
+    with transaction.atomic():
+        matched = tickets.count()
+        rows = list(tickets.filter(status__in=sources).select_for_update().order_by('id')
+                    .values_list('id', 'machine_id', 'status'))
+        moved = [ticket_id for ticket_id, _, _ in rows]
+        if rows:
+            MaintenanceTicket.objects.filter(id__in=moved).update(
+                status=to_status, **status_fields(to_status, now))
+            counters.tickets_changed(((machine_id, current), (machine_id, to_status))
+                                     for _, machine_id, current in rows)
+            TicketEvent.objects.bulk_create([
+                TicketEvent(ticket_id=ticket_id, machine_id=machine_id, from_status=current,
+                            to_status=to_status, actor=actor)
+                for ticket_id, machine_id, current in rows
+            ], batch_size=1000)
+    return moved, matched - len(moved)
+
+
+def bulk_open(machine_ids, issue_description, actor=None,
+              priority=MaintenanceTicket.PRIORITY_MEDIUM):
+    """
+    Opens one ticket per machine in `machine_ids`.
+
+    Args:
+        machine_ids (list): The machines to open tickets for.
+        issue_description (str): The issue, shared by all tickets.
+        actor (User): The reporting user, optional.
+        priority (int): The priority of all tickets, Medium by default.
+
+    Returns:
+        list: The ids of the new tickets.
+    """
+    sla_due_at = MaintenanceTicket.sla_due(priority, timezone.now())
+    with transaction.atomic():
+        # `bulk_create` sends no signals and skips `save()`, so the counters are
+        # adjusted and the SLA set here.
+        tickets = MaintenanceTicket.objects.bulk_create([
+            MaintenanceTicket(machine_id=machine_id, issue_description=issue_description,
+                              reported_by=actor, status=OPEN, priority=priority,
+                              sla_due_at=sla_due_at)
+            for machine_id in machine_ids
+        ], batch_size=1000)
+        counters.tickets_changed((None, (ticket.machine_id, OPEN)) for ticket in tickets)
+        TicketEvent.objects.bulk_create([
+            TicketEvent(ticket_id=ticket.id, machine_id=ticket.machine_id, from_status=None,
+                        to_status=OPEN, actor=actor)
+            for ticket in tickets
+        ], batch_size=1000)
+    return [ticket.id for ticket in tickets]
+
+
+def bulk_assign(tickets, assignee):
+    """
+    Assigns the unfinished tickets among `tickets` to `assignee`.
+
+    Args:
+        tickets (QuerySet): The tickets to assign.
+        assignee (User): The technician, or None to unassign.
+
+    Returns:
+        tuple: ``(updated, skipped)``, the number of tickets assigned and the number
+        left alone because they are closed.
+    """
+    with transaction.atomic():
+        matched = tickets.count()
+        updated = tickets.filter(status__in=MaintenanceTicket.OPEN_STATUSES).update(
+            assigned_to=assignee, updated_at=timezone.now())
+    return updated, matched - updated
@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MachineViewSet, MaintenanceTicketViewSet
+from .views import (
+    LocationViewSet, MachineViewSet, MaintenanceIntervalViewSet, MaintenanceTicketViewSet,
+)
 
 # Create a router and register the viewsets
 router = DefaultRouter()
 router.register(r'machines', MachineViewSet, basename='machine')
 router.register(r'tickets', MaintenanceTicketViewSet, basename='maintenanceticket')
+router.register(r'maintenance-intervals', MaintenanceIntervalViewSet,
+                basename='maintenanceinterval')
+router.register(r'locations', LocationViewSet, basename='location')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
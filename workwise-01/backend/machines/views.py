@@ -1,11 +1,69 @@
 # pylint: disable=no-member
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from .models import Machine, MaintenanceTicket
-from .serializers import MachineSerializer, MaintenanceTicketSerializer
+from backend.exports import EXPORT_FORMATS, export_response
+from backend.pagination import KeysetPagination
+from . import transitions
+from .counters import summary
+from .duplicates import find_duplicates, merge
+from .locations import (
+    LocationMoveError, machines_in, move as move_location, summary as location_summary,
+)
+from .maintenance import reschedule_model
+from .models import (
+    Location, Machine, MachineReliability, MaintenanceInterval, MaintenanceTicket, ModelReliability,
+    TicketEvent,
+)
+from .serializers import (
+    LocationSerializer, MachineReliabilitySerializer, MachineSerializer,
+    MaintenanceIntervalSerializer, MaintenanceTicketSerializer, ModelReliabilitySerializer,
+    TicketEventSerializer,
+)
+from .sla import queue
+from .transitions import (
+    BULK_MAX_TICKETS, TransitionConflict, bulk_assign, bulk_open, bulk_transition, record_created,
+    transition,
+)
+
+
+def _id_list(value):
+    """
+    Validates a list of ids from a bulk request.
+
+    Returns:
+        list: The distinct ids in order, or None if `value` isn't a non-empty list of
+        at most `BULK_MAX_TICKETS` integers.
+    """
+    if not isinstance(value, list) or not value or len(value) > BULK_MAX_TICKETS:
+        return None
+    if any(isinstance(item, bool) or not isinstance(item, int) for item in value):
+        return None
+    return list(dict.fromkeys(value))
+
+
+class MaintenanceDuePagination(KeysetPagination):
+    """Keyset pagination for the maintenance queue, backed by `machine_maintenance_due_idx`."""
+    ordering = ('next_maintenance_due', 'id')
+
+
+class SlaQueuePagination(KeysetPagination):
+    """Keyset pagination for the SLA ticket queue, backed by `ticket_sla_queue_idx`."""
+    ordering = ('sla_due_at', 'id')
+
+
+class ReliabilityPagination(KeysetPagination):
+    """Keyset pagination for machine reliability figures, most failing machines first."""
+    ordering = ('-failures', 'machine_id')
 
 class MachineViewSet(viewsets.ModelViewSet):
     """
@@ -18,6 +76,22 @@ class MachineViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def wants_ticket_stats(self):
+        """Returns True if a list or detail request asked for `?ticket_stats=1`."""
+        return (self.action in ('list', 'retrieve')
+                and self.request.query_params.get('ticket_stats') in ('1', 'true'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants_ticket_stats():
+            queryset = queryset.with_ticket_stats()
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['ticket_stats'] = self.wants_ticket_stats()
+        return context
+
     @action(detail=True, methods=['post'])
     def schedule_maintenance(self, request, pk=None):  # pylint: disable=unused-argument
         """Custom action to schedule maintenance for a machine."""
@@ -38,11 +112,15 @@ class MachineViewSet(viewsets.ModelViewSet):
     def resolve_issue(self, request, pk=None):  # pylint: disable=unused-argument
         """Custom action to resolve an issue related to a maintenance ticket."""
         ticket_id = request.data.get('ticket_id')
-        ticket = MaintenanceTicket.objects.filter(pk=ticket_id, machine=pk).first()
+        ticket = (MaintenanceTicket.objects.filter(pk=ticket_id, machine=pk)
+                  .values_list('pk', flat=True).first())
         if not ticket:
             return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
-        ticket.status = 'closed'
-        ticket.save()
+        try:
+            transition(ticket, transitions.CLOSED, actor=request.user)
+        except TransitionConflict as exc:
+            return Response({'error': str(exc), 'status': exc.current},
+                            status=status.HTTP_409_CONFLICT)
         return Response({'message': 'Issue resolved successfully'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
@@ -53,13 +131,72 @@ class MachineViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
-    def maintenance_due(self, request):  # pylint: disable=unused-argument
-        """Custom action to list machines due for maintenance."""
-        from datetime import timedelta, date
-        threshold_date = date.today() - timedelta(days=30)
-        machines = Machine.objects.filter(last_maintenance_date__lt=threshold_date)
-        serializer = self.get_serializer(machines, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def fleet_summary(self, request):  # pylint: disable=unused-argument
+        """
+        Custom action to return machine counts by status and location and open
+        tickets per machine.
+        """
+        return Response(summary(), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def reliability(self, request, pk=None):  # pylint: disable=unused-argument
+        """Custom action to retrieve the precomputed MTBF/MTTR figures of a machine."""
+        machine = self.get_object()
+        stats = MachineReliability.objects.filter(machine=machine).first()
+        if stats is None:
+            return Response({'error': 'No reliability figures for this machine yet'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(MachineReliabilitySerializer(stats).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def reliability_ranking(self, request):
+        """Custom action to page through machine reliability figures, most failing first."""
+        paginator = ReliabilityPagination()
+        page = paginator.paginate_queryset(MachineReliability.objects.all(), request, view=self)
+        return paginator.get_paginated_response(MachineReliabilitySerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def model_reliability(self, request):  # pylint: disable=unused-argument
+        """Custom action to list MTBF/MTTR figures per model number."""
+        stats = ModelReliability.objects.order_by('model_number')
+        return Response(ModelReliabilitySerializer(stats, many=True).data,
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def maintenance_due(self, request):
+        """
+        Custom action to page through machines due for maintenance, most overdue first.
+
+        `within_days` (default 0) also includes machines due in the next N days.
+        """
+        try:
+            within_days = int(request.query_params.get('within_days', 0))
+        except ValueError:
+            within_days = -1
+        if within_days < 0:
+            return Response({'error': 'within_days must be a non-negative integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        cutoff = timezone.localdate() + timedelta(days=within_days)
+        machines = Machine.objects.filter(next_maintenance_due__lte=cutoff)
+        paginator = MaintenanceDuePagination()
+        page = paginator.paginate_queryset(machines, request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=['post'])
+    def record_maintenance(self, request, pk=None):  # pylint: disable=unused-argument
+        """Custom action to record that maintenance was done, today unless a `date` is given."""
+        machine = self.get_object()
+        performed = request.data.get('date')
+        try:
+            performed = parse_date(performed) if performed else timezone.localdate()
+        except ValueError:
+            performed = None
+        if performed is None:
+            return Response({'error': 'date must be YYYY-MM-DD'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        machine.last_maintenance_date = performed
+        machine.save()
+        return Response(self.get_serializer(machine).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['patch'])
     def update_location(self, request, pk=None):  # pylint: disable=unused-argument
@@ -72,6 +209,15 @@ class MachineViewSet(viewsets.ModelViewSet):
         machine.save()
         return Response({'message': 'Location updated successfully'}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<export_format>[^/.]+)')
+    def export(self, request, export_format=None):  # pylint: disable=unused-argument
+        """Custom action to stream every machine as NDJSON or CSV."""
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': 'Format must be ndjson or csv'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return export_response(Machine.objects.order_by('id'), MachineSerializer, export_format,
+                               'machines')
+
 class MaintenanceTicketViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing MaintenanceTicket instances.
@@ -83,9 +229,299 @@ class MaintenanceTicketViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def create(self, request, *args, **kwargs):
+        """
+        Creates a ticket and flags unfinished tickets of the same machine with a
+        nearly identical description under `possible_duplicates`.
+        """
+        response = super().create(request, *args, **kwargs)
+        response.data['possible_duplicates'] = find_duplicates(
+            response.data['machine'], response.data['issue_description'],
+            exclude=response.data['id'])
+        return response
+
+    def perform_create(self, serializer):
+        ticket = serializer.save()
+        record_created(ticket, actor=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        """Updates a ticket; a status change that conflicts with its current status gets a 409."""
+        try:
+            return super().update(request, *args, **kwargs)
+        except TransitionConflict as exc:
+            return Response({'error': str(exc), 'status': exc.current},
+                            status=status.HTTP_409_CONFLICT)
+
+    def perform_update(self, serializer):
+        """
+        Applies a status change as a state-machine transition and writes only the
+        other fields that were sent, all in one transaction.
+        """
+        ticket = serializer.instance
+        changes = dict(serializer.validated_data)
+        new_status = changes.pop('status', None)
+        with transaction.atomic():
+            if new_status is not None and new_status != ticket.status:
+                transition(ticket.pk, new_status, actor=self.request.user, expected=ticket.status)
+            if changes:
+                for field, value in changes.items():
+                    setattr(ticket, field, value)
+                ticket.save(update_fields=[*changes, 'updated_at'])
+        ticket.refresh_from_db()
+
+    @action(detail=True, methods=['post'], url_path='transition')
+    def change_status(self, request, pk=None):  # pylint: disable=unused-argument
+        """
+        Custom action to move a ticket to `status`, optionally only if it is still in
+        `expected`.
+        """
+        to_status = request.data.get('status')
+        if to_status not in transitions.STATUSES:
+            return Response({'error': f"status must be one of {', '.join(transitions.STATUSES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        ticket = self.get_object()
+        try:
+            transition(ticket.pk, to_status, actor=request.user,
+                       expected=request.data.get('expected'))
+        except TransitionConflict as exc:
+            return Response({'error': str(exc), 'status': exc.current},
+                            status=status.HTTP_409_CONFLICT)
+        ticket.refresh_from_db()
+        return Response(self.get_serializer(ticket).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):  # pylint: disable=unused-argument
+        """
+        Custom action to fold the tickets in `duplicates` into this one: they are
+        closed and point here through `duplicate_of`.
+        """
+        ticket = self.get_object()
+        duplicate_ids = _id_list(request.data.get('duplicates'))
+        if duplicate_ids is None:
+            return Response(
+                {'error': f'duplicates must be a list of at most {BULK_MAX_TICKETS} ids'},
+                status=status.HTTP_400_BAD_REQUEST)
+        if ticket.status not in MaintenanceTicket.OPEN_STATUSES:
+            return Response({'error': 'Cannot merge into a closed ticket', 'status': ticket.status},
+                            status=status.HTTP_409_CONFLICT)
+        merged = merge(ticket, duplicate_ids, actor=request.user)
+        return Response({'merged': merged, 'skipped': len(duplicate_ids) - len(merged)},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def events(self, request, pk=None):  # pylint: disable=unused-argument
+        """Custom action to list the status history of a ticket, oldest first."""
+        ticket = self.get_object()
+        events = TicketEvent.objects.filter(ticket=ticket).order_by('created_at', 'id')
+        return Response(TicketEventSerializer(events, many=True).data, status=status.HTTP_200_OK)
+
+    def _bulk_targets(self, request):
+        """
+        Resolves the `ticket_ids` or `machine_ids` of a bulk request.
+
+        Returns:
+            tuple: ``(tickets, None)`` with the matching tickets, or ``(None, response)``
+            with a 400 response if neither list is valid. Naming machines selects
+            their unfinished tickets.
+        """
+        if 'ticket_ids' in request.data:
+            ids = _id_list(request.data['ticket_ids'])
+            tickets = MaintenanceTicket.objects.filter(id__in=ids or [])
+        else:
+            ids = _id_list(request.data.get('machine_ids'))
+            tickets = MaintenanceTicket.objects.filter(machine_id__in=ids or [],
+                                                       status__in=MaintenanceTicket.OPEN_STATUSES)
+        if ids is None:
+            return None, Response(
+                {'error': 'ticket_ids or machine_ids must be a list of at most '
+                          f'{BULK_MAX_TICKETS} ids'},
+                status=status.HTTP_400_BAD_REQUEST)
+        return tickets, None
+
+    @action(detail=False, methods=['post'], url_path='bulk-open')
+    def bulk_open(self, request):
+        """
+        Custom action to open one ticket per machine in `machine_ids`, all with the
+        same `issue_description` and `priority` (Medium by default).
+        """
+        machine_ids = _id_list(request.data.get('machine_ids'))
+        issue_description = request.data.get('issue_description')
+        if (machine_ids is None or not isinstance(issue_description, str)
+                or not issue_description.strip()):
+            return Response({'error': f'machine_ids (at most {BULK_MAX_TICKETS}) and '
+                                      'issue_description are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        known = Machine.objects.filter(id__in=machine_ids).values_list('id', flat=True)
+        unknown = set(machine_ids) - set(known)
+        if unknown:
+            return Response({'error': 'Unknown machines', 'machine_ids': sorted(unknown)},
+                            status=status.HTTP_400_BAD_REQUEST)
+        priority = request.data.get('priority', MaintenanceTicket.PRIORITY_MEDIUM)
+        sla_hours = MaintenanceTicket.sla_hours()
+        if isinstance(priority, bool) or not isinstance(priority, int) or priority not in sla_hours:
+            return Response({'error': f'priority must be one of {sorted(sla_hours)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        created = bulk_open(machine_ids, issue_description, actor=request.user, priority=priority)
+        return Response({'created': len(created), 'ticket_ids': created},
+                        status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-assign')
+    def bulk_assign(self, request):
+        """
+        Custom action to assign the unfinished tickets named by `ticket_ids` or
+        `machine_ids` to the user `assigned_to`, or unassign them if it is null.
+        """
+        tickets, error = self._bulk_targets(request)
+        if error:
+            return error
+        if 'assigned_to' not in request.data:
+            return Response({'error': 'assigned_to is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        assignee, assigned_to = None, request.data['assigned_to']
+        if assigned_to is not None:
+            if isinstance(assigned_to, int) and not isinstance(assigned_to, bool):
+                assignee = User.objects.filter(pk=assigned_to).first()
+            if assignee is None:
+                return Response({'error': 'User not found'}, status=status.HTTP_400_BAD_REQUEST)
+        updated, skipped = bulk_assign(tickets, assignee)
+        return Response({'updated': updated, 'skipped': skipped}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-close')
+    def bulk_close(self, request):
+        """
+        Custom action to close the tickets named by `ticket_ids`, or every unfinished
+        ticket of the machines in `machine_ids`.
+        """
+        tickets, error = self._bulk_targets(request)
+        if error:
+            return error
+        closed, skipped = bulk_transition(tickets, transitions.CLOSED, actor=request.user)
+        return Response({'updated': len(closed), 'skipped': skipped, 'ticket_ids': closed},
+                        status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
-    def open_tickets(self, request):  # pylint: disable=unused-argument
-        """Custom action to list all open maintenance tickets."""
-        tickets = MaintenanceTicket.objects.filter(status='open')
-        serializer = self.get_serializer(tickets, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def open_tickets(self, request):
+        """
+        Custom action to page through unfinished tickets by SLA, most urgent first.
+
+        Tickets are ordered by `sla_due_at`, which folds priority and age together.
+        `status` narrows the queue to `open` or `in_progress` tickets and `breached`
+        to tickets flagged past their SLA.
+        """
+        tickets = queue()
+        ticket_status = request.query_params.get('status')
+        if ticket_status is not None:
+            if ticket_status not in MaintenanceTicket.OPEN_STATUSES:
+                return Response({'error': 'status must be open or in_progress'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            tickets = tickets.filter(status=ticket_status)
+        if request.query_params.get('breached') in ('1', 'true'):
+            tickets = tickets.filter(sla_breached_at__isnull=False)
+        paginator = SlaQueuePagination()
+        page = paginator.paginate_queryset(tickets, request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<export_format>[^/.]+)')
+    def export(self, request, export_format=None):  # pylint: disable=unused-argument
+        """Custom action to stream every maintenance ticket as NDJSON or CSV."""
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': 'Format must be ndjson or csv'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return export_response(MaintenanceTicket.objects.order_by('id'),
+                               MaintenanceTicketSerializer, export_format, 'maintenance_tickets')
+
+
+class MaintenanceIntervalViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for managing per-model maintenance intervals.
+
+    Creating, changing or deleting an interval recomputes the next maintenance
+    due date of every machine with that model number.
+    """
+    queryset = MaintenanceInterval.objects.order_by('model_number')
+    serializer_class = MaintenanceIntervalSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        interval = serializer.save()
+        reschedule_model(interval.model_number)
+
+    def perform_update(self, serializer):
+        previous = serializer.instance.model_number
+        interval = serializer.save()
+        reschedule_model(interval.model_number)
+        if previous != interval.model_number:
+            reschedule_model(previous)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        reschedule_model(instance.model_number)
+
+
+class LocationViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for the site -> building -> line -> cell location hierarchy.
+
+    Places are listed in path order, so every subtree is contiguous. `parent`
+    narrows the list to the children of one place (`?parent=` for the sites).
+    """
+    queryset = Location.objects.order_by('path')
+    serializer_class = LocationSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and 'parent' in self.request.query_params:
+            parent = self.request.query_params['parent']
+            if not parent:
+                queryset = queryset.filter(parent__isnull=True)
+            else:
+                queryset = queryset.filter(parent=parent) if parent.isdigit() else queryset.none()
+        return queryset
+
+    def destroy(self, request, *args, **kwargs):
+        """Deletes a place; places that still contain others get a 409."""
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response({'error': 'Location still contains other places'},
+                            status=status.HTTP_409_CONFLICT)
+
+    @action(detail=True, methods=['get'])
+    def machines(self, request, pk=None):  # pylint: disable=unused-argument
+        """Custom action to page through the machines at this place or anywhere below it."""
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(machines_in(self.get_object()), request, view=self)
+        return paginator.get_paginated_response(MachineSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):  # pylint: disable=unused-argument
+        """Custom action to count the machines below this place by status, overall and per child."""
+        return Response(location_summary(self.get_object()), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):  # pylint: disable=unused-argument
+        """
+        Custom action to move this place and everything below it under `parent`
+        (null for a site).
+        """
+        location = self.get_object()
+        parent = None
+        if request.data.get('parent') is not None:
+            parent_id = request.data['parent']
+            if isinstance(parent_id, int) or (isinstance(parent_id, str) and parent_id.isdigit()):
+                parent = Location.objects.filter(pk=parent_id).first()
+            if parent is None:
+                return Response({'error': 'Parent location not found'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            move_location(location, parent)
+        except LocationMoveError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({'error': 'The new parent already has a place with this name'},
+                            status=status.HTTP_409_CONFLICT)
+        location.refresh_from_db()
+        return Response(self.get_serializer(location).data, status=status.HTTP_200_OK)
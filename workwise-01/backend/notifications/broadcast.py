@@ -0,0 +1,112 @@
+# pylint: disable=no-member
+"""
+Background fan-out of broadcast notifications.
+
+A broadcast request only stores a `Broadcast` row and hands its id to a small
+thread pool once the request's transaction commits, so the API answers at once.
+The worker walks the recipients in user id order, `CHUNK_SIZE` at a time, and
+writes each chunk in its own short transaction: one multi-row insert of the
+notifications, one statement bumping the recipients' unread counters and one
+update recording the progress. No transaction spans the whole broadcast, and a
+delivery interrupted by a restart resumes after the last committed chunk
+(see the `resume_broadcasts` command).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters
+from .models import Broadcast, Notification
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'NOTIFICATION_BROADCAST_WORKERS', 2),
+                               thread_name_prefix='broadcast')
+
+
+def recipients(broadcast):
+    """Returns the ids of the active users `broadcast` is addressed to, as a queryset."""
+    users = User.objects.filter(is_active=True)
+    if broadcast.target == Broadcast.TARGET_DEPARTMENT:
+        users = users.filter(departments=broadcast.department_id)
+    elif broadcast.target == Broadcast.TARGET_USERS:
+        users = users.filter(id__in=broadcast.user_ids)
+    return users.order_by('id').values_list('id', flat=True).distinct()
+
+
+def deliver_chunk(broadcast):
+    """
+    Writes the notifications of the next chunk of recipients.
+
+    The broadcast row is locked and its progress re-read first, so two deliveries
+    of the same broadcast (a worker thread and `resume_broadcasts`, say) take
+    turns chunk by chunk and never write the same chunk twice.
+
+    Returns:
+        int: The number of notifications written, 0 once everyone was notified.
+    """
+    with transaction.atomic():
+        stored = (Broadcast.objects.select_for_update()
+                  .only('status', 'delivered', 'last_user_id').get(pk=broadcast.pk))
+        broadcast.delivered, broadcast.last_user_id = stored.delivered, stored.last_user_id
+        if stored.status == Broadcast.STATUS_DONE:
+            return 0
+        user_ids = list(recipients(broadcast).filter(id__gt=broadcast.last_user_id)[:CHUNK_SIZE])
+        if not user_ids:
+            return 0
+        counters.lock(user_ids)
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, title=broadcast.title, message=broadcast.message)
+             for user_id in user_ids],
+            batch_size=CHUNK_SIZE,
+        )
+        counters.increment_each(user_ids)
+        broadcast.delivered += len(user_ids)
+        broadcast.last_user_id = user_ids[-1]
+        broadcast.save(update_fields=['delivered', 'last_user_id'])
+    return len(user_ids)
+
+
+def deliver(broadcast_id):
+    """
+    Delivers a pending or interrupted broadcast to the remaining recipients.
+
+    Args:
+        broadcast_id (int): The broadcast to deliver.
+    """
+    broadcast = Broadcast.objects.get(pk=broadcast_id)
+    if broadcast.status == Broadcast.STATUS_DONE:
+        return
+    broadcast.status = Broadcast.STATUS_RUNNING
+    broadcast.save(update_fields=['status'])
+    try:
+        while deliver_chunk(broadcast):
+            pass
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.exception('Broadcast %s failed', broadcast_id)
+        broadcast.status = Broadcast.STATUS_FAILED
+        broadcast.error = str(exc)
+        broadcast.save(update_fields=['status', 'error'])
+        return
+    broadcast.status = Broadcast.STATUS_DONE
+    broadcast.finished_at = timezone.now()
+    broadcast.save(update_fields=['status', 'finished_at'])
+
+
+def _run(broadcast_id):
+    try:
+        deliver(broadcast_id)
+    finally:
+        # Each worker thread opens its own database connection; don't leak it.
+        connection.close()
+
+
+def submit(broadcast):
+    """Queues `broadcast` for background delivery once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run, broadcast.pk))
@@ -0,0 +1,112 @@
+# pylint: disable=no-member
+"""
+Per-user unread notification counters.
+
+Every change to the unread set (see `notifications.reads` for what counts as
+unread) goes through `adjust()`, an atomic ``unread = unread + delta`` on the
+user's `NotificationCounter` row, in the same transaction as the change itself.
+Rows are created on first use. `recount()` is the repair path for drift from
+changes made behind the application's back.
+
+Code creating notifications calls `lock()` for the recipients before inserting.
+Holding the counter rows from before the insert until the commit keeps
+`notifications.reads.mark_all_read` from placing its watermark past a
+notification that isn't committed yet, which would count it unread but show it
+read.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .models import Notification, NotificationCounter
+
+
+def adjust(deltas):
+    """
+    Applies unread-count changes.
+
+    Args:
+        deltas (dict): Maps user ids to the amount to add.
+    """
+    # Rows are updated in user order so concurrent fan-outs can't deadlock.
+    for user_id, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        counter = NotificationCounter.objects.filter(user_id=user_id)
+        if not counter.update(unread=F('unread') + delta):
+            NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id)],
+                                                    ignore_conflicts=True)
+            counter.update(unread=F('unread') + delta)
+
+
+def lock(user_ids):
+    """
+    Locks the counter rows of `user_ids` until the transaction ends, creating
+    missing ones. Rows are locked in user order so concurrent fan-outs can't
+    deadlock.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True, batch_size=1000)
+    list(NotificationCounter.objects.select_for_update().filter(user_id__in=user_ids)
+         .order_by('user_id').values_list('user_id', flat=True))
+
+
+def increment_each(user_ids):
+    """
+    Adds one unread notification to each of `user_ids` with a single `UPDATE`.
+
+    The counter rows must exist, as they do after `lock()`.
+    """
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + 1)
+
+
+def created(notifications):
+    """Counts newly created `notifications` that are unread."""
+    adjust(Counter(n.user_id for n in notifications if not n.is_read))
+
+
+def unread_count(user):
+    """Returns the number of unread notifications of `user` from its counter row."""
+    unread = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+    return unread or 0
+
+
+def reset(user):
+    """
+    Zeroes the counter of `user`.
+
+    Used when every notification of the user is deleted. Call it before the delete:
+    the update locks the row for the rest of the transaction, so creations that
+    commit meanwhile wait for it and then count on top of zero.
+    """
+    if not NotificationCounter.objects.filter(user=user).update(unread=0):
+        NotificationCounter.objects.bulk_create([NotificationCounter(user=user)],
+                                                ignore_conflicts=True)
+
+
+def recount():
+    """
+    Rebuilds every counter from the notification table.
+
+    Returns:
+        int: The number of counters whose value changed.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {NotificationCounter._meta.db_table} IN EXCLUSIVE MODE')
+        actual = dict(Notification.objects.unread().values_list('user_id')
+                      .annotate(n=Count('id')).order_by())
+        stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+        changed = [NotificationCounter(user_id=user_id, unread=actual.get(user_id, 0))
+                   for user_id in actual.keys() | stored.keys()
+                   if actual.get(user_id, 0) != stored.get(user_id)]
+        NotificationCounter.objects.bulk_create(changed, update_conflicts=True,
+                                                unique_fields=['user'], update_fields=['unread'],
+                                                batch_size=1000)
+    return len(changed)
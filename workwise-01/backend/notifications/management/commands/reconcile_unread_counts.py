@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from notifications.counters import recount
+
+
+class Command(BaseCommand):
+    """
+    Repairs the per-user unread notification counters.
+
+    The counters are kept current by every API path that changes notifications;
+    this recounts them from the notification table after changes made behind the
+    application's back (raw SQL, restores, admin bulk edits).
+    """
+
+    help = 'Recompute unread notification counters and fix the ones that drifted.'
+
+    def handle(self, *args, **options):
+        changed = recount()
+        self.stdout.write(self.style.SUCCESS(f'Fixed {changed} unread counters.'))
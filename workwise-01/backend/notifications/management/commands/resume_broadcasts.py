@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from notifications.broadcast import deliver
+from notifications.models import Broadcast
+
+
+class Command(BaseCommand):
+    """
+    Finishes broadcasts whose background delivery was interrupted.
+
+    Run after a deploy or crash: pending and running broadcasts pick up after the
+    last chunk that was committed, and --failed retries failed ones the same way.
+    """
+
+    help = 'Deliver the remaining notifications of unfinished broadcasts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Also retry failed broadcasts.')
+
+    def handle(self, *args, **options):
+        statuses = [Broadcast.STATUS_PENDING, Broadcast.STATUS_RUNNING]
+        if options['failed']:
+            statuses.append(Broadcast.STATUS_FAILED)
+        broadcast_ids = (Broadcast.objects.filter(status__in=statuses).order_by('id')
+                         .values_list('id', flat=True))
+        for broadcast_id in broadcast_ids:
+            deliver(broadcast_id)
+            broadcast = Broadcast.objects.get(pk=broadcast_id)
+            self.stdout.write(f'Broadcast {broadcast_id}: {broadcast.status}, '
+                              f'{broadcast.delivered} delivered.')
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='kept_unread',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='read_up_to_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='read_up_to_id',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('kept_unread', True)), fields=['user'], name='notification_kept_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_read_watermark'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificationcounter',
+            name='read_up_to_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
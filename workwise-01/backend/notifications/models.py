@@ -2,6 +2,36 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+
+class NotificationQuerySet(models.QuerySet):
+    """
+    QuerySet for notifications with their read state under each owner's watermark.
+
+    For one user's notifications, `notifications.reads` builds the same filters
+    from a watermark read up front, without the join.
+    """
+
+    @staticmethod
+    def unread_q():
+        """Returns the filter selecting unread notifications, against their owner's watermark."""
+        counter = 'user__notification_counter__'
+        read_up_to_at = models.F(f'{counter}read_up_to_at')
+        read_up_to_id = models.F(f'{counter}read_up_to_id')
+        after = (models.Q(**{f'{counter}read_up_to_at__isnull': True})
+                 | models.Q(created_at__gt=read_up_to_at)
+                 | models.Q(created_at=read_up_to_at, id__gt=read_up_to_id))
+        return (models.Q(is_read=False) & after) | models.Q(kept_unread=True)
+
+    def unread(self):
+        """Returns the unread notifications."""
+        return self.filter(self.unread_q())
+
+    def with_read_state(self):
+        """Annotates each notification with `is_unread`, its read state."""
+        return self.annotate(is_unread=models.ExpressionWrapper(self.unread_q(),
+                                                               output_field=models.BooleanField()))
+
+
 class Notification(models.Model):
     """
     Model representing a user notification.
@@ -11,6 +41,10 @@ class Notification(models.Model):
         title (CharField): The title of the notification, with a maximum length of 255 characters.
         message (TextField): The detailed message of the notification.
         is_read (BooleanField): Indicates if the notification has been read; defaults to False.
+            Only authoritative for notifications newer than the user's read
+            watermark (see `notifications.reads`).
+        kept_unread (BooleanField): Marks a notification at or before the watermark
+            that was marked unread again.
         created_at (DateTimeField): The timestamp when the notification was created, auto-set on creation.
     """
 
@@ -18,8 +52,30 @@ class Notification(models.Model):
     title = models.CharField(max_length=255)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    kept_unread = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = NotificationQuerySet.as_manager()
+
+    class Meta:
+        """
+        Meta options for the Notification model.
+
+        Lists are always one user's notifications, newest first, so both indexes
+        lead with the user and end with the keyset pagination columns: a page of
+        any user's notifications, or of their unread ones, is a short range scan
+        however many notifications they have. The few notifications kept unread
+        behind the read watermark have a partial index of their own.
+        """
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'],
+                         name='notification_user_created_idx'),
+            models.Index(fields=['user', 'is_read', '-created_at', '-id'],
+                         name='notification_user_unread_idx'),
+            models.Index(fields=['user'], name='notification_kept_unread_idx',
+                          condition=models.Q(kept_unread=True)),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the notification, showing the username and the title.
@@ -28,3 +84,98 @@ class Notification(models.Model):
             str: A formatted string with the user's username and the notification title.
         """
         return f"{self.user.username} - {self.title}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Per-user count of unread notifications and read watermark.
+
+    Kept current by `notifications.counters` wherever notifications are created,
+    read, unread or deleted, so badge counts are a primary-key lookup instead of a
+    scan of the notification table. The watermark is the position, in list order,
+    of the newest notification when the user last marked everything read; the
+    notifications up to it are read unless kept unread (see `notifications.reads`).
+
+    Attributes:
+        user (OneToOneField): The user counted; also the primary key.
+        unread (IntegerField): The number of unread notifications of the user.
+        read_up_to_at (DateTimeField): `created_at` of the watermark notification,
+            None until the user first marks everything read.
+        read_up_to_id (BigIntegerField): Id of the watermark notification.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+    read_up_to_at = models.DateTimeField(null=True, blank=True)
+    read_up_to_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        """Returns the username and the unread count."""
+        return f"{self.user.username}: {self.unread} unread"
+
+
+class Broadcast(models.Model):
+    """
+    A notification sent to many users at once, delivered in the background.
+
+    Recipients are resolved when delivery runs and written in chunks, in user id
+    order; `last_user_id` records the progress so an interrupted delivery resumes
+    where it stopped without notifying anyone twice.
+
+    Attributes:
+        title (CharField): The title of the notifications.
+        message (TextField): The message of the notifications.
+        created_by (ForeignKey): The user who sent the broadcast.
+        target (CharField): 'users', 'department' or 'all'.
+        department (ForeignKey): The department whose members are notified, for that target.
+        user_ids (JSONField): The users notified, for the 'users' target.
+        status (CharField): 'pending', 'running', 'done' or 'failed'.
+        delivered (IntegerField): The number of notifications written so far.
+        last_user_id (IntegerField): The highest recipient id written so far.
+        error (TextField): Why the delivery failed, if it did.
+        created_at (DateTimeField): When the broadcast was requested.
+        finished_at (DateTimeField): When the delivery finished.
+    """
+
+    TARGET_USERS = 'users'
+    TARGET_DEPARTMENT = 'department'
+    TARGET_ALL = 'all'
+    TARGET_CHOICES = [
+        (TARGET_USERS, 'Users'),
+        (TARGET_DEPARTMENT, 'Department'),
+        (TARGET_ALL, 'All users'),
+    ]
+
+    # Upper bound on the recipients a 'users' broadcast may name.
+    MAX_USER_IDS = 1000
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,
+                                   related_name='broadcasts')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    department = models.ForeignKey('departments.Department', on_delete=models.SET_NULL, null=True,
+                                   blank=True)
+    user_ids = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    delivered = models.IntegerField(default=0)
+    last_user_id = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        """Returns the title and the delivery status."""
+        return f"{self.title} ({self.status})"
@@ -0,0 +1,183 @@
+# pylint: disable=no-member
+"""
+Server-Sent Events push of new notifications.
+
+Each ASGI worker process runs one `Hub`. Connected clients subscribe to it with
+their user id and then just wait on an `asyncio.Queue`, so an idle connection is
+a suspended coroutine and costs no queries, JWT decodes or wake-ups beyond a
+periodic keep-alive comment.
+
+Notifications can be created by any process, so the hub doesn't rely on being
+told about them: while it has subscribers, a single background task polls the
+notification table by primary key, ``WHERE id > <highest id seen>``, every
+`NOTIFICATION_PUSH_POLL_SECONDS`, and hands each new row to the queues of its
+user's connections in this process. The database is the fan-out between workers,
+and one indexed range scan per process per interval serves any number of clients.
+
+Ids are allocated when a row is inserted but only become visible on commit, so a
+lower id can show up after a higher one. Ids skipped over by a poll are kept as
+gaps and asked for again on later polls until they appear or `GAP_TIMEOUT`
+expires (rolled-back inserts never will).
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Max, Q
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+# How long an id skipped by a poll is retried before it's assumed rolled back.
+GAP_TIMEOUT = 30.0
+
+# Upper bound on the rows one poll delivers; the rest follow on the next poll.
+POLL_BATCH_SIZE = 500
+
+# Skipped id ranges wider than this are jumps in the id sequence, not pending
+# inserts, and aren't tracked.
+MAX_GAP = 1000
+
+# Upper bound, in seconds, on the delay between retries after failed polls.
+MAX_BACKOFF = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def poll_interval():
+    """Returns the delay between two polls of the notification table, in seconds."""
+    return getattr(settings, 'NOTIFICATION_PUSH_POLL_SECONDS', 0.5)
+
+
+class Hub:
+    """
+    In-process broadcast of new notifications to the connected clients.
+
+    Attributes:
+        subscribers (dict): Maps user ids to the queues of their connections.
+        watermark (int): The highest notification id delivered so far.
+        gaps (dict): Maps ids below the watermark that weren't seen yet to the
+            time they were first skipped.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.reset()
+
+    def reset(self, loop=None):
+        """Forgets all state and binds the hub to `loop`."""
+        self.loop = loop
+        self.subscribers = {}
+        self.watermark = None
+        self.gaps = {}
+        self.task = None
+
+    def subscribe(self, user_id):
+        """
+        Registers a connection of `user_id` and starts polling if needed.
+
+        Must be called from the event loop serving the connection.
+
+        Returns:
+            asyncio.Queue: Receives the serialized notifications of the user.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # A new event loop (a restarted server, or a test) starts afresh.
+            self.reset(loop)
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        """Removes a connection; polling stops once nobody is connected."""
+        queues = self.subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+    def publish(self, notifications):
+        """Hands serialized notifications to the connections of their users."""
+        for data in notifications:
+            for queue in self.subscribers.get(data['user'], ()):
+                queue.put_nowait(data)
+
+    async def run(self):
+        """
+        Polls for new notifications while there are subscribers.
+
+        A failed poll (say, a dropped database connection) is logged and retried
+        with a growing delay, so connected clients keep getting their
+        notifications once the database is back.
+        """
+        self.watermark = None
+        self.gaps = {}
+        rows, failures = [], 0
+        while self.subscribers:
+            if failures:
+                await asyncio.sleep(min(poll_interval() * 2 ** failures, MAX_BACKOFF))
+            elif self.watermark is not None and len(rows) < POLL_BATCH_SIZE:
+                # A full batch means more rows are waiting (say, a broadcast fan-out).
+                await asyncio.sleep(poll_interval())
+            if not self.subscribers:
+                break
+            try:
+                if self.watermark is None:
+                    # Only notifications created from now on are pushed; clients
+                    # catch up on older ones with Last-Event-ID (see `backlog`).
+                    newest = await Notification.objects.aaggregate(Max('id'))
+                    self.watermark = newest['id__max'] or 0
+                    rows = []
+                else:
+                    rows = await self.poll()
+            except Exception as exc:  # pylint: disable=broad-except
+                failures += 1
+                rows = []
+                logger.exception('Notification push poll failed (%d in a row)', failures)
+                if isinstance(exc, DatabaseError):
+                    # Drop a broken connection so the next poll opens a new one.
+                    await sync_to_async(close_old_connections)()
+                continue
+            failures = 0
+            self.publish(rows)
+
+    async def poll(self):
+        """
+        Fetches notifications created since the last poll.
+
+        Returns:
+            list: The new notifications, serialized, in id order.
+        """
+        now = time.monotonic()
+        self.gaps = {gap: since for gap, since in self.gaps.items() if now - since < GAP_TIMEOUT}
+        condition = Q(id__gt=self.watermark)
+        if self.gaps:
+            condition |= Q(id__in=list(self.gaps))
+        pending = Notification.objects.with_read_state().filter(condition).order_by('id')
+        rows = [row async for row in pending[:POLL_BATCH_SIZE]]
+        for row in rows:
+            self.gaps.pop(row.id, None)
+            if row.id > self.watermark:
+                if row.id - self.watermark <= MAX_GAP:
+                    self.gaps.update(dict.fromkeys(range(self.watermark + 1, row.id), now))
+                self.watermark = row.id
+        return NotificationSerializer(rows, many=True).data
+
+
+hub = Hub()
+
+
+async def backlog(user_id, after_id):
+    """
+    Returns the serialized notifications of `user_id` created after `after_id`,
+    for clients resuming a stream with Last-Event-ID.
+    """
+    rows = (Notification.objects.with_read_state().filter(user_id=user_id, id__gt=after_id)
+            .order_by('id')[:POLL_BATCH_SIZE])
+    return NotificationSerializer([row async for row in rows], many=True).data
@@ -0,0 +1,142 @@
+# pylint: disable=no-member
+"""
+Read state of notifications, derived from a per-user read watermark.
+
+Marking everything read used to rewrite every unread row of the user. Instead,
+the user's `NotificationCounter` row records a watermark, the ``(created_at, id)``
+position of their newest notification at the time, and a notification is read
+when:
+
+- it is at or before the watermark and not `kept_unread`, or
+- it is after the watermark and `is_read`.
+
+So "mark all read" is one write to the counter row, plus clearing the rare
+`kept_unread` overrides. Unread notifications are those after the watermark with
+`is_read` unset, a range of `notification_user_unread_idx` that ends at the
+watermark, and the ones kept unread, found through their partial index.
+
+Every change takes the counter row's lock first, so the watermark can't move
+while a change is being decided and the unread count stays in step. Code that
+creates notifications holds the same lock from before the insert until commit
+(see `counters.lock`), so the newest notification `mark_all_read` sees is the
+user's newest one: nothing committed later can land behind the watermark.
+
+Notifications of many users at once (the push stream, say) get their read state
+from `Notification.objects.with_read_state()`, which joins each owner's
+watermark instead.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from . import counters
+from .models import Notification, NotificationCounter
+
+MAX_IDS = 1000
+"""Upper bound on the notifications a single bulk mark-read may name."""
+
+
+def lock_counter(user_id):
+    """
+    Returns the counter row of `user_id`, creating it if needed, locked until the
+    transaction ends.
+    """
+    rows = NotificationCounter.objects.select_for_update().filter(user_id=user_id)
+    counter = rows.first()
+    if counter is None:
+        NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id)],
+                                                ignore_conflicts=True)
+        counter = rows.get()
+    return counter
+
+
+def mark_of(counter):
+    """Returns the ``(created_at, id)`` watermark of a counter row, None if it has none."""
+    if counter is None or counter.read_up_to_at is None:
+        return None
+    return counter.read_up_to_at, counter.read_up_to_id
+
+
+def watermark(user_id):
+    """Returns the ``(created_at, id)`` watermark of `user_id`, None if it has none."""
+    counter = (NotificationCounter.objects.filter(user_id=user_id)
+               .only('read_up_to_at', 'read_up_to_id').first())
+    return mark_of(counter)
+
+
+def after(mark):
+    """Returns the filter selecting notifications that come after `mark` in list order."""
+    created_at, notification_id = mark
+    return (Q(created_at__gte=created_at)
+            & (Q(created_at__gt=created_at) | Q(id__gt=notification_id)))
+
+
+def unread_q(mark):
+    """Returns the filter selecting unread notifications under the watermark `mark`."""
+    if mark is None:
+        return Q(is_read=False)
+    # Only notifications at or before the watermark are ever kept unread.
+    return (Q(is_read=False) & after(mark)) | Q(kept_unread=True)
+
+
+def with_read_state(queryset, mark):
+    """Annotates `queryset` with `is_unread`, the read state under the watermark `mark`."""
+    return queryset.annotate(is_unread=ExpressionWrapper(unread_q(mark),
+                                                         output_field=BooleanField()))
+
+
+def set_read(user_id, ids, read=True):
+    """
+    Marks notifications of `user_id` read or unread with set-based updates.
+
+    Args:
+        user_id (int): The owner of the notifications.
+        ids (list): The notifications to change; ids of other users' are ignored.
+        read (bool): True to mark them read, False to mark them unread.
+
+    Returns:
+        int: The number of notifications whose state changed.
+    """
+    with transaction.atomic():
+        mark = mark_of(lock_counter(user_id))
+        notifications = Notification.objects.filter(user_id=user_id, id__in=ids)
+        if read:
+            changed = notifications.filter(unread_q(mark)).update(is_read=True, kept_unread=False)
+        elif mark is None:
+            changed = notifications.filter(is_read=True).update(is_read=False)
+        else:
+            changed = (notifications.filter(after(mark), is_read=True).update(is_read=False)
+                       + notifications.exclude(after(mark)).filter(kept_unread=False)
+                       .update(is_read=False, kept_unread=True))
+        counters.adjust({user_id: -changed if read else changed})
+    return changed
+
+
+def mark_all_read(user_id):
+    """
+    Marks every notification of `user_id` read by moving the watermark.
+
+    Returns:
+        int: The number of notifications that were unread.
+    """
+    with transaction.atomic():
+        counter = lock_counter(user_id)
+        count = counter.unread
+        newest = (Notification.objects.filter(user_id=user_id).order_by('-created_at', '-id')
+                  .values_list('created_at', 'id').first())
+        if newest is not None:
+            Notification.objects.filter(user_id=user_id, kept_unread=True).update(kept_unread=False)
+            counter.read_up_to_at, counter.read_up_to_id = newest
+        counter.unread = 0
+        counter.save(update_fields=['unread', 'read_up_to_at', 'read_up_to_id'])
+    return count
+
+
+def delete(notification):
+    """Deletes `notification`, uncounting it if it was unread."""
+    with transaction.atomic():
+        mark = mark_of(lock_counter(notification.user_id))
+        deleted, _ = Notification.objects.filter(unread_q(mark), pk=notification.pk).delete()
+        if deleted:
+            counters.adjust({notification.user_id: -1})
+        else:
+            notification.delete()
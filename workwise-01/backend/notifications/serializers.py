@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Broadcast, Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
     """
@@ -25,6 +25,45 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'title', 'message', 'is_read', 'created_at']
         read_only_fields = ['id', 'user', 'created_at']
 
+    def to_representation(self, instance):
+        """Reports `is_read` from the read-state annotation when the queryset has it."""
+        data = super().to_representation(instance)
+        if hasattr(instance, 'is_unread'):
+            data['is_read'] = not instance.is_unread
+        return data
 
-        
 
+class BroadcastSerializer(serializers.ModelSerializer):
+    """
+    Serializer for broadcast requests and their delivery progress.
+
+    A broadcast targets `user_ids`, the members of `department`, or every user.
+    """
+
+    class Meta:
+        """
+        Meta options for the BroadcastSerializer.
+
+        Only the message and its target are writable; the rest reports delivery.
+        """
+        model = Broadcast
+        fields = ['id', 'title', 'message', 'target', 'department', 'user_ids', 'created_by',
+                  'status', 'delivered', 'error', 'created_at', 'finished_at']
+        read_only_fields = ['created_by', 'status', 'delivered', 'error', 'created_at',
+                            'finished_at']
+
+    def validate(self, attrs):
+        """Checks that the target comes with the department or users it needs."""
+        target = attrs.get('target')
+        if target == Broadcast.TARGET_DEPARTMENT and not attrs.get('department'):
+            raise serializers.ValidationError(
+                {'department': 'A department broadcast needs a department.'})
+        if target == Broadcast.TARGET_USERS:
+            user_ids = attrs.get('user_ids')
+            if (not isinstance(user_ids, list) or not user_ids
+                    or len(user_ids) > Broadcast.MAX_USER_IDS
+                    or any(isinstance(i, bool) or not isinstance(i, int) for i in user_ids)):
+                raise serializers.ValidationError({
+                    'user_ids': 'A users broadcast needs a list of at most '
+                                f'{Broadcast.MAX_USER_IDS} user ids.'})
+        return attrs
@@ -1,9 +1,18 @@
 # pylint: disable=no-member
-from django.contrib.auth.models import User
+import asyncio
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
-from .models import Notification
+from departments.models import Department
+from . import broadcast, push, reads
+from .models import Broadcast, Notification
 from rest_framework_simplejwt.tokens import RefreshToken
 import time
 
@@ -77,7 +86,8 @@ class NotificationTests(APITestCase):
         Notification.objects.create(user=self.user, title='Unread Notification 2', message='Mark as read')
         response = self.client.post(self.mark_all_read_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(Notification.objects.filter(user=self.user, is_read=True).count(), 2)
+        self.assertTrue(all(n['is_read'] for n in self.client.get(self.notification_url).data))
+        self.assertEqual(self.client.get(self.unread_notifications_url).data, [])
 
     def test_get_unread_notifications(self):
         """
@@ -89,6 +99,29 @@ class NotificationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def test_paginated_notification_lists(self):
+        """
+        Test that the list and unread actions page newest first with keyset cursors.
+        """
+        notifications = [Notification.objects.create(user=self.user, title=f'N{i}', message='M',
+                                                      is_read=i % 2 == 0)
+                         for i in range(5)]
+        Notification.objects.create(user=self.other_user, title='Not yours', message='M')
+
+        response = self.client.get(self.notification_url, {'page_size': 2})
+        self.assertEqual([n['title'] for n in response.data['results']], ['N4', 'N3'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([n['title'] for n in response.data['results']], ['N2', 'N1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([n['title'] for n in response.data['results']], ['N0'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(self.unread_notifications_url, {'page_size': 1})
+        self.assertEqual([n['id'] for n in response.data['results']], [notifications[3].id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([n['id'] for n in response.data['results']], [notifications[1].id])
+        self.assertIsNone(response.data['next'])
+
     def test_mark_notification_as_unread(self):
         """
         Test marking a specific notification as unread.
@@ -100,6 +133,39 @@ class NotificationTests(APITestCase):
         notification.refresh_from_db()
         self.assertFalse(notification.is_read)
 
+    def test_read_watermark_with_overrides(self):
+        """
+        Test that notifications behind the read watermark can be kept unread and read
+        again, and that newer ones are unaffected by it.
+        """
+        unread_count_url = reverse('notification-unread-count')
+        old = [Notification.objects.create(user=self.user, title=f'Old {i}', message='M')
+               for i in range(3)]
+        self.client.post(self.mark_all_read_url)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=True).exists())
+
+        self.client.post(reverse('notification-mark-as-unread', kwargs={'pk': old[1].pk}))
+        response = self.client.post(self.notification_url, {'title': 'New', 'message': 'M'},
+                                    format='json')
+        new = Notification.objects.get(pk=response.data['id'])
+        response = self.client.get(self.unread_notifications_url)
+        self.assertEqual([n['id'] for n in response.data], [new.id, old[1].id])
+        self.assertEqual(self.client.get(unread_count_url).data['unread'], 2)
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('Fixed 0 unread counters', out.getvalue())
+
+        response = self.client.post(reverse('notification-bulk-mark-as-read'),
+                                    {'ids': [old[0].id, old[1].id, new.id]}, format='json')
+        self.assertEqual(response.data['marked'], 2)
+        self.assertEqual(self.client.get(self.unread_notifications_url).data, [])
+        detail = self.client.get(reverse('notification-detail', kwargs={'pk': old[1].pk})).data
+        self.assertTrue(detail['is_read'])
+
+        response = self.client.post(reverse('notification-bulk-mark-as-read'), {'ids': 'all'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_delete_all_notifications(self):
         """
         Test deleting all notifications for the authenticated user.
@@ -148,3 +214,186 @@ class NotificationTests(APITestCase):
         response = self.client.post(self.notification_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Notification.objects.first().user, self.user)  # Should default to the authenticated user
+
+    def test_unread_count_follows_changes(self):
+        """
+        Test that the unread count tracks creation, reading, unreading and deletion.
+        """
+        url = reverse('notification-unread-count')
+        ids = [self.client.post(self.notification_url, {'title': f'N{i}', 'message': 'M'},
+                                format='json').data['id']
+               for i in range(3)]
+        self.assertEqual(self.client.get(url).data, {'unread': 3})
+
+        read_url = reverse('notification-mark-as-read', kwargs={'pk': ids[0]})
+        self.client.post(read_url)
+        self.client.post(read_url)
+        self.assertEqual(self.client.get(url).data['unread'], 2)
+        self.client.post(reverse('notification-mark-as-unread', kwargs={'pk': ids[0]}))
+        self.client.patch(reverse('notification-detail', kwargs={'pk': ids[1]}), {'is_read': True},
+                          format='json')
+        self.client.delete(reverse('notification-detail', kwargs={'pk': ids[2]}))
+        self.assertEqual(self.client.get(url).data['unread'], 1)
+        self.client.post(self.mark_all_read_url)
+        self.assertEqual(self.client.get(url).data['unread'], 0)
+
+        self.client.post(self.notification_url, {'title': 'Again', 'message': 'M'}, format='json')
+        self.client.delete(self.delete_all_url)
+        self.assertEqual(self.client.get(url).data['unread'], 0)
+
+        Notification.objects.create(user=self.user, title='Behind the back', message='M')
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('Fixed 1 unread counters', out.getvalue())
+        self.assertEqual(self.client.get(url).data['unread'], 1)
+
+    def test_broadcast_to_department_and_users(self):
+        """Test that broadcasts are accepted at once and then delivered in chunks."""
+        url = reverse('broadcast-list')
+        self.user.is_staff = True
+        self.user.save(update_fields=['is_staff'])
+        department = Department.objects.create(name='Maintenance')
+        members = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+        department.members.set(members)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(url, {'title': 'Shutdown',
+                                              'message': 'Line 3 stops at noon',
+                                              'target': 'department', 'department': department.id},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Broadcast.STATUS_PENDING)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Notification.objects.count(), 0)
+
+        stale = Broadcast.objects.get(pk=response.data['id'])
+        # Small chunks, so the delivery takes several transactions.
+        with mock.patch.object(broadcast, 'CHUNK_SIZE', 2):
+            broadcast.deliver(response.data['id'])
+        sent = Broadcast.objects.get(pk=response.data['id'])
+        self.assertEqual((sent.status, sent.delivered, sent.last_user_id),
+                         ('done', 3, members[-1].id))
+        self.assertEqual(set(Notification.objects.values_list('user_id', flat=True)),
+                         {m.id for m in members})
+        # A second delivery holding outdated progress doesn't notify anyone twice.
+        self.assertEqual(broadcast.deliver_chunk(stale), 0)
+        self.assertEqual(Notification.objects.count(), 3)
+        member_client = APIClient()
+        token = RefreshToken.for_user(members[0]).access_token
+        member_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(member_client.get(reverse('notification-unread-count')).data['unread'], 1)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(url, {'title': 'Hi', 'message': 'M', 'target': 'users',
+                                              'user_ids': [self.other_user.id]}, format='json')
+        broadcast.deliver(response.data['id'])
+        self.assertEqual(Notification.objects.filter(user=self.other_user).count(), 1)
+        self.assertEqual(self.client.get(url).data[0]['delivered'], 1)
+
+        response = self.client.post(url, {'title': 'Hi', 'message': 'M', 'target': 'department'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'title': 'Hi', 'message': 'M', 'target': 'users',
+                                          'user_ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_broadcast_permissions(self):
+        """Test that only staff broadcast widely and that user lists are capped."""
+        url = reverse('broadcast-list')
+        data = {'title': 'Hi', 'message': 'M', 'target': 'users', 'user_ids': [self.other_user.id]}
+        response = self.client.post(url, {'title': 'Hi', 'message': 'M', 'target': 'all'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Broadcast.objects.exists())
+
+        self.user.user_permissions.add(Permission.objects.get(codename='add_broadcast'))
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        too_many = list(range(1, Broadcast.MAX_USER_IDS + 2))
+        response = self.client.post(url, {**data, 'user_ids': too_many}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(NOTIFICATION_PUSH_POLL_SECONDS=0.05)
+class NotificationStreamTests(TestCase):
+    """
+    Test suite for the Server-Sent Events notification stream.
+    """
+
+    def setUp(self):
+        """Create two users and an access token for the first."""
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.other_user = User.objects.create_user(username='otheruser', password='password456')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.url = reverse('notification_stream')
+
+    def test_stream_refused_outside_asgi(self):
+        """Test that the stream answers 501 instead of hanging a WSGI worker."""
+        response = self.client.get(self.url, {'token': self.token})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_stream_requires_token(self):
+        """Test that the stream rejects requests without a valid token."""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(self.url, {'token': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_pushes_new_notifications_of_the_user(self):
+        """
+        Test that new notifications are pushed to their user only, after a
+        missed-event replay.
+        """
+        missed = await Notification.objects.acreate(user=self.user, title='Missed',
+                                                    message='Before connecting')
+        response = await self.async_client.get(self.url, {'token': self.token},
+                                               headers={'Last-Event-ID': str(missed.id - 1)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n\n')
+        self.assertIn(b'"title": "Missed"', await anext(events))
+
+        # Let the hub take its starting point before anything new is created.
+        await asyncio.sleep(0.1)
+        await Notification.objects.acreate(user=self.other_user, title='Not yours',
+                                           message='Hidden')
+        created = await Notification.objects.acreate(user=self.user, title='Machine down',
+                                                     message='Line 3')
+        event = (await asyncio.wait_for(anext(events), 2)).decode()
+        self.assertTrue(event.startswith(f'id: {created.id}\nevent: notification\n'))
+        self.assertIn('"title": "Machine down"', event)
+        self.assertEqual(set(push.hub.subscribers), {self.user.id})
+
+    async def test_hub_keeps_polling_after_a_failed_poll(self):
+        """Test that a failed poll is retried instead of ending the push to connected clients."""
+        real_poll = push.Hub.poll
+        calls = []
+
+        async def flaky_poll(hub):
+            calls.append(hub)
+            if len(calls) == 1:
+                raise RuntimeError('Connection lost')
+            return await real_poll(hub)
+
+        with (mock.patch.object(push.Hub, 'poll', flaky_poll),
+              self.assertLogs('notifications.push', 'ERROR')):
+            queue = push.hub.subscribe(self.user.id)
+            try:
+                await asyncio.sleep(0.1)
+                created = await Notification.objects.acreate(user=self.user,
+                                                             title='After the outage', message='M')
+                data = await asyncio.wait_for(queue.get(), 2)
+            finally:
+                push.hub.unsubscribe(self.user.id, queue)
+        self.assertEqual(data['id'], created.id)
+        self.assertGreater(len(calls), 1)
+
+    async def test_pushed_notifications_report_derived_read_state(self):
+        """Test that replayed notifications are read once the read watermark passes them."""
+        notification = await Notification.objects.acreate(user=self.user, title='Old', message='M')
+        await sync_to_async(reads.mark_all_read)(self.user.id)
+        [data] = await push.backlog(self.user.id, notification.id - 1)
+        self.assertTrue(data['is_read'])
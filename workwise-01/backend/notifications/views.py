@@ -1,10 +1,38 @@
 # pylint: disable=no-member
-from rest_framework import viewsets, permissions, status
+import asyncio
+import json
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Notification
-from .serializers import NotificationSerializer
+from . import counters, push, reads
+from .broadcast import submit
+from .models import Broadcast, Notification
+from .serializers import BroadcastSerializer, NotificationSerializer
 from rest_framework.permissions import IsAuthenticated
+from backend.pagination import KeysetPagination
+
+
+class NotificationPagination(KeysetPagination):
+    """
+    Keyset pagination for notification lists, newest first.
+
+    Backed by `notification_user_created_idx` and, for the unread list,
+    `notification_user_unread_idx`. Only applied when the client passes `cursor`
+    or `page_size`, so callers expecting the full list are unaffected.
+    """
+    ordering = ('-created_at', '-id')
+    optional = True
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -28,23 +56,33 @@ class NotificationViewSet(viewsets.ModelViewSet):
         serializer_class (Serializer): The serializer used to validate and 
                                        serialize Notification data.
         permission_classes (list): Restricts access to authenticated users only.
+        pagination_class (Pagination): Keyset pagination of the list and unread
+                                       actions, when the client asks for pages.
     """
 
-    queryset = Notification.objects.all().order_by('-created_at')
+    queryset = Notification.objects.all().order_by('-created_at', '-id')
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
         """
         Returns the queryset of notifications for the authenticated user.
 
         Overrides the default `get_queryset` method to filter notifications 
-        so that users can only access their own notifications.
+        so that users can only access their own notifications, annotated with
+        their read state under the user's read watermark.
 
         Returns:
             QuerySet: A queryset of Notification objects belonging to the current user.
         """
-        return self.queryset.filter(user=self.request.user)
+        return reads.with_read_state(self.queryset.filter(user=self.request.user),
+                                     self.read_watermark)
+
+    @cached_property
+    def read_watermark(self):
+        """The read watermark of the authenticated user, read once per request."""
+        return reads.watermark(self.request.user.id)
 
     def perform_create(self, serializer):
         """
@@ -56,7 +94,33 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Args:
             serializer (Serializer): The serializer instance with validated data.
         """
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            counters.lock([self.request.user.id])
+            notification = serializer.save(user=self.request.user)
+            counters.created([notification])
+
+    def perform_update(self, serializer):
+        """
+        Saves the notification; a change of `is_read` goes through the read state.
+
+        Args:
+            serializer (Serializer): The serializer instance with validated data.
+        """
+        is_read = serializer.validated_data.pop('is_read', None)
+        with transaction.atomic():
+            notification = serializer.save()
+            if is_read is not None:
+                reads.set_read(notification.user_id, [notification.pk], read=is_read)
+                notification.is_unread = not is_read
+
+    def perform_destroy(self, instance):
+        """
+        Deletes the notification, uncounting it if it was unread.
+
+        Args:
+            instance (Notification): The notification to delete.
+        """
+        reads.delete(instance)
 
     @action(detail=True, methods=['post'], url_path='mark-read')
     def mark_as_read(self, request, pk=None):
@@ -70,27 +134,48 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Returns:
             Response: A success message or an error message if the notification is not found.
         """
-        try:
-            notification = Notification.objects.get(pk=pk, user=self.request.user)
-            notification.is_read = True
-            notification.save()
-            return Response({'message': 'Notification marked as read'}, status=status.HTTP_200_OK)
-        except Notification.DoesNotExist:
+        marked = reads.set_read(request.user.id, [pk])
+        if not marked and not self.get_queryset().filter(pk=pk).exists():
             return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'message': 'Notification marked as read'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-mark-read')
+    def bulk_mark_as_read(self, request):
+        """
+        Marks the notifications listed in `ids` as read with one set-based update.
+
+        Args:
+            request (Request): The HTTP request object, with ``{"ids": [...]}``.
+
+        Returns:
+            Response: The number of notifications that were unread and are now read.
+            Ids of notifications that are already read or not the user's are ignored.
+        """
+        ids = request.data.get('ids')
+        if (not isinstance(ids, list) or not ids or len(ids) > reads.MAX_IDS
+                or any(isinstance(i, bool) or not isinstance(i, int) for i in ids)):
+            return Response(
+                {'error': f'ids must be a list of at most {reads.MAX_IDS} notification ids'},
+                status=status.HTTP_400_BAD_REQUEST)
+        count = reads.set_read(request.user.id, ids)
+        return Response({'message': f'{count} notifications marked as read', 'marked': count},
+                        status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], url_path='mark-all-read')
     def mark_all_as_read(self, request):
         """
         Marks all unread notifications for the authenticated user as read.
 
+        Moves the user's read watermark to their newest notification, a single-row
+        write however many notifications were unread.
+
         Args:
             request (Request): The HTTP request object.
 
         Returns:
             Response: A success message indicating the number of notifications marked as read.
         """
-        notifications = Notification.objects.filter(user=self.request.user, is_read=False)
-        count = notifications.update(is_read=True)
+        count = reads.mark_all_read(request.user.id)
         return Response({'message': f'All {count} notifications marked as read'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='unread')
@@ -102,12 +187,31 @@ class NotificationViewSet(viewsets.ModelViewSet):
             request (Request): The HTTP request object.
 
         Returns:
-            Response: A list of unread notifications.
+            Response: A list of unread notifications, newest first, or one page of
+            it when pagination was requested.
         """
-        notifications = Notification.objects.filter(user=self.request.user, is_read=False)
+        notifications = self.get_queryset().filter(reads.unread_q(self.read_watermark))
+        page = self.paginate_queryset(notifications)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(notifications, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        Retrieves the number of unread notifications of the authenticated user.
+
+        Served from the user's counter row, without touching the notifications.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: ``{"unread": <count>}``.
+        """
+        return Response({'unread': counters.unread_count(request.user)}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='mark-unread')
     def mark_as_unread(self, request, pk=None):
         """
@@ -120,13 +224,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Returns:
             Response: A success message or an error message if the notification is not found.
         """
-        try:
-            notification = Notification.objects.get(pk=pk, user=self.request.user)
-            notification.is_read = False
-            notification.save()
-            return Response({'message': 'Notification marked as unread'}, status=status.HTTP_200_OK)
-        except Notification.DoesNotExist:
+        marked = reads.set_read(request.user.id, [pk], read=False)
+        if not marked and not self.get_queryset().filter(pk=pk).exists():
             return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'message': 'Notification marked as unread'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['delete'], url_path='delete-all')
     def delete_all_notifications(self, request):
@@ -139,7 +240,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Returns:
             Response: A success message indicating the number of notifications deleted.
         """
-        count = Notification.objects.filter(user=self.request.user).delete()[0]
+        with transaction.atomic():
+            counters.reset(self.request.user)
+            count = Notification.objects.filter(user=self.request.user).delete()[0]
         return Response({'message': f'All {count} notifications deleted'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='recent')
@@ -153,6 +256,121 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Returns:
             Response: A list of the 5 most recent notifications.
         """
-        notifications = Notification.objects.filter(user=self.request.user).order_by('-created_at')[:5]
+        notifications = self.get_queryset()[:5]
         serializer = self.get_serializer(notifications, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class BroadcastViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    ViewSet for sending a notification to a list of users, a department or everyone.
+
+    Creating a broadcast answers 202 right away; the notifications are written in
+    the background (see `notifications.broadcast`) and the broadcast's `status` and
+    `delivered` count report the progress. Users see the broadcasts they sent.
+
+    Only staff may notify a department or everyone; notifying a list of users
+    also takes the `notifications.add_broadcast` permission.
+    """
+
+    queryset = Broadcast.objects.order_by('-id')
+    serializer_class = BroadcastSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Returns the broadcasts sent by the authenticated user."""
+        return self.queryset.filter(created_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """Records the broadcast and queues its delivery; returns 202 Accepted."""
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if not user.is_staff and (serializer.validated_data['target'] != Broadcast.TARGET_USERS
+                                  or not user.has_perm('notifications.add_broadcast')):
+            raise PermissionDenied('You are not allowed to send this broadcast.')
+        broadcast = serializer.save(created_by=user)
+        submit(broadcast)
+
+
+def authenticate_stream(request):
+    """
+    Returns the user of an event-stream request, or None.
+
+    Browsers' `EventSource` can't send headers, so besides the usual
+    ``Authorization: Bearer`` header the access token is accepted as `?token=`.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header:
+        raw_token = authenticator.get_raw_token(header)
+    else:
+        raw_token = request.GET.get('token', '').encode()
+    if not raw_token:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def sse_event(data):
+    """Formats a serialized notification as a Server-Sent Event."""
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f'id: {data["id"]}\nevent: notification\ndata: {payload}\n\n'
+
+
+async def notification_stream(request):
+    """
+    Streams the user's new notifications as Server-Sent Events.
+
+    Only served by the ASGI application, where a connection waits on the
+    in-process hub (see `notifications.push`) without holding a thread. Under
+    WSGI (including ``runserver``) the stream would tie up a worker thread for
+    good, so it answers 501 instead. Clients reconnecting with a
+    ``Last-Event-ID`` header first get what they missed.
+
+    Args:
+        request (HttpRequest): A GET request authenticated with a JWT access token.
+
+    Returns:
+        StreamingHttpResponse: A ``text/event-stream`` response that lasts until
+        the client disconnects.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'The notification stream needs the ASGI server '
+                                      '(uvicorn backend.asgi:application)'}, status=501)
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided or are invalid'}, status=401)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    heartbeat = getattr(settings, 'NOTIFICATION_PUSH_HEARTBEAT_SECONDS', 15)
+
+    async def events():
+        queue = push.hub.subscribe(user.id)
+        try:
+            yield 'retry: 3000\n\n'
+            if last_event_id.isdigit():
+                for data in await push.backlog(user.id, int(last_event_id)):
+                    yield sse_event(data)
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield sse_event(data)
+        finally:
+            push.hub.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
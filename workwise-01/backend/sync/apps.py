@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    """
+    Configuration class for the Sync application.
+
+    Registers the application under the name 'sync' and connects the signal
+    handlers that record a tombstone whenever a synced row is deleted.
+    """
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sync'
+
+    def ready(self):
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
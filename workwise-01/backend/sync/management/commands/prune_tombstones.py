@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    """
+    Deletes tombstones older than the sync retention period.
+
+    Clients whose watermark is older than the retention period are told to do a
+    full resync, so these tombstones are never read again.
+    """
+
+    help = 'Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **options):
+        days = getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=days)
+        count, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} tombstones older than {days} days.'))
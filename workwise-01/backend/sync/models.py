@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Model recording the deletion of a row that clients keep a synced copy of.
+
+    Attributes:
+        model (CharField): The sync name of the deleted row's table, e.g. 'jobs'.
+        object_id (BigIntegerField): The primary key the deleted row had.
+        deleted_at (DateTimeField): The timestamp of the deletion, auto-set on creation.
+    """
+
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options; tombstones are read by time range, per model."""
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the tombstone.
+
+        Returns:
+            str: The model name and id of the deleted row.
+        """
+        return f"{self.model} #{self.object_id} deleted at {self.deleted_at}"
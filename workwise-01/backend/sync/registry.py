@@ -0,0 +1,28 @@
+"""
+The tables exposed through the delta-sync API.
+
+Each entry maps the name used in sync responses to the model and the serializer
+its rows are rendered with. Every model listed here must have an indexed
+`updated_at` column that is bumped on every write, including `QuerySet.update()`.
+"""
+from departments.models import Department
+from departments.serializers import DepartmentSerializer
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+from machines.models import Machine, MaintenanceTicket
+from machines.serializers import MachineSerializer, MaintenanceTicketSerializer
+
+SYNCED_MODELS = {
+    'jobs': (Job, JobSerializer),
+    'machines': (Machine, MachineSerializer),
+    'tickets': (MaintenanceTicket, MaintenanceTicketSerializer),
+    'departments': (Department, DepartmentSerializer),
+}
+
+
+def sync_name(model):
+    """Returns the sync name of `model`, or None if it isn't synced."""
+    for name, (synced, _) in SYNCED_MODELS.items():
+        if synced is model:
+            return name
+    return None
@@ -0,0 +1,57 @@
+import contextvars
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from .models import Tombstone
+from .registry import SYNCED_MODELS, sync_name
+
+# The model `bulk_delete()` is currently deleting from, whose tombstones it
+# writes itself.
+_bulk_deleting = contextvars.ContextVar('sync_bulk_deleting', default=None)
+
+
+def record_tombstone(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Records a tombstone for a deleted row of a synced model.
+
+    Also fires for rows removed by `QuerySet.delete()` and by cascades, since
+    Django sends `post_delete` for each collected object. Rows deleted through
+    `bulk_delete()` are skipped; it records theirs with a single insert.
+    """
+    if _bulk_deleting.get() is sender:
+        return
+    Tombstone.objects.create(model=sync_name(sender), object_id=instance.pk)
+
+
+def bulk_delete(model, ids):
+    """
+    Deletes the rows of a synced `model` with the given ids, recording their
+    tombstones with one multi-row insert instead of one insert per row.
+
+    Args:
+        model (Model): The synced model to delete from.
+        ids (list): The primary keys of the rows to delete.
+
+    Returns:
+        int: The number of rows of `model` deleted.
+    """
+    ids = list(ids)
+    with transaction.atomic():
+        token = _bulk_deleting.set(model)
+        try:
+            _, deleted = model.objects.filter(pk__in=ids).delete()
+        finally:
+            _bulk_deleting.reset(token)
+        count = deleted.get(model._meta.label, 0)
+        if count:
+            name = sync_name(model)
+            Tombstone.objects.bulk_create([Tombstone(model=name, object_id=pk) for pk in ids],
+                                          batch_size=1000)
+    return count
+
+
+# Connected per model rather than for every sender: a receiver without a sender
+# would disable Django's fast-delete path for every table in the project.
+for name, (model, _) in SYNCED_MODELS.items():
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'sync_tombstone_{name}')
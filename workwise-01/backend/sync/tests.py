@@ -0,0 +1,93 @@
+# pylint: disable=no-member
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from departments.models import Department
+from jobs.models import Job
+from machines.models import Machine, MaintenanceTicket
+from .models import Tombstone
+from .signals import bulk_delete
+
+
+class ChangesAPITestCase(APITestCase):
+    """
+    Test cases for the delta-sync endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up a test user with a JWT token and one row in each synced table.
+        """
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('sync_changes')
+
+        self.department = Department.objects.create(name='Assembly')
+        self.machine = Machine.objects.create(name='Press', model_number='P1', location='Hall A',
+                                              status='operational')
+        self.ticket = MaintenanceTicket.objects.create(machine=self.machine,
+                                                       issue_description='Leak',
+                                                       reported_by=self.user, status='open')
+        self.job = Job.objects.create(title='Job', description='Sync me', priority=1,
+                                      scheduled_date='2024-12-01')
+
+    def test_initial_sync_returns_everything(self):
+        """An initial sync returns every row and asks the client to reset."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['reset'])
+        for name in ('jobs', 'machines', 'tickets', 'departments'):
+            self.assertEqual(len(response.data['changes'][name]), 1)
+
+    def test_sync_since_watermark_returns_changes_and_deletes(self):
+        """A sync from a watermark only returns rows changed or deleted after it."""
+        since = timezone.now()
+        Job.objects.filter(pk=self.job.pk).update(updated_at=since - timedelta(minutes=1))
+        self.machine.status = 'maintenance'
+        self.machine.save()
+        department_id = self.department.id
+        self.department.delete()
+
+        response = self.client.get(self.url, {'since': since.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['reset'])
+        self.assertEqual([m['id'] for m in response.data['changes']['machines']], [self.machine.id])
+        self.assertEqual(response.data['changes']['jobs'], [])
+        self.assertEqual(response.data['deleted']['departments'], [department_id])
+
+    def test_cascaded_deletes_leave_tombstones(self):
+        """Deleting a machine records tombstones for its tickets too."""
+        machine_id, ticket_id = self.machine.id, self.ticket.id
+        self.machine.delete()
+        self.assertTrue(Tombstone.objects.filter(model='machines', object_id=machine_id).exists())
+        self.assertTrue(Tombstone.objects.filter(model='tickets', object_id=ticket_id).exists())
+
+    def test_bulk_delete_records_tombstones_in_one_insert(self):
+        """Bulk-deleted rows get one tombstone each, written with a single insert."""
+        jobs = Job.objects.bulk_create([Job(title=f'Job {i}', description='Bulk', priority=1,
+                                            scheduled_date='2024-12-01') for i in range(3)])
+        ids = [self.job.id] + [job.id for job in jobs]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(bulk_delete(Job, ids), 4)
+        self.assertEqual(sum('sync_tombstone' in query['sql'] and query['sql'].startswith('INSERT')
+                             for query in queries), 1)
+        tombstones = Tombstone.objects.filter(model='jobs').values_list('object_id', flat=True)
+        self.assertEqual(sorted(tombstones), ids)
+
+    def test_invalid_watermark(self):
+        """A malformed watermark is rejected."""
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_watermark_forces_reset(self):
+        """A watermark older than the tombstone retention forces a full resync."""
+        since = timezone.now() - timedelta(days=365)
+        response = self.client.get(self.url, {'since': since.isoformat()})
+        self.assertTrue(response.data['reset'])
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import ChangesView
+
+urlpatterns = [
+    path('changes/', ChangesView.as_view(), name='sync_changes'),
+]
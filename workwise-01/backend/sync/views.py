@@ -0,0 +1,78 @@
+# pylint: disable=no-member
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Tombstone
+from .registry import SYNCED_MODELS
+
+# Rows are stamped with `updated_at` before their transaction commits, so a row can
+# become visible slightly after a watermark later than its timestamp was issued.
+# Handing out a watermark a few seconds in the past makes the next sync re-read
+# that window; clients upsert by id, so seeing a row twice is harmless.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+class ChangesView(APIView):
+    """
+    API view returning the rows changed since a watermark.
+
+    Covers jobs, machines, maintenance tickets and departments. Changed rows are
+    found with a range scan on each table's `updated_at` index and deletions come
+    from the tombstone table, so a sync costs what changed rather than the size of
+    the tables.
+    """
+
+    def get(self, request):
+        """
+        Handle GET requests for the changes since `since`.
+
+        Query parameters:
+            since (str): The `watermark` returned by the previous sync. Omit it for
+                         an initial full sync.
+
+        Returns:
+            Response: The changed rows and deleted ids per table, plus the watermark
+            for the next call. `reset` is true when the client must replace its
+            copy instead of applying changes: on an initial sync, or when `since`
+            is older than the tombstone retention period.
+        """
+        started = timezone.now()
+        since = None
+        if 'since' in request.query_params:
+            try:
+                since = parse_datetime(request.query_params['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                return Response({'error': 'since must be a watermark returned by this endpoint'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
+
+        retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+        if since is not None and since < started - retention:
+            since = None
+
+        changes, deleted = {}, {}
+        for name, (model, serializer_class) in SYNCED_MODELS.items():
+            rows = model.objects.order_by('updated_at', 'id')
+            tombstones = []
+            if since is not None:
+                rows = rows.filter(updated_at__gt=since)
+                tombstones = Tombstone.objects.filter(model=name, deleted_at__gt=since)
+                tombstones = sorted(set(tombstones.values_list('object_id', flat=True)))
+            changes[name] = serializer_class(rows, many=True).data
+            deleted[name] = tombstones
+
+        return Response({
+            'watermark': started - WATERMARK_OVERLAP,
+            'reset': since is None,
+            'changes': changes,
+            'deleted': deleted,
+        })
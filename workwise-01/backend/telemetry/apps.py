@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class TelemetryConfig(AppConfig):
+    """
+    Configuration class for the Telemetry application.
+
+    Registers the application under the name 'telemetry', which stores raw machine
+    sensor readings and their per-minute and per-hour rollups.
+    """
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'telemetry'
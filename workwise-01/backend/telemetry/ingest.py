@@ -0,0 +1,186 @@
+# pylint: disable=no-member
+"""
+Batched ingestion of machine telemetry.
+
+A batch is validated up front, then written in one transaction: raw readings go
+in with PostgreSQL `COPY` (or `bulk_create` elsewhere), and the batch is folded
+into per-minute and per-hour aggregates in memory and merged into `Rollup` with
+multi-row ``INSERT ... ON CONFLICT DO UPDATE`` statements that add counts and
+sums and widen min/max. Each rollup row is touched once per batch however many
+readings fall in it, and rows are upserted in key order so concurrent batches
+for the same machines can't deadlock.
+"""
+import datetime
+import io
+import math
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from machines.models import Machine
+from .models import METRIC_CHOICES, Reading, Rollup
+
+MAX_BATCH_SIZE = 10000
+METRICS = frozenset(value for value, _ in METRIC_CHOICES)
+
+
+class InvalidBatch(ValueError):
+    """
+    Raised when a batch contains malformed readings.
+
+    Attributes:
+        errors (list): ``{'index': i, 'error': message}`` for each bad reading.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid readings')
+        self.errors = errors
+
+
+def parse_batch(items):
+    """
+    Validates raw readings from a request.
+
+    Args:
+        items (list): Dicts with ``machine``, ``metric``, ``value`` and ``recorded_at``.
+
+    Returns:
+        list: ``(machine_id, metric, value, recorded_at)`` tuples, times in UTC.
+
+    Raises:
+        InvalidBatch: If any reading is malformed or names an unknown machine.
+    """
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise TypeError('reading must be an object')
+            machine_id, metric, value = item['machine'], item['metric'], item['value']
+            if isinstance(machine_id, bool) or not isinstance(machine_id, int):
+                raise ValueError('machine must be an id')
+            if metric not in METRICS:
+                raise ValueError(f'metric must be one of {", ".join(sorted(METRICS))}')
+            if (isinstance(value, bool) or not isinstance(value, (int, float))
+                    or not math.isfinite(value)):
+                raise ValueError('value must be a finite number')
+            recorded_at = item['recorded_at']
+            recorded_at = parse_datetime(recorded_at) if isinstance(recorded_at, str) else None
+            if recorded_at is None:
+                raise ValueError('recorded_at must be an ISO 8601 timestamp')
+        except (KeyError, TypeError, ValueError) as exc:
+            message = f'{exc.args[0]} is required' if isinstance(exc, KeyError) else str(exc)
+            errors.append({'index': index, 'error': message})
+            continue
+        if timezone.is_naive(recorded_at):
+            recorded_at = timezone.make_aware(recorded_at, datetime.timezone.utc)
+        rows.append((machine_id, metric, float(value),
+                     recorded_at.astimezone(datetime.timezone.utc)))
+
+    if not errors:
+        machine_ids = {row[0] for row in rows}
+        known = set(Machine.objects.filter(id__in=machine_ids).values_list('id', flat=True))
+        errors = [{'index': index, 'error': f'Machine {row[0]} does not exist'}
+                  for index, row in enumerate(rows) if row[0] not in known]
+    if errors:
+        raise InvalidBatch(errors)
+    return rows
+
+
+def write_readings(rows):
+    """Appends raw readings, with `COPY` on PostgreSQL."""
+    if connection.vendor != 'postgresql':
+        Reading.objects.bulk_create(
+            [Reading(machine_id=m, metric=metric, value=v, recorded_at=t)
+             for m, metric, v, t in rows],
+            batch_size=2000,
+        )
+        return
+    buffer = io.StringIO()
+    for machine_id, metric, value, recorded_at in rows:
+        buffer.write(f'{machine_id}\t{metric}\t{value!r}\t{recorded_at.isoformat()}\n')
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {Reading._meta.db_table} (machine_id, metric, value, recorded_at) FROM STDIN',
+            buffer,
+        )
+
+
+def aggregate(rows):
+    """
+    Folds readings into per-minute and per-hour aggregates.
+
+    Returns:
+        dict: Maps ``(machine_id, metric, resolution, bucket)`` to
+        ``[count, total, minimum, maximum]``.
+    """
+    buckets = {}
+    for machine_id, metric, value, recorded_at in rows:
+        minute = recorded_at.replace(second=0, microsecond=0)
+        for resolution, bucket in ((Rollup.RESOLUTION_MINUTE, minute),
+                                   (Rollup.RESOLUTION_HOUR, minute.replace(minute=0))):
+            key = (machine_id, metric, resolution, bucket)
+            current = buckets.get(key)
+            if current is None:
+                buckets[key] = [1, value, value, value]
+            else:
+                current[0] += 1
+                current[1] += value
+                current[2] = min(current[2], value)
+                current[3] = max(current[3], value)
+    return buckets
+
+
+def merge_rollups(buckets):
+    """
+    Adds `buckets` (as returned by `aggregate`) into the rollup table.
+    """
+    table = Rollup._meta.db_table
+    if connection.vendor == 'postgresql':
+        least, greatest, rows_per_statement = 'LEAST', 'GREATEST', 1000
+    else:
+        # SQLite's two-argument min()/max() are scalar, and older builds cap a
+        # statement at 999 parameters.
+        least, greatest, rows_per_statement = 'MIN', 'MAX', 100
+    adapt = connection.ops.adapt_datetimefield_value
+
+    items = sorted(buckets.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), rows_per_statement):
+            chunk = items[start:start + rows_per_statement]
+            params = []
+            for (machine_id, metric, resolution, bucket), stats in chunk:
+                params += [machine_id, metric, resolution, adapt(bucket), *stats]
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(chunk))
+            cursor.execute(
+                f'INSERT INTO {table} '
+                f'(machine_id, metric, resolution, bucket, count, total, minimum, maximum) '
+                f'VALUES {values} '
+                f'ON CONFLICT (machine_id, metric, resolution, bucket) DO UPDATE SET '
+                f'count = {table}.count + excluded.count, '
+                f'total = {table}.total + excluded.total, '
+                f'minimum = {least}({table}.minimum, excluded.minimum), '
+                f'maximum = {greatest}({table}.maximum, excluded.maximum)',
+                params,
+            )
+
+
+def ingest(items):
+    """
+    Validates and stores a batch of readings and updates the rollups.
+
+    Args:
+        items (list): Raw readings, see `parse_batch`.
+
+    Returns:
+        int: The number of readings stored.
+
+    Raises:
+        InvalidBatch: If any reading is malformed; nothing is stored then.
+    """
+    rows = parse_batch(items)
+    with transaction.atomic():
+        write_readings(rows)
+        merge_rollups(aggregate(rows))
+    return len(rows)
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from telemetry.models import Reading
+
+
+class Command(BaseCommand):
+    """
+    Deletes raw telemetry readings past the retention period.
+
+    Charts read the rollups, which are kept, so old raw points are only needed for
+    ad-hoc analysis. Rows go in batches to keep each delete transaction short.
+    """
+
+    help = 'Delete raw readings older than TELEMETRY_RAW_RETENTION_DAYS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Number of readings deleted per statement.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        days = getattr(settings, 'TELEMETRY_RAW_RETENTION_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=days)
+        total = 0
+        while True:
+            ids = list(Reading.objects.filter(recorded_at__lt=cutoff)
+                       .values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            Reading.objects.filter(id__in=ids).delete()
+            total += len(ids)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} readings older than {days} days.'))
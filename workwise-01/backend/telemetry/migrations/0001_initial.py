@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Readings arrive roughly in time order, so a BRIN index on recorded_at covers
+# time-range scans (charts over raw data, pruning) at a tiny fraction of a B-tree's
+# size and insert cost. SQLite has no BRIN; the composite index serves there.
+CREATE_BRIN_SQL = 'CREATE INDEX reading_recorded_brin_idx ON telemetry_reading USING brin (recorded_at)'
+DROP_BRIN_SQL = 'DROP INDEX IF EXISTS reading_recorded_brin_idx'
+
+
+def create_brin_index(apps, schema_editor):  # pylint: disable=unused-argument
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_BRIN_SQL)
+
+
+def drop_brin_index(apps, schema_editor):  # pylint: disable=unused-argument
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_BRIN_SQL)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('machines', '0005_maintenance_interval'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('temperature', 'Temperature'), ('vibration', 'Vibration'), ('run_hours', 'Run hours')], max_length=20)),
+                ('value', models.FloatField()),
+                ('recorded_at', models.DateTimeField()),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='machines.machine')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['machine', 'metric', 'recorded_at'], name='reading_machine_metric_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('temperature', 'Temperature'), ('vibration', 'Vibration'), ('run_hours', 'Run hours')], max_length=20)),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('total', models.FloatField()),
+                ('minimum', models.FloatField()),
+                ('maximum', models.FloatField()),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='machines.machine')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('machine', 'metric', 'resolution', 'bucket'), name='rollup_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,98 @@
+from django.db import models
+
+
+METRIC_CHOICES = [
+    ('temperature', 'Temperature'),
+    ('vibration', 'Vibration'),
+    ('run_hours', 'Run hours'),
+]
+"""Sensor metrics a machine can report."""
+
+
+class Reading(models.Model):
+    """
+    Model representing one raw sensor reading of a machine.
+
+    The table is append-only and written in bulk by `telemetry.ingest`. Charts read
+    `Rollup` instead, so raw rows are only scanned by time range.
+
+    Attributes:
+        machine (ForeignKey): The machine that reported the reading.
+        metric (CharField): What was measured, one of `METRIC_CHOICES`.
+        value (FloatField): The measured value.
+        recorded_at (DateTimeField): When the sensor took the reading.
+    """
+
+    machine = models.ForeignKey('machines.Machine', on_delete=models.CASCADE,
+                                related_name='readings')
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    value = models.FloatField()
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        """Meta options; readings are looked up per machine and metric over time."""
+        indexes = [
+            models.Index(fields=['machine', 'metric', 'recorded_at'],
+                         name='reading_machine_metric_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the reading.
+
+        Returns:
+            str: The machine id, metric, value and time.
+        """
+        return f"Machine {self.machine_id} {self.metric}={self.value} at {self.recorded_at}"
+
+
+class Rollup(models.Model):
+    """
+    Model holding the aggregate of one metric of one machine over a time bucket.
+
+    Rollups are merged into with every ingested batch rather than recomputed, so
+    they are always current and a chart reads one row per bucket.
+
+    Attributes:
+        machine (ForeignKey): The machine the readings came from.
+        metric (CharField): The metric aggregated.
+        resolution (CharField): The bucket width, 'minute' or 'hour'.
+        bucket (DateTimeField): The start of the bucket.
+        count (IntegerField): Number of readings in the bucket.
+        total (FloatField): Sum of their values.
+        minimum (FloatField): Smallest value.
+        maximum (FloatField): Largest value.
+    """
+
+    RESOLUTION_MINUTE = 'minute'
+    RESOLUTION_HOUR = 'hour'
+    RESOLUTION_CHOICES = [
+        (RESOLUTION_MINUTE, 'Minute'),
+        (RESOLUTION_HOUR, 'Hour'),
+    ]
+
+    machine = models.ForeignKey('machines.Machine', on_delete=models.CASCADE,
+                                related_name='rollups')
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField()
+    count = models.IntegerField()
+    total = models.FloatField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+
+    class Meta:
+        """Meta options; one row per machine, metric, resolution and bucket."""
+        constraints = [
+            models.UniqueConstraint(fields=['machine', 'metric', 'resolution', 'bucket'],
+                                    name='rollup_unique_bucket'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the rollup.
+
+        Returns:
+            str: The machine id, metric and bucket.
+        """
+        return f"Machine {self.machine_id} {self.metric} {self.resolution} {self.bucket}"
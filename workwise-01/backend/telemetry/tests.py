@@ -0,0 +1,70 @@
+# pylint: disable=no-member
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from machines.models import Machine
+from .models import Reading, Rollup
+
+
+class TelemetryAPITestCase(APITestCase):
+    """
+    Test cases for telemetry ingestion and chart endpoints.
+    """
+
+    def setUp(self):
+        """
+        Set up a test user with a JWT token and a machine reporting readings.
+        """
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.machine = Machine.objects.create(name='Press', model_number='P1', location='Hall A',
+                                              status='operational')
+
+    def reading(self, value, recorded_at, metric='temperature'):
+        return {'machine': self.machine.pk, 'metric': metric, 'value': value,
+                'recorded_at': recorded_at}
+
+    def test_ingest_updates_rollups_incrementally(self):
+        """Test that batches are stored and merged into minute and hour rollups."""
+        url = reverse('telemetry_ingest')
+        response = self.client.post(url, [
+            self.reading(20.0, '2024-12-01T10:00:05Z'),
+            self.reading(24.0, '2024-12-01T10:00:40Z'),
+            self.reading(30.0, '2024-12-01T10:15:00Z'),
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['ingested'], 3)
+        response = self.client.post(url, {'readings': [self.reading(10.0, '2024-12-01T10:00:59Z')]},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reading.objects.count(), 4)
+
+        minute = Rollup.objects.get(resolution='minute', bucket='2024-12-01T10:00:00Z')
+        self.assertEqual((minute.count, minute.total, minute.minimum, minute.maximum),
+                         (3, 54.0, 10.0, 24.0))
+        hour = Rollup.objects.get(resolution='hour')
+        self.assertEqual((hour.count, hour.minimum, hour.maximum), (4, 10.0, 30.0))
+
+        response = self.client.get(reverse('telemetry_chart', args=[self.machine.pk]), {
+            'metric': 'temperature', 'resolution': 'minute',
+            'start': '2024-12-01T10:00:00Z', 'end': '2024-12-01T11:00:00Z',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(point['count'], point['avg']) for point in response.data['points']],
+                         [(3, 18.0), (1, 30.0)])
+
+    def test_invalid_batch_stores_nothing(self):
+        """Test that a batch with a bad reading is rejected as a whole."""
+        response = self.client.post(reverse('telemetry_ingest'), [
+            self.reading(20.0, '2024-12-01T10:00:05Z'),
+            self.reading(21.0, 'yesterday'),
+            {'machine': self.machine.pk + 1, 'metric': 'pressure', 'value': 1,
+             'recorded_at': '2024-12-01T10:00:00Z'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(Reading.objects.exists())
+        self.assertFalse(Rollup.objects.exists())
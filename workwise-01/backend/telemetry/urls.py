@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import MachineChartView, ReadingIngestView
+
+urlpatterns = [
+    path('readings/', ReadingIngestView.as_view(), name='telemetry_ingest'),
+    path('machines/<int:machine_id>/chart/', MachineChartView.as_view(), name='telemetry_chart'),
+]
@@ -0,0 +1,121 @@
+# pylint: disable=no-member
+from datetime import timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .ingest import MAX_BATCH_SIZE, METRICS, InvalidBatch, ingest
+from .models import Rollup
+
+BUCKET_WIDTHS = {
+    Rollup.RESOLUTION_MINUTE: timedelta(minutes=1),
+    Rollup.RESOLUTION_HOUR: timedelta(hours=1),
+}
+
+
+class ReadingIngestView(APIView):
+    """
+    API view to ingest a batch of machine sensor readings.
+
+    Accepts up to `MAX_BATCH_SIZE` readings per request, written in one transaction
+    together with their minute and hour rollups.
+    """
+
+    max_errors = 100
+
+    def post(self, request):
+        """
+        Handle POST requests carrying readings.
+
+        Request body:
+            A list of readings, or ``{"readings": [...]}``. Each reading has
+            `machine` (id), `metric` (temperature, vibration or run_hours), `value`
+            and `recorded_at` (ISO 8601).
+
+        Returns:
+            Response: 201 with the number of readings stored, or 400 listing the
+            invalid readings, in which case nothing is stored.
+        """
+        items = request.data.get('readings') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of readings"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response({"error": f"At most {MAX_BATCH_SIZE} readings per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            count = ingest(items)
+        except InvalidBatch as exc:
+            return Response({"error": str(exc), "errors": exc.errors[:self.max_errors]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"ingested": count}, status=status.HTTP_201_CREATED)
+
+
+class MachineChartView(APIView):
+    """
+    API view returning a chart series of one metric of a machine.
+
+    Served entirely from the rollup table: one row per minute or hour bucket,
+    however many raw readings it summarizes.
+    """
+
+    max_points = 2000
+
+    def get(self, request, machine_id):
+        """
+        Handle GET requests for a chart series.
+
+        Query parameters:
+            metric (str): temperature, vibration or run_hours.
+            resolution (str): `minute` or `hour` (default).
+            start (str): ISO 8601 start of the window, defaults to `max_points`
+                         buckets before `end`.
+            end (str): ISO 8601 end of the window, defaults to now.
+
+        Returns:
+            Response: The buckets in time order with count, average, min and max.
+        """
+        params = request.query_params
+        metric = params.get('metric')
+        resolution = params.get('resolution', Rollup.RESOLUTION_HOUR)
+        if metric not in METRICS or resolution not in BUCKET_WIDTHS:
+            return Response({"error": f"metric must be one of {', '.join(sorted(METRICS))} "
+                                      "and resolution minute or hour"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        width = BUCKET_WIDTHS[resolution]
+        try:
+            end = parse_datetime(params['end']) if 'end' in params else timezone.now()
+            start = end - width * self.max_points
+            if 'start' in params:
+                start = parse_datetime(params['start'])
+        except (TypeError, ValueError):
+            start = end = None
+        if start is None or end is None:
+            return Response({"error": "start and end must be ISO 8601 timestamps"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        start, end = [value if timezone.is_aware(value)
+                      else timezone.make_aware(value, dt_timezone.utc)
+                      for value in (start, end)]
+        if not start <= end <= start + width * self.max_points:
+            return Response(
+                {"error": f"The window must cover at most {self.max_points} {resolution}s"},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = (Rollup.objects.filter(machine_id=machine_id, metric=metric,
+                                         resolution=resolution, bucket__gte=start, bucket__lte=end)
+                   .order_by('bucket')
+                   .values_list('bucket', 'count', 'total', 'minimum', 'maximum'))
+        return Response({
+            'machine': machine_id,
+            'metric': metric,
+            'resolution': resolution,
+            'points': [
+                {'bucket': bucket, 'count': count, 'avg': total / count, 'min': minimum,
+                 'max': maximum}
+                for bucket, count, total, minimum, maximum in rollups
+            ],
+        })